@@ -5,8 +5,35 @@ def simulate(args):
     from arsim.cli.env import create_scene_from_pyfile
 
     scene = create_scene_from_pyfile(args.file)
+    if args.cache_dir is not None:
+        scene.map.cache_dir = args.cache_dir
+    if args.restore is not None:
+        scene.restore_checkpoint(args.restore)
+    if args.checkpoint is not None:
+        from arsim.checkpoint import CheckpointPolicy
+
+        if args.checkpoint_interval is None and args.checkpoint_events is None:
+            args.checkpoint_interval = 3600
+        scene.checkpoint = CheckpointPolicy(
+            args.checkpoint,
+            interval=args.checkpoint_interval,
+            events=args.checkpoint_events,
+        )
+        scene.checkpoint.reset(scene.now_time)
     scene.run()
 
+def batch(args):
+    import json
+    from arsim.cli.batch import expand_scenarios, format_summary, run_batch
+
+    files = expand_scenarios(args.files)
+    results = run_batch(files, workers=args.workers, cache_dir=args.cache_dir)
+    print(format_summary(results))
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
 def test(args):
     print("test")
 
@@ -21,12 +48,51 @@ subparsers = parser.add_subparsers(help="subcommand")
 
 parser_simulate = subparsers.add_parser("simulate", help="simulate help")
 parser_simulate.add_argument("file", help="data file to import")
+parser_simulate.add_argument(
+    "--cache-dir", default=None, help="directory to keep distance matrices across runs"
+)
+parser_simulate.add_argument(
+    "--checkpoint", default=None, help="file to write checkpoints to during the run"
+)
+parser_simulate.add_argument(
+    "--checkpoint-interval",
+    type=float,
+    default=None,
+    help="simulated seconds between checkpoints (default 3600)",
+)
+parser_simulate.add_argument(
+    "--checkpoint-events",
+    type=int,
+    default=None,
+    help="processed events between checkpoints",
+)
+parser_simulate.add_argument(
+    "--restore", default=None, help="checkpoint file to resume the run from"
+)
 parser_simulate.set_defaults(func=simulate)
 
+# batch
+parser_batch = subparsers.add_parser("batch", help="run many data files in a process pool")
+parser_batch.add_argument(
+    "files", nargs="+", help="data files or glob patterns (e.g. 'scenarios/*.py')"
+)
+parser_batch.add_argument(
+    "-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)"
+)
+parser_batch.add_argument(
+    "--cache-dir", default=None, help="directory to keep distance matrices across runs"
+)
+parser_batch.add_argument(
+    "--output", default=None, help="write per-scenario results to this JSON file"
+)
+parser_batch.set_defaults(func=batch)
+
 
 # test
 parser_test = subparsers.add_parser("test", help="for program test")
 parser_test.set_defaults(func=test)
 
-args = parser.parse_args()
-args.func(args)
+if __name__ == "__main__":
+    # batch 的工作进程以 spawn 方式启动时会重新导入本文件，不能在导入时执行命令
+    args = parser.parse_args()
+    args.func(args)
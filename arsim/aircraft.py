@@ -14,6 +14,8 @@ AircraftType = Literal["Helicopter"] | Literal["FixedWing"]
 
 
 class AircraftAbility:
+    __slots__ = ("map",)
+
     _map = {
         "Reconnoitre": 0b1,
         "Freight": 0b10,
@@ -56,6 +58,41 @@ class AircraftAbility:
 
 
 class Aircraft:
+    # 大规模机队与方案中实例数量多，使用 __slots__ 代替实例字典
+    __slots__ = (
+        "name",
+        "price",
+        "current_fuel",
+        "ability",
+        "rotor_area",
+        "air_area",
+        "max_fuel",
+        "cruising_speed",
+        "fuel_consumption_per_unit_time",
+        "max_capacity",
+        "max_internal_load",
+        "max_external_load",
+        "fuel_fill_time",
+        "person_on_off_time",
+        "supply_load_time",
+        "device_load_time",
+        "patient_on_off_time",
+        "water_weight",
+        "water_load_time",
+        "extinguishing_time",
+        "search_time",
+        "winch_person_time",
+        "winch_patient_time",
+        "now_position",
+        "now_supply",
+        "now_resuce_people",
+        "now_device",
+        "now_trapped_people",
+        "now_ill_people",
+        "now_water",
+        "type",
+    )
+
     def __init__(
         self,
         price: float,
@@ -16,7 +16,8 @@ class SoSAPI:
         # self.subtask = SubTask
 
     def add_task(self, t_type, position, /, on_finished=None) -> None:
-        self._scene.tasks.append(Task(self._scene, t_type, position, on_finished))  # type: ignore
+        # Task 创建时自动加入场景
+        Task(self._scene, t_type, position, on_finished)  # type: ignore
 
     def add_subtask(self, task_type, aircraft, position, **kwargs):
         self._scene.add_subtask(SubTask(self._scene, task_type, aircraft, position, **kwargs))  # type: ignore
@@ -0,0 +1,283 @@
+"""推演状态的检查点
+
+检查点只保存推演过程中会变化的状态（时间、地点资源、航空器状态、子任务与事件队列），
+地点、航空器的静态属性以及 special_condition、on_finished 等回调不写入文件。
+恢复时需要先由同一份数据文件创建场景，再把检查点中的状态覆盖到该场景上，
+地点与航空器按其在地图、场景中的下标对应。
+
+文件为 numpy 的 npz 格式，数值状态保存为数组，子任务等结构化状态保存为 JSON 字符串，
+读取时不需要 pickle。
+"""
+
+from typing import Optional, TYPE_CHECKING
+import json
+import math
+import os
+import numpy as np
+
+from .map import Position
+from .task import SubTask
+from .utils.logger import logger
+
+if TYPE_CHECKING:
+    from .scene import Scene
+
+
+CHECKPOINT_VERSION = 2
+
+# 地点上随推演变化的资源
+POSITION_FIELDS = (
+    "supply",
+    "rescue_people",
+    "trapped_people",
+    "device",
+    "patient",
+    "water",
+    "already_search",
+)
+# 航空器随推演变化的状态，位置单独保存为地点下标
+AIRCRAFT_FIELDS = (
+    "current_fuel",
+    "now_supply",
+    "now_resuce_people",
+    "now_device",
+    "now_trapped_people",
+    "now_ill_people",
+    "now_water",
+)
+
+
+class CheckpointMismatchException(Exception):
+    pass
+
+
+class CheckpointPolicy:
+    def __init__(
+        self,
+        path: str,
+        /,
+        interval: Optional[float] = None,
+        events: Optional[int] = None,
+    ) -> None:
+        """推演过程中写入检查点的策略，两个条件满足任意一个即写入
+
+        Args:
+            path (str): 检查点文件路径，每次写入覆盖上一次的检查点
+            interval (Optional[float], optional): 推演时间间隔（秒）. Defaults to None.
+            events (Optional[int], optional): 处理的事件数间隔. Defaults to None.
+        """
+        if interval is None and events is None:
+            raise ValueError("检查点需要设置时间间隔或事件数间隔")
+        self.path: str = path
+        self.interval: Optional[float] = interval
+        self.events: Optional[int] = events
+        self._last_time: float = 0
+        self._last_events: int = 0
+        self._events: int = 0
+
+    def reset(self, now_time: float) -> None:
+        self._last_time = now_time
+        self._last_events = self._events
+
+    def step(self, scene: "Scene") -> bool:
+        """处理完一个事件后调用，需要时写入检查点
+
+        Args:
+            scene (Scene): 推演场景
+
+        Returns:
+            bool: 是否写入了检查点
+        """
+        self._events += 1
+        due = (
+            self.interval is not None
+            and scene.now_time - self._last_time >= self.interval
+        ) or (
+            self.events is not None and self._events - self._last_events >= self.events
+        )
+        if due:
+            save_checkpoint(scene, self.path)
+            self.reset(scene.now_time)
+        return due
+
+
+def _position_state(scene: "Scene") -> np.ndarray:
+    state = np.full((len(scene.map), len(POSITION_FIELDS)), np.nan)
+    for i, p in enumerate(scene.map.position):
+        for j, field in enumerate(POSITION_FIELDS):
+            value = getattr(p, field, None)
+            if value is not None:
+                state[i, j] = value
+    return state
+
+
+def _aircraft_state(scene: "Scene") -> np.ndarray:
+    state = np.empty((len(scene.aircrafts), len(AIRCRAFT_FIELDS) + 1))
+    for i, ac in enumerate(scene.aircrafts):
+        state[i, 0] = (
+            -1 if ac.now_position is None else scene.map.index[ac.now_position]
+        )
+        state[i, 1:] = [getattr(ac, field) for field in AIRCRAFT_FIELDS]
+    return state
+
+
+def _dump_subtask(scene: "Scene", st: SubTask, aircraft: dict) -> dict:
+    data = {
+        "type": st.type,
+        "aircraft": aircraft[st.aircraft],
+        "position": scene.map.index[st.position],
+        "addition": dict(st.addition),
+        "is_fueled": st.is_fueled,
+        "start_tick": st.start_tick,
+        "arrive_tick": st.arrive_tick,
+        "finish_tick": st.finish_tick,
+        "arrived": st._arrived,
+        "finished": st._finished,
+        "duration": st._duration,
+    }
+    if hasattr(st, "leg_ticks"):
+        data["distance"] = st.distance
+        data["leg_time"] = st.leg_time
+        data["leg_ticks"] = st.leg_ticks
+    return data
+
+
+def _load_subtask(scene: "Scene", data: dict) -> SubTask:
+    # 检查点中的子任务在添加时已经检查过，不按航空器与地点的当前状态重新检查
+    st = SubTask.unchecked(
+        scene,
+        data["type"],
+        scene.aircrafts[data["aircraft"]],
+        scene.map.position[data["position"]],
+        data["addition"],
+    )
+    st.is_fueled = data["is_fueled"]
+    st.start_tick = data["start_tick"]
+    st.arrive_tick = data["arrive_tick"]
+    st.finish_tick = data["finish_tick"]
+    st._arrived = data["arrived"]
+    st._finished = data["finished"]
+    st._duration = data.get("duration")
+    if "leg_ticks" in data:
+        st.distance = data["distance"]
+        st.leg_time = data["leg_time"]
+        st.leg_ticks = data["leg_ticks"]
+    return st
+
+
+def save_checkpoint(scene: "Scene", path: str) -> None:
+    """把推演状态写入检查点文件
+
+    Args:
+        scene (Scene): 推演场景
+        path (str): 检查点文件路径
+    """
+    aircraft = {ac: i for i, ac in enumerate(scene.aircrafts)}
+
+    pending = scene.pending_events()
+    current = []
+    for ac in scene.aircrafts:
+        st = scene.aircraft_to_subtask[ac]
+        if st is None:
+            current.append(None)
+            continue
+        data = _dump_subtask(scene, st, aircraft)
+        if st in pending:
+            data["event"] = pending[st]
+        current.append(data)
+
+    meta = {
+        "version": CHECKPOINT_VERSION,
+        "ticks_per_second": scene.TICKS_PER_SECOND,
+        "now_tick": scene.now_tick,
+        "event_seq": scene._event_seq,
+        "positions": [p.name for p in scene.map.position],
+        "aircrafts": [ac.name for ac in scene.aircrafts],
+        "current": current,
+        "queue": [
+            [_dump_subtask(scene, st, aircraft) for st in scene.aircraft_subtask_queue[ac]]
+            for ac in scene.aircrafts
+        ],
+        "ready": [aircraft[ac] for ac in scene._ready_aircraft],
+        "tasks": [task.is_finished for task in scene.tasks],
+    }
+
+    # 先写临时文件再替换，写入过程中中断不会损坏上一次的检查点
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp,
+        meta=np.array(json.dumps(meta, ensure_ascii=False)),
+        position=_position_state(scene),
+        aircraft=_aircraft_state(scene),
+    )
+    os.replace(tmp, path)
+    logger.info(f"[{scene.now_time}] 写入检查点 {path}")
+
+
+def restore_checkpoint(scene: "Scene", path: str) -> None:
+    """从检查点文件恢复推演状态
+
+    场景需要由写入检查点时的同一份数据创建，原有的子任务队列会被检查点中的内容替换
+
+    Args:
+        scene (Scene): 推演场景
+        path (str): 检查点文件路径
+
+    Raises:
+        CheckpointMismatchException: 检查点与场景的地点或航空器不一致
+    """
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        position_state = data["position"]
+        aircraft_state = data["aircraft"]
+
+    if meta["version"] != CHECKPOINT_VERSION:
+        raise CheckpointMismatchException(f"不支持的检查点版本 {meta['version']}")
+    if meta["ticks_per_second"] != scene.TICKS_PER_SECOND:
+        raise CheckpointMismatchException(f"检查点 {path} 与场景的时间单位不一致")
+    if meta["positions"] != [p.name for p in scene.map.position]:
+        logger.error(f"检查点 {path} 与场景的地点不一致")
+        raise CheckpointMismatchException(f"检查点 {path} 与场景的地点不一致")
+    if meta["aircrafts"] != [ac.name for ac in scene.aircrafts]:
+        logger.error(f"检查点 {path} 与场景的航空器不一致")
+        raise CheckpointMismatchException(f"检查点 {path} 与场景的航空器不一致")
+    if len(meta["tasks"]) != len(scene.tasks):
+        logger.error(f"检查点 {path} 与场景的任务不一致")
+        raise CheckpointMismatchException(f"检查点 {path} 与场景的任务不一致")
+
+    for p, row in zip(scene.map.position, position_state):
+        for field, value in zip(POSITION_FIELDS, row):
+            if not math.isnan(value):
+                current = getattr(p, field)
+                setattr(p, field, type(current)(value))
+
+    for ac, row in zip(scene.aircrafts, aircraft_state):
+        index = int(row[0])
+        ac.now_position = None if index < 0 else scene.map.position[index]
+        for field, value in zip(AIRCRAFT_FIELDS, row[1:]):
+            setattr(ac, field, type(getattr(ac, field))(value))
+
+    for task, is_finished in zip(scene.tasks, meta["tasks"]):
+        task.is_finished = is_finished
+    scene._unfinished_tasks = sum(not task.is_finished for task in scene.tasks)
+
+    scene.now_tick = meta["now_tick"]
+    scene._event_seq = meta["event_seq"]
+    scene._events = []
+    scene._occupancy = {}
+    scene._pending_subtask = 0
+    for ac, data, queue in zip(scene.aircrafts, meta["current"], meta["queue"]):
+        scene.aircraft_to_subtask[ac] = None
+        if data is not None:
+            st = _load_subtask(scene, data)
+            scene._set_current_subtask(ac, st)
+            if "event" in data:
+                tick, seq, kind = data["event"]
+                scene._events.append((tick, seq, kind, st))
+        scene.aircraft_subtask_queue[ac] = type(scene.aircraft_subtask_queue[ac])(
+            _load_subtask(scene, st) for st in queue
+        )
+        scene._pending_subtask += len(queue)
+    scene._events.sort(key=lambda event: event[:2])
+    scene._ready_aircraft = {scene.aircrafts[i]: None for i in meta["ready"]}
+    logger.info(f"从检查点 {path} 恢复推演，推演时间 {scene.now_time}")
@@ -0,0 +1,192 @@
+from typing import Iterator, Optional, Sequence, TypedDict
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import glob
+import os
+import sys
+import time
+import traceback
+
+from .env import create_scene_from_pyfile
+from ..collections.lru import LRUCache
+from ..map import Position
+from ..task import SUBTASK_KINDS
+from ..utils.logger import logger
+
+
+class BatchResult(TypedDict):
+    # 场景文件
+    file: str
+    # 推演结束时间（秒），出错时为 None
+    now_time: Optional[float]
+    # 任务总数与已完成的任务数
+    tasks: int
+    finished_tasks: int
+    # 推演结束时仍未执行的子任务数
+    pending_subtasks: int
+    # 是否因超过最长救援时间而停止
+    timeout: bool
+    # 运行耗时（秒）
+    elapsed: float
+    # 出错时的异常信息
+    error: Optional[str]
+
+
+def expand_scenarios(patterns: Sequence[str]) -> list[str]:
+    """展开场景文件列表中的通配符，保持顺序并去除重复
+
+    Args:
+        patterns (Sequence[str]): 场景文件或通配符
+
+    Returns:
+        list[str]: 场景文件列表
+    """
+    files: dict[str, None] = {}
+    for pattern in patterns:
+        matched = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if len(matched) == 0:
+            logger.warning(f"通配符 {pattern} 没有匹配到场景文件")
+        for file in matched:
+            files[os.path.abspath(file)] = None
+    return list(files)
+
+
+@contextlib.contextmanager
+def isolated_globals() -> Iterator[None]:
+    """在退出时恢复场景文件可能修改的全局状态
+
+    包括全局的距离计算方式与误差上限、距离缓存、注册的子任务类型、sys.path
+    以及从新加入 sys.path 的目录导入的模块，避免同一进程中依次运行的场景互相影响。
+    场景运行期间使用容量相同的新距离缓存
+    """
+    method, tolerance = Position._distance_method, Position._distance_tolerance
+    cache = Position._distance_cache
+    kinds = dict(SUBTASK_KINDS)
+    path = list(sys.path)
+    modules = set(sys.modules)
+    Position._distance_cache = LRUCache(cache.maxsize)
+    try:
+        yield
+    finally:
+        Position._distance_method, Position._distance_tolerance = method, tolerance
+        Position._distance_cache = cache
+        SUBTASK_KINDS.clear()
+        SUBTASK_KINDS.update(kinds)
+        added = [os.path.abspath(d) for d in sys.path if d not in path]
+        sys.path[:] = path
+        for name in set(sys.modules) - modules:
+            file = getattr(sys.modules[name], "__file__", None)
+            if file is not None and os.path.dirname(os.path.abspath(file)) in added:
+                del sys.modules[name]
+
+
+def run_scenario(file: str, cache_dir: Optional[str] = None) -> BatchResult:
+    """运行一个场景文件，异常作为结果的一部分返回
+
+    场景修改的全局状态在运行结束后恢复（见 isolated_globals）
+
+    Args:
+        file (str): 场景文件
+        cache_dir (Optional[str], optional): 距离矩阵缓存目录. Defaults to None.
+
+    Returns:
+        BatchResult: 运行结果
+    """
+    start = time.perf_counter()
+    result: BatchResult = {
+        "file": file,
+        "now_time": None,
+        "tasks": 0,
+        "finished_tasks": 0,
+        "pending_subtasks": 0,
+        "timeout": False,
+        "elapsed": 0,
+        "error": None,
+    }
+    try:
+        with isolated_globals():
+            scene = create_scene_from_pyfile(file)
+            if cache_dir is not None:
+                scene.map.cache_dir = cache_dir
+            scene.run()
+            result["now_time"] = scene.now_time
+            result["tasks"] = len(scene.tasks)
+            result["finished_tasks"] = sum(task.is_finished for task in scene.tasks)
+            result["pending_subtasks"] = scene.pending_subtask_count
+            result["timeout"] = scene.is_timeout
+    except Exception as e:
+        logger.error(f"场景 {file} 运行失败：{e}")
+        result["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def _run_scenario(args: tuple[str, Optional[str]]) -> BatchResult:
+    return run_scenario(*args)
+
+
+def run_batch(
+    files: Sequence[str],
+    /,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+) -> list[BatchResult]:
+    """在进程池中运行多个场景
+
+    每个工作进程只导入一次 arsim，并依次运行分配到的多个场景
+
+    Args:
+        files (Sequence[str]): 场景文件列表
+        workers (Optional[int], optional): 工作进程数，None 为 CPU 数，1 表示在当前进程中运行. Defaults to None.
+        cache_dir (Optional[str], optional): 距离矩阵缓存目录，各场景共用. Defaults to None.
+
+    Returns:
+        list[BatchResult]: 各场景的运行结果，顺序与 files 一致
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(files)))
+    logger.info(f"使用 {workers} 个进程运行 {len(files)} 个场景")
+
+    if workers == 1:
+        return [run_scenario(file, cache_dir) for file in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # 小块分配减少进程间通信，同时避免单个进程分到过多耗时场景
+        chunksize = max(1, len(files) // (workers * 4))
+        return list(
+            pool.map(
+                _run_scenario,
+                [(file, cache_dir) for file in files],
+                chunksize=chunksize,
+            )
+        )
+
+
+def format_summary(results: Sequence[BatchResult]) -> str:
+    """生成批量运行的汇总表
+
+    Args:
+        results (Sequence[BatchResult]): 运行结果
+
+    Returns:
+        str: 汇总文本
+    """
+    lines = [f"{'场景':<40} {'结束时间':>12} {'任务':>9} {'耗时':>8}  状态"]
+    for r in results:
+        name = os.path.basename(r["file"])
+        if r["error"] is not None:
+            status = f"错误 {r['error']}"
+        elif r["timeout"]:
+            status = "超时"
+        elif r["pending_subtasks"] > 0:
+            status = f"剩余 {r['pending_subtasks']} 个子任务"
+        else:
+            status = "完成"
+        now_time = "-" if r["now_time"] is None else f"{r['now_time']:.1f}"
+        tasks = f"{r['finished_tasks']}/{r['tasks']}"
+        lines.append(
+            f"{name:<40} {now_time:>12} {tasks:>9} {r['elapsed']:>7.2f}s  {status}"
+        )
+    failed = sum(r["error"] is not None for r in results)
+    lines.append(f"共 {len(results)} 个场景，失败 {failed} 个")
+    return "\n".join(lines)
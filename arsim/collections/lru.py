@@ -0,0 +1,94 @@
+from typing import Generic, Hashable, Optional, TypeVar
+from collections import OrderedDict
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """有容量上限的 LRU 缓存，并记录命中、未命中与淘汰次数"""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        if maxsize < 0:
+            raise ValueError("缓存容量不能为负数")
+        # 最大缓存条目数，0 表示不缓存
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> Optional[V]:
+        """读取缓存，命中时将条目移到最近使用的位置
+
+        Args:
+            key (K): 键
+
+        Returns:
+            Optional[V]: 缓存的值，未命中时为 None
+        """
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目
+
+        Args:
+            key (K): 键
+            value (V): 值
+        """
+        if self.maxsize == 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        """调整缓存容量
+
+        Args:
+            maxsize (int): 新的容量
+        """
+        if maxsize < 0:
+            raise ValueError("缓存容量不能为负数")
+        self.maxsize = maxsize
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存与统计"""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0
+
+    def stats(self) -> dict[str, float]:
+        """缓存统计信息
+
+        Returns:
+            dict[str, float]: 容量、条目数、命中、未命中、淘汰次数与命中率
+        """
+        return {
+            "maxsize": self.maxsize,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
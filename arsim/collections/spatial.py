@@ -0,0 +1,249 @@
+from typing import Optional
+import math
+import numpy as np
+
+# 平均地球半径（km）
+EARTH_RADIUS: float = 6371.0088
+
+
+def to_unit_sphere(longitude: np.ndarray, latitude: np.ndarray) -> np.ndarray:
+    """将经纬度转化为单位球面上的三维坐标
+
+    Args:
+        longitude (np.ndarray): 经度
+        latitude (np.ndarray): 纬度
+
+    Returns:
+        np.ndarray: n x 3 的坐标数组
+    """
+    lng = np.radians(longitude)
+    lat = np.radians(latitude)
+    cos_lat = np.cos(lat)
+    return np.stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)), axis=-1)
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """单位球面上的弦长转化为大圆距离（km）"""
+    return 2 * np.arcsin(np.minimum(chord / 2, 1)) * EARTH_RADIUS
+
+
+def km_to_chord(distance: float) -> float:
+    """大圆距离（km）转化为单位球面上的弦长"""
+    return 2 * math.sin(min(distance / EARTH_RADIUS, math.pi) / 2)
+
+
+class SphereGrid:
+    """单位球面三维坐标上的均匀网格索引，用于最近邻与范围查询
+
+    网格只覆盖数据点的包围盒，边长按数据的实际范围与网格占用情况选取，使每个
+    非空网格平均只包含少量点；查询时由近及远逐层扫描网格，直到已扫描的范围
+    足以保证结果正确，扫描的层数过多时改为扫描所有点。
+    """
+
+    # 每个网格平均包含的点数
+    _POINTS_PER_CELL: float = 4
+    # 每一维网格数量的上限，保证网格编号不超出 int64
+    _MAX_CELLS_PER_AXIS: int = 1 << 20
+    # 按网格占用情况调整边长的最多次数
+    _REFINE_STEPS: int = 4
+
+    def __init__(
+        self,
+        longitude: np.ndarray,
+        latitude: np.ndarray,
+        ids: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Args:
+            longitude (np.ndarray): 经度
+            latitude (np.ndarray): 纬度
+            ids (Optional[np.ndarray]): 各点的编号，默认为 0..n-1
+        """
+        n = len(longitude)
+        self.ids: np.ndarray = (
+            np.arange(n) if ids is None else np.asarray(ids, dtype=np.int64)
+        )
+        self.points: np.ndarray = to_unit_sphere(
+            np.asarray(longitude, dtype=np.float64),
+            np.asarray(latitude, dtype=np.float64),
+        ).reshape(n, 3)
+
+        # 网格原点为包围盒的最小角
+        if n > 0:
+            self.origin: np.ndarray = self.points.min(axis=0)
+            extent = self.points.max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(3)
+            extent = np.zeros(3)
+        self.cell: float = SphereGrid._initial_cell(extent, n)
+
+        keys = self._layout(extent)
+        for _ in range(SphereGrid._REFINE_STEPS):
+            # 数据在包围盒内分布不均时，非空网格中的点数会远多于预期，缩小网格
+            occupancy = n / max(len(np.unique(keys)), 1)
+            smallest = extent.max() / SphereGrid._MAX_CELLS_PER_AXIS
+            if occupancy <= 2 * SphereGrid._POINTS_PER_CELL or self.cell <= smallest:
+                break
+            self.cell = max(
+                self.cell / math.sqrt(occupancy / SphereGrid._POINTS_PER_CELL), smallest
+            )
+            keys = self._layout(extent)
+
+        order = np.argsort(keys, kind="stable")
+        self._order: np.ndarray = order
+        self._keys_sorted: np.ndarray = keys[order]
+        self._cell_keys, self._cell_start = np.unique(
+            self._keys_sorted, return_index=True
+        )
+        self._cell_end: np.ndarray = np.append(self._cell_start[1:], n)
+        self._shells: dict[int, np.ndarray] = {}
+
+    @staticmethod
+    def _initial_cell(extent: np.ndarray, n: int) -> float:
+        # 球面上的点集所占面积近似为包围盒最大两维的乘积
+        e = np.sort(extent)
+        if e[2] == 0:
+            return 2.0
+        if e[1] > 0:
+            cell = math.sqrt(e[2] * e[1] * SphereGrid._POINTS_PER_CELL / n)
+        else:
+            cell = e[2] * SphereGrid._POINTS_PER_CELL / n
+        return max(cell, e[2] / SphereGrid._MAX_CELLS_PER_AXIS)
+
+    def _layout(self, extent: np.ndarray) -> np.ndarray:
+        # 按当前边长确定每一维的网格数量，并返回各点所在网格的编号
+        self.shape: np.ndarray = np.ceil(extent / self.cell).astype(np.int64) + 1
+        return self._keys(np.minimum(self._cells(self.points), self.shape - 1))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        # 包围盒以外的查询点得到超出范围的网格坐标，由 _gather 过滤
+        return np.floor((points - self.origin) / self.cell).astype(np.int64)
+
+    def _keys(self, cells: np.ndarray) -> np.ndarray:
+        _, ny, nz = self.shape
+        return (cells[..., 0] * ny + cells[..., 1]) * nz + cells[..., 2]
+
+    def _shell(self, r: int) -> np.ndarray:
+        # 与中心网格切比雪夫距离恰为 r 的网格偏移
+        if r not in self._shells:
+            axis = np.arange(-r, r + 1)
+            offset = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), -1)
+            offset = offset.reshape(-1, 3)
+            self._shells[r] = offset[np.abs(offset).max(axis=1) == r]
+        return self._shells[r]
+
+    def _gather(self, center: np.ndarray, offset: np.ndarray) -> np.ndarray:
+        # 收集给定网格中的点在 points 中的下标
+        cells = center + offset
+        cells = cells[((cells >= 0) & (cells < self.shape)).all(axis=1)]
+        if len(cells) == 0 or len(self._cell_keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        keys = self._keys(cells)
+        pos = np.minimum(
+            np.searchsorted(self._cell_keys, keys), len(self._cell_keys) - 1
+        )
+        pos = pos[self._cell_keys[pos] == keys]
+        if len(pos) == 0:
+            return np.empty(0, dtype=np.int64)
+        ranges = [
+            self._order[s:e] for s, e in zip(self._cell_start[pos], self._cell_end[pos])
+        ]
+        return np.concatenate(ranges)
+
+    def _too_wide(self, r: int) -> bool:
+        # 扫描 r 层以内的网格不比直接扫描所有非空网格更划算
+        return (2 * r + 1) ** 3 >= len(self._cell_keys)
+
+    def nearest(
+        self,
+        longitude: float,
+        latitude: float,
+        k: int = 1,
+        exclude: Optional[int] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """查询距离给定位置最近的 k 个点
+
+        Args:
+            longitude (float): 经度
+            latitude (float): 纬度
+            k (int): 数量
+            exclude (Optional[int]): 需要排除的点编号
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (编号, 距离 km)，按距离从近到远排序
+        """
+        q = to_unit_sphere(np.array(longitude), np.array(latitude))
+        center = self._cells(q)
+        found: list[np.ndarray] = []
+        count = 0
+
+        # 查询点在包围盒以外时，与包围盒的切比雪夫距离以内的各层都没有网格
+        r = int(np.maximum(np.maximum(-center, center - (self.shape - 1)), 0).max())
+        while not self._too_wide(r):
+            idx = self._gather(center, self._shell(r))
+            if exclude is not None and len(idx) > 0:
+                idx = idx[self.ids[idx] != exclude]
+            if len(idx) > 0:
+                found.append(idx)
+                count += len(idx)
+            # 已扫描范围内的点保证覆盖弦长小于 r * cell 的所有点
+            if count >= k:
+                best = np.concatenate(found)
+                chord = np.linalg.norm(self.points[best] - q, axis=1)
+                kth = np.partition(chord, k - 1)[k - 1] if k > 0 else 0
+                if kth <= r * self.cell:
+                    order = np.argsort(chord, kind="stable")[:k]
+                    return self.ids[best[order]], chord_to_km(chord[order])
+            r += 1
+
+        # 查询点远离数据或附近的网格过于稀疏，直接扫描所有点
+        best = np.arange(len(self.ids))
+        if exclude is not None:
+            best = best[self.ids != exclude]
+        chord = np.linalg.norm(self.points[best] - q, axis=1)
+        if k < len(chord):
+            part = np.argpartition(chord, k)[:k]
+            best, chord = best[part], chord[part]
+        order = np.argsort(chord, kind="stable")[:k]
+        return self.ids[best[order]], chord_to_km(chord[order])
+
+    def within(
+        self,
+        longitude: float,
+        latitude: float,
+        radius: float,
+        exclude: Optional[int] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """查询给定位置半径范围内的所有点
+
+        Args:
+            longitude (float): 经度
+            latitude (float): 纬度
+            radius (float): 半径（km）
+            exclude (Optional[int]): 需要排除的点编号
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (编号, 距离 km)，按距离从近到远排序
+        """
+        q = to_unit_sphere(np.array(longitude), np.array(latitude))
+        limit = km_to_chord(radius)
+        r = int(math.ceil(limit / self.cell))
+
+        if self._too_wide(r):
+            # 查询范围覆盖了大部分网格，直接扫描所有点
+            idx = np.arange(len(self.ids))
+        else:
+            axis = np.arange(-r, r + 1)
+            offset = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), -1)
+            idx = self._gather(self._cells(q), offset.reshape(-1, 3))
+        if exclude is not None and len(idx) > 0:
+            idx = idx[self.ids[idx] != exclude]
+
+        chord = np.linalg.norm(self.points[idx] - q, axis=1)
+        mask = chord <= limit
+        idx, chord = idx[mask], chord[mask]
+        order = np.argsort(chord, kind="stable")
+        return self.ids[idx[order]], chord_to_km(chord[order])
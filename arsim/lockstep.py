@@ -0,0 +1,433 @@
+"""同一地图、同一机队上多个计划方案的向量化推演
+
+LockstepEngine 把 N 个方案的推演状态保存为 NumPy 数组（航空器所在地点、当前子任务、
+载荷、地点资源），每次迭代为所有方案各处理一个最早的事件。事件的先后顺序、加油保障的插入、
+子任务耗时与完成后的资源结算都与 Scene.run 一致，因此得到的结果与逐个方案调用 Scene.run 相同。
+
+子任务耗时直接由 SubTaskKind.duration 得到：对每架航空器、每种子任务类型，
+分别以数量 1 与 2 调用一次，得到耗时关于数量（附加信息中的数量、航空器当前载荷或剩余搜索面积）
+的一次函数系数。
+
+与 Scene 的区别：方案中的子任务不做有效性检查，也不支持 on_subtask_finish 回调。
+"""
+
+from typing import Optional, Sequence, TYPE_CHECKING
+from types import SimpleNamespace
+import copy
+import numpy as np
+
+from .aircraft import Aircraft
+from .task import (
+    SUBTASK_KINDS,
+    PlanItem,
+    TaskType,
+    PositionNotExistException,
+)
+from .examples import positions as epos
+from .utils.logger import logger
+
+if TYPE_CHECKING:
+    from .scene import Scene
+
+
+# 支持的子任务类型为内置的 TaskType，注册的其他类型不能向量化推演
+KINDS: tuple[TaskType, ...] = tuple(TaskType)
+_REFUEL = KINDS.index(TaskType.REFUEL)
+_SEARCH = KINDS.index(TaskType.SEARCH)
+
+# 载荷在航空器与地点上对应的属性，下标即载荷编号
+AIRCRAFT_LOADS = (
+    "now_supply",
+    "now_resuce_people",
+    "now_device",
+    "now_trapped_people",
+    "now_ill_people",
+    "now_water",
+)
+POSITION_RESOURCES = (
+    "supply",
+    "rescue_people",
+    "device",
+    "trapped_people",
+    "patient",
+    "water",
+)
+
+# 由子任务类型的描述得到载荷的变化
+# 装载类子任务：类型 -> (附加信息中的数量, 载荷编号, 是否直接赋值)
+_LOAD: dict[TaskType, tuple[str, int, bool]] = {}
+# 卸载类子任务：类型 -> 载荷编号
+_UNLOAD: dict[TaskType, int] = {}
+for _type in KINDS:
+    _kind = SUBTASK_KINDS[_type]
+    if _kind.load is None:
+        continue
+    if _kind.unload:
+        _UNLOAD[_type] = AIRCRAFT_LOADS.index(_kind.load)
+    else:
+        _LOAD[_type] = (_kind.amount, AIRCRAFT_LOADS.index(_kind.load), _kind.assign)  # type: ignore
+
+_MOVE, _WORK, _IDLE = 0, 1, 2
+
+
+class LockstepResult:
+    def __init__(
+        self,
+        now_time: np.ndarray,
+        timeout: np.ndarray,
+        events: np.ndarray,
+        aircraft_position: np.ndarray,
+        aircraft_finish_time: np.ndarray,
+        current_fuel: np.ndarray,
+        loads: np.ndarray,
+        resources: np.ndarray,
+        already_search: np.ndarray,
+    ) -> None:
+        # 各方案最后一个事件的时间，形状 (N,)
+        self.now_time: np.ndarray = now_time
+        # 是否因超过最长救援时间而停止，形状 (N,)
+        self.timeout: np.ndarray = timeout
+        # 处理的事件数，形状 (N,)
+        self.events: np.ndarray = events
+        # 航空器所在地点在 map.position 中的下标，-1 表示没有位置，形状 (N, A)
+        self.aircraft_position: np.ndarray = aircraft_position
+        # 航空器最后一个子任务的完成时间，没有子任务时为 0，形状 (N, A)
+        self.aircraft_finish_time: np.ndarray = aircraft_finish_time
+        self.current_fuel: np.ndarray = current_fuel
+        # 航空器载荷，形状 (N, A, len(AIRCRAFT_LOADS))
+        self.loads: np.ndarray = loads
+        # 地点资源，形状 (N, P, len(POSITION_RESOURCES))
+        self.resources: np.ndarray = resources
+        # 灾区已搜索的面积，形状 (N, P)
+        self.already_search: np.ndarray = already_search
+
+    def __len__(self) -> int:
+        return len(self.now_time)
+
+    def load(self, name: str) -> np.ndarray:
+        """航空器的某项载荷
+
+        Args:
+            name (str): AIRCRAFT_LOADS 中的属性名
+
+        Returns:
+            np.ndarray: 形状 (N, A)
+        """
+        return self.loads[:, :, AIRCRAFT_LOADS.index(name)]
+
+    def resource(self, name: str) -> np.ndarray:
+        """地点的某项资源
+
+        Args:
+            name (str): POSITION_RESOURCES 中的属性名
+
+        Returns:
+            np.ndarray: 形状 (N, P)
+        """
+        return self.resources[:, :, POSITION_RESOURCES.index(name)]
+
+
+def _duration_coefficients(aircrafts: Sequence[Aircraft]) -> tuple[np.ndarray, np.ndarray]:
+    # 以数量 1 与 2 调用 SubTaskKind.duration，得到耗时 = 截距 + 斜率 * 数量
+    values = np.zeros((2, len(aircrafts), len(KINDS)))
+    for q in (1, 2):
+        for i, ac in enumerate(aircrafts):
+            probe_ac = copy.copy(ac)
+            for name in AIRCRAFT_LOADS:
+                setattr(probe_ac, name, q)
+            for k, kind in enumerate(KINDS):
+                position = object.__new__(
+                    epos.Airport if k == _REFUEL else epos.DisasterArea
+                )
+                position.search = (True, q)
+                position.already_search = 0
+                probe_ac.now_position = position
+                probe = SimpleNamespace(
+                    aircraft=probe_ac,
+                    position=position,
+                    addition={key: q for key, _, _ in _LOAD.values()},
+                )
+                values[q - 1, i, k] = SUBTASK_KINDS[kind].duration(probe)
+    slope = values[1] - values[0]
+    return values[0] - slope, slope
+
+
+class LockstepEngine:
+    def __init__(self, scene: "Scene", plans: Sequence[Sequence[PlanItem]]) -> None:
+        """在同一场景上推演多个方案
+
+        场景提供地图、机队与它们的初始状态，以及距离计算方式与飞行时间表；场景本身不会被修改
+
+        Args:
+            scene (Scene): 场景模板
+            plans (Sequence[Sequence[PlanItem]]): 各方案按添加顺序排列的子任务
+
+        Raises:
+            PositionNotExistException: 子任务的地点不在地图上
+            ValueError: 子任务的航空器不在场景中或没有位置，或子任务类型不是内置的 TaskType
+        """
+        self.scene: "Scene" = scene
+        self.n_plan: int = len(plans)
+        aircrafts = scene.aircrafts
+        positions = scene.map.position
+        n, a, p = len(plans), len(aircrafts), len(positions)
+        aircraft_index = {ac: i for i, ac in enumerate(aircrafts)}
+        kind_index = {kind: k for k, kind in enumerate(KINDS)}
+
+        # 方案：(N, A, L) 的类型编号（-1 表示没有）、地点下标与数量
+        queues: list[list[list[tuple[int, int, int]]]] = []
+        # 航空器在各方案中第一次添加子任务的顺序，决定推演开始时的出发顺序
+        self._first: np.ndarray = np.full((n, a), np.iinfo(np.int64).max, dtype=np.int64)
+        for i, plan in enumerate(plans):
+            queue: list[list[tuple[int, int, int]]] = [[] for _ in range(a)]
+            for order, (ac, kind, position, addition) in enumerate(plan):
+                if ac not in aircraft_index:
+                    raise ValueError(f"航空器 {ac.name} 不在场景中")
+                # 没有位置的航空器无法计算航段，Scene 在开始执行子任务时同样失败
+                if ac.now_position is None or ac.now_position not in scene.map.index:
+                    logger.error(f"航空器 {ac.name} 当前位置为空或不在地图上")
+                    raise ValueError(f"航空器 {ac.name} 当前位置为空或不在地图上")
+                j = scene.map.index.get(position)
+                if j is None:
+                    logger.error(f"地点 {position.name} 不存在")
+                    raise PositionNotExistException(f"地点 {position.name} 不存在")
+                if kind not in kind_index:
+                    raise ValueError(f"方案推演不支持子任务类型 {kind}")
+                amount = addition.get(_LOAD[kind][0], 0) if kind in _LOAD else 0  # type: ignore
+                c = aircraft_index[ac]
+                queue[c].append((kind_index[kind], j, amount))
+                self._first[i, c] = min(self._first[i, c], order)
+            queues.append(queue)
+        # 末尾多留一列 -1，读取下一个子任务时不需要判断越界
+        length = max([len(q) for queue in queues for q in queue], default=0) + 1
+        self._plan_kind = np.full((n, a, length), -1, dtype=np.int64)
+        self._plan_target = np.zeros((n, a, length), dtype=np.int64)
+        self._plan_amount = np.zeros((n, a, length), dtype=np.int64)
+        for i, queue in enumerate(queues):
+            for c, q in enumerate(queue):
+                for k, (kind, j, amount) in enumerate(q):
+                    self._plan_kind[i, c, k] = kind
+                    self._plan_target[i, c, k] = j
+                    self._plan_amount[i, c, k] = amount
+
+        # 静态数据
+        speeds = sorted({ac.cruising_speed for ac in aircrafts})
+        # 与 Scene 相同，推演使用整数时间单位
+        self._ticks_per_second: int = scene.TICKS_PER_SECOND
+        self._speed = np.array(
+            [speeds.index(ac.cruising_speed) for ac in aircrafts], dtype=np.int64
+        )
+        self._max_fuel = np.array([ac.max_fuel for ac in aircrafts], dtype=np.float64)
+        self._intercept, self._slope = _duration_coefficients(aircrafts)
+        self._is_airport = np.array(
+            [isinstance(pos, epos.Airport) for pos in positions], dtype=bool
+        )
+        self._search_area = np.array(
+            [pos.search[1] if isinstance(pos, epos.DisasterArea) else 0 for pos in positions],
+            dtype=np.float64,
+        )
+        self._load_key = np.full(len(KINDS), -1, dtype=np.int64)
+        self._load_assign = np.zeros(len(KINDS), dtype=bool)
+        for kind, (_, slot, assign) in _LOAD.items():
+            self._load_key[kind_index[kind]] = slot
+            self._load_assign[kind_index[kind]] = assign
+        self._unload_key = np.full(len(KINDS), -1, dtype=np.int64)
+        for kind, slot in _UNLOAD.items():
+            self._unload_key[kind_index[kind]] = slot
+
+        # 初始状态
+        self._position0 = np.array(
+            [-1 if ac.now_position is None else scene.map.index[ac.now_position] for ac in aircrafts],
+            dtype=np.int64,
+        )
+        # 航空器只会停留在初始位置或方案中的地点，飞行时间表只包含这些地点，
+        # _local 将地图下标换算为表中的下标
+        used = np.unique(
+            np.concatenate(
+                [self._position0[self._position0 >= 0], self._plan_target[self._plan_kind >= 0]]
+            )
+        )
+        self._local = np.zeros(p, dtype=np.int64)
+        self._local[used] = np.arange(len(used))
+        if scene.map.uses_distance_matrix(scene.distance_method, scene.distance_tolerance):
+            tables = [scene.travel_tick_table(s)[np.ix_(used, used)] for s in speeds]
+        else:
+            # 地点较多的地图逐对查询航段时间，不建立整张地图的飞行时间表
+            sample = {ac.cruising_speed: ac for ac in aircrafts}
+            tables = [
+                np.array(
+                    [
+                        [scene.travel_ticks(sample[s], positions[i], positions[j]) for j in used]
+                        for i in used
+                    ],
+                    dtype=np.int64,
+                ).reshape(len(used), len(used))
+                for s in speeds
+            ]
+        self._travel_ticks = np.stack(tables + [np.zeros((len(used), len(used)), dtype=np.int64)])
+        self._fuel0 = np.array([ac.current_fuel for ac in aircrafts], dtype=np.float64)
+        self._loads0 = np.array(
+            [[getattr(ac, name) for name in AIRCRAFT_LOADS] for ac in aircrafts],
+            dtype=np.int64,
+        ).reshape(a, len(AIRCRAFT_LOADS))
+        self._resources0 = np.array(
+            [[getattr(pos, name) for name in POSITION_RESOURCES] for pos in positions],
+            dtype=np.int64,
+        ).reshape(p, len(POSITION_RESOURCES))
+        self._already_search0 = np.array(
+            [getattr(pos, "already_search", 0) for pos in positions], dtype=np.float64
+        )
+
+    def run(self, max_time: Optional[float] = None) -> LockstepResult:
+        """推演所有方案
+
+        Args:
+            max_time (Optional[float], optional): 最长推演时间，None 为 Scene.MAX_RESCUE_TIME. Defaults to None.
+
+        Returns:
+            LockstepResult: 各方案的推演结果
+        """
+        if max_time is None:
+            max_time = type(self.scene).MAX_RESCUE_TIME
+        limit = self.scene.to_ticks(max_time)
+        never = np.iinfo(np.int64).max
+        n, a = self._first.shape
+        rows_all = np.arange(n)
+
+        now = np.zeros(n, dtype=np.int64)
+        events = np.zeros(n, dtype=np.int64)
+        counter = np.zeros(n, dtype=np.int64)
+        position = np.broadcast_to(self._position0, (n, a)).copy()
+        fuel = np.broadcast_to(self._fuel0, (n, a)).copy()
+        loads = np.broadcast_to(self._loads0, (n,) + self._loads0.shape).copy()
+        resources = np.broadcast_to(self._resources0, (n,) + self._resources0.shape).copy()
+        already_search = np.broadcast_to(self._already_search0, (n, len(self._already_search0))).copy()
+
+        phase = np.full((n, a), _IDLE, dtype=np.int64)
+        next_tick = np.full((n, a), never, dtype=np.int64)
+        seq = np.zeros((n, a), dtype=np.int64)
+        finish_tick = np.zeros((n, a), dtype=np.int64)
+        cursor = np.zeros((n, a), dtype=np.int64)
+        fueled = np.zeros((n, a), dtype=bool)
+        kind = np.zeros((n, a), dtype=np.int64)
+        target = np.zeros((n, a), dtype=np.int64)
+        amount = np.zeros((n, a), dtype=np.int64)
+
+        def start_next(r: np.ndarray, c: np.ndarray) -> None:
+            # 与 Scene._start_next_subtask 相同：在机场出发且下一个子任务未加油时先插入加油保障
+            k = cursor[r, c]
+            has = self._plan_kind[r, c, k] >= 0
+            refuel = has & ~fueled[r, c] & (position[r, c] >= 0) & self._is_airport[position[r, c]]
+            take = has & ~refuel
+            phase[r[~has], c[~has]] = _IDLE
+            next_tick[r[~has], c[~has]] = never
+
+            rr, cc = r[refuel], c[refuel]
+            kind[rr, cc] = _REFUEL
+            target[rr, cc] = position[rr, cc]
+            amount[rr, cc] = 0
+            fueled[rr, cc] = True
+
+            rr, cc, kk = r[take], c[take], k[take]
+            kind[rr, cc] = self._plan_kind[rr, cc, kk]
+            target[rr, cc] = self._plan_target[rr, cc, kk]
+            amount[rr, cc] = self._plan_amount[rr, cc, kk]
+            cursor[rr, cc] = kk + 1
+            fueled[rr, cc] = False
+
+            rr, cc = r[has], c[has]
+            leg = self._travel_ticks[
+                self._speed[cc], self._local[position[rr, cc]], self._local[target[rr, cc]]
+            ]
+            phase[rr, cc] = _MOVE
+            next_tick[rr, cc] = now[rr] + leg
+            schedule(rr, cc)
+
+        def schedule(r: np.ndarray, c: np.ndarray) -> None:
+            # 同一方案中按安排的先后编号，同时发生的事件按编号顺序处理
+            if len(r) == 0:
+                return
+            order = np.argsort(r, kind="stable")
+            r, c = r[order], c[order]
+            first = np.r_[True, r[1:] != r[:-1]]
+            start = np.flatnonzero(first)
+            rank = np.arange(len(r)) - np.repeat(start, np.diff(np.r_[start, len(r)]))
+            seq[r, c] = counter[r] + rank
+            np.add.at(counter, r, 1)
+
+        # 推演开始时按添加子任务的先后顺序出发
+        rr, cc = np.nonzero(self._first < np.iinfo(np.int64).max)
+        order = np.lexsort((self._first[rr, cc], rr))
+        start_next(rr[order], cc[order])
+
+        while True:
+            t_min = next_tick.min(axis=1) if a > 0 else np.full(n, never)
+            active = t_min <= limit
+            if not active.any():
+                break
+            r = rows_all[active]
+            tie = next_tick[r] == t_min[r, None]
+            c = np.where(tie, seq[r], np.iinfo(np.int64).max).argmin(axis=1)
+            now[r] = t_min[r]
+            events[r] += 1
+
+            move = phase[r, c] == _MOVE
+            rm, cm = r[move], c[move]
+            if len(rm) > 0:
+                # 到达：按当前载荷与地点状态计算作业耗时
+                km, tm = kind[rm, cm], target[rm, cm]
+                position[rm, cm] = tm
+                quantity = amount[rm, cm].astype(np.float64)
+                unload = self._unload_key[km]
+                is_unload = unload >= 0
+                quantity[is_unload] = loads[rm[is_unload], cm[is_unload], unload[is_unload]]
+                is_search = km == _SEARCH
+                quantity[is_search] = (
+                    self._search_area[tm[is_search]] - already_search[rm[is_search], tm[is_search]]
+                )
+                duration = self._intercept[cm, km] + self._slope[cm, km] * quantity
+                # 与 Scene.to_ticks 相同，四舍五入（取偶）到整数时间单位
+                duration = np.rint(duration * self._ticks_per_second).astype(np.int64)
+                phase[rm, cm] = _WORK
+                next_tick[rm, cm] = now[rm] + duration
+                schedule(rm, cm)
+
+            rf, cf = r[~move], c[~move]
+            if len(rf) > 0:
+                # 完成：与 SubTask.on_finish 相同的资源结算
+                kf, tf = kind[rf, cf], target[rf, cf]
+                finish_tick[rf, cf] = now[rf]
+
+                slot = self._load_key[kf]
+                m = slot >= 0
+                r_, c_, t_, s_ = rf[m], cf[m], tf[m], slot[m]
+                value = amount[r_, c_]
+                loads[r_, c_, s_] = np.where(
+                    self._load_assign[kf[m]], value, loads[r_, c_, s_] + value
+                )
+                resources[r_, t_, s_] -= value
+
+                slot = self._unload_key[kf]
+                m = slot >= 0
+                r_, c_, t_, s_ = rf[m], cf[m], tf[m], slot[m]
+                resources[r_, t_, s_] += loads[r_, c_, s_]
+                loads[r_, c_, s_] = 0
+
+                m = kf == _REFUEL
+                fuel[rf[m], cf[m]] = self._max_fuel[cf[m]]
+                m = kf == _SEARCH
+                already_search[rf[m], tf[m]] = self._search_area[tf[m]]
+
+                start_next(rf, cf)
+
+        return LockstepResult(
+            now_time=now / self._ticks_per_second,
+            timeout=(next_tick != never).any(axis=1),
+            events=events,
+            aircraft_position=position,
+            aircraft_finish_time=finish_tick / self._ticks_per_second,
+            current_fuel=fuel,
+            loads=loads,
+            resources=resources,
+            already_search=already_search,
+        )
@@ -1,9 +1,20 @@
-from typing import Literal, Optional, Union, Callable
+from typing import Literal, Optional, Sequence, Union, Callable, Iterator
+import copy
+import csv
+import hashlib
 import math
+import os
+import uuid
+import weakref
+import numpy as np
 from .aircraft import Aircraft
+from .collections.lru import LRUCache
+from .collections.spatial import SphereGrid
 from .utils.logger import logger
 
-DistanceCalculateMethod = Literal["Flat"] | Literal["Vincenty"] | Literal["Haversine"]
+DistanceCalculateMethod = (
+    Literal["Flat"] | Literal["Vincenty"] | Literal["Haversine"] | Literal["Auto"]
+)
 PositionType = Literal["Sea"] | Literal["Land"]
 
 
@@ -13,23 +24,162 @@ class FailConvertException(Exception):
 
 
 class Map:
-    def __init__(self, *pos: "Position") -> None:
-        self.position: list[Position] = list(pos)
+    # 逐块计算距离矩阵时每块的点对数量，避免一次性分配过大的临时数组
+    _MATRIX_CHUNK: int = 1 << 18
+    # 距离矩阵磁盘缓存的格式版本，计算公式变化时需要修改
+    _CACHE_VERSION: int = 3
+    # 默认的距离矩阵地点数量上限，n 个地点的矩阵占用 8n² 字节（2000 个地点约 32 MB）
+    MATRIX_THRESHOLD: int = 2000
+
+    def __init__(
+        self,
+        *pos: "Position",
+        table: Optional["PositionTable"] = None,
+        distance_matrix: Optional[DistanceCalculateMethod] = None,
+        cache_dir: Optional[str] = None,
+        matrix_threshold: Optional[int] = None,
+    ) -> None:
+        # 以列存储的地点表，地点按需生成视图
+        self.table: Optional[PositionTable] = table
+        # 距离矩阵的磁盘缓存目录，None 表示不缓存到磁盘
+        self.cache_dir: Optional[str] = cache_dir
+        # 地点数量不超过该值时 distance 查询距离矩阵，否则逐对计算并使用 Position 的距离缓存
+        self.matrix_threshold: int = (
+            Map.MATRIX_THRESHOLD if matrix_threshold is None else matrix_threshold
+        )
+        self.position: Sequence[Position] = list(pos)
         self.map: dict[str, Union[Position, tuple[Position, ...]]] = {}
+        # 地点到整数下标的映射（按对象身份）
+        self.index: Union[dict[Position, int], _TableIndex] = {}
+        # 按具体类型分组的地点下标
+        self._bucket: dict[type[Position], list[int]] = {}
+        # 按类型（包括子类）查询的结果缓存
+        self._of_type: dict[type[Position], tuple[Position, ...]] = {}
+        # 各距离计算方式（及 Auto 方式的误差上限）对应的距离矩阵（km）
+        self._distance_matrix: dict[
+            tuple[DistanceCalculateMethod, Optional[float]], np.ndarray
+        ] = {}
+        # 各类地点的空间索引
+        self._spatial_index: dict[Optional[type[Position]], SphereGrid] = {}
+        # 写时复制的版本号，每次创建分支加一
+        self._epoch: int = 0
+        # 尚未复制全部地点的分支数量
+        self._pending: int = 0
+        # 有分支待复制时，地点第一次被修改前的状态：下标 -> [(版本号, 状态)]
+        self._saved: dict[int, list[tuple[int, Position]]] = {}
 
-        for p in pos:
-            if p.name in self.map:
-                ref = self.map[p.name]
-                if isinstance(ref, Position):
-                    self.map[p.name] = (ref, p)
+        if table is not None:
+            if len(pos) > 0:
+                raise ValueError("使用地点表创建地图时不能同时传入地点")
+            self.position = table.views()
+            self.index = _TableIndex(table)
+        else:
+            index: dict[Position, int] = {}
+            for i, p in enumerate(pos):
+                index.setdefault(p, i)
+                self._bucket.setdefault(type(p), []).append(i)
+                if p.name in self.map:
+                    ref = self.map[p.name]
+                    if isinstance(ref, Position):
+                        self.map[p.name] = (ref, p)
+                    else:
+                        self.map[p.name] = ref + (p,)
                 else:
-                    self.map[p.name] = ref + (p,)
-            else:
-                self.map[p.name] = p
-        
+                    self.map[p.name] = p
+            self.index = index
+
         logger.info(f"地图初始化完成，共有 {len(self.position)} 个地点")
 
+        if distance_matrix is not None:
+            self.distance_matrix(distance_matrix)
+
+    @staticmethod
+    def from_table(
+        table: "PositionTable",
+        distance_matrix: Optional[DistanceCalculateMethod] = None,
+        cache_dir: Optional[str] = None,
+        matrix_threshold: Optional[int] = None,
+    ) -> "Map":
+        """使用地点表创建地图
+
+        Args:
+            table (PositionTable): 地点表
+            distance_matrix (Optional[DistanceCalculateMethod]): 需要预先计算的距离矩阵
+            cache_dir (Optional[str]): 距离矩阵的磁盘缓存目录
+            matrix_threshold (Optional[int]): distance 使用距离矩阵的地点数量上限
+
+        Returns:
+            Map: 地图
+        """
+        return Map(
+            table=table,
+            distance_matrix=distance_matrix,
+            cache_dir=cache_dir,
+            matrix_threshold=matrix_threshold,
+        )
+
+    def fork(self) -> "Map":
+        """复制地图上的地点状态（资源等），距离矩阵、空间索引等只与坐标有关的数据共享
+
+        地点状态写时复制，开销与地点数量无关：地点表的各列在任意一方第一次写入时复制；
+        地点对象在分支第一次访问时才复制。原地图按版本号记录有分支待复制期间地点被修改
+        前的状态，每个地点每个版本只记录一次，与分支数量无关
+
+        Returns:
+            Map: 新地图，地点下标与原地图一致
+        """
+        mp = copy.copy(self)
+        mp._of_type = {}
+        mp._epoch = 0
+        mp._pending = 0
+        mp._saved = {}
+        if self.table is not None:
+            mp.table = self.table.copy()
+            mp.position = mp.table.views()
+            mp.index = _TableIndex(mp.table)
+        else:
+            mp.index = {}
+            # 按名称查询经由最初的地图换算为下标
+            mp.map = {}
+            if len(self.position) > 0:
+                self._epoch += 1
+                if self._pending == 0:
+                    Position._watch(self)
+                self._pending += 1
+            mp.position = _ForkedPositions(mp, self, self._epoch)
+        return mp
+
+    def _before_write(self, pos: "Position") -> None:
+        # 地点在当前版本第一次被修改前记录修改前的状态，供尚未复制该地点的分支使用
+        i = self.index.get(pos)
+        if i is None:
+            return
+        saved = self._saved.setdefault(i, [])
+        if len(saved) == 0 or saved[-1][0] != self._epoch:
+            saved.append((self._epoch, copy.copy(pos)))
+
+    def _state_at(self, index: int, epoch: int) -> "Position":
+        # 版本号为 epoch 的分支创建时下标 index 处地点的状态（不复制）
+        for saved_epoch, pos in self._saved.get(index, ()):
+            if saved_epoch >= epoch:
+                return pos
+        if isinstance(self.position, _ForkedPositions):
+            return self.position.peek(index)
+        return self.position[index]
+
+    def _release_fork(self) -> None:
+        # 分支已经复制全部地点或被回收
+        self._pending -= 1
+        if self._pending == 0:
+            self._saved = {}
+            Position._unwatch(self)
+
     def __getitem__(self, index: str) -> tuple["Position", ...]:
+        if self.table is not None:
+            return tuple(self.table.view(i) for i in self.table.find(index))
+        if isinstance(self.position, _ForkedPositions):
+            root = self.position.root
+            return tuple(self.position[root.index[p]] for p in root[index])
         if index in self.map:
             ref = self.map[index]
             if isinstance(ref, Position):
@@ -39,9 +189,304 @@ class Map:
         else:
             return ()
 
+    def __contains__(self, pos: object) -> bool:
+        return pos in self.index
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def indices_of_type(self, kind: type["Position"]) -> list[int]:
+        """某一类型（包括子类）的所有地点下标
+
+        Args:
+            kind (type[Position]): 地点类型
+
+        Returns:
+            list[int]: 按加入地图顺序排列的下标
+        """
+        if self.table is not None:
+            return self.table.indices_of_type(kind).tolist()
+        ids: list[int] = []
+        for t, bucket in self._bucket.items():
+            if issubclass(t, kind):
+                ids.extend(bucket)
+        ids.sort()
+        return ids
+
+    def of_type(self, kind: type["Position"]) -> tuple["Position", ...]:
+        """某一类型（包括子类）的所有地点，如 of_type(Hospital)
+
+        Args:
+            kind (type[Position]): 地点类型
+
+        Returns:
+            tuple[Position, ...]: 按加入地图顺序排列的地点
+        """
+        if kind not in self._of_type:
+            self._of_type[kind] = tuple(
+                self.position[i] for i in self.indices_of_type(kind)
+            )
+        return self._of_type[kind]
+
+    def coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        """所有地点的经纬度数组
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (经度, 纬度)，下标与 index 一致
+        """
+        if self.table is not None:
+            return self.table._readonly("longitude"), self.table._readonly("latitude")
+        position = self.position
+        if isinstance(position, _ForkedPositions) and position.source is not None:
+            # 分支地图读取来源地图的坐标，只替换已复制或来源已修改的地点
+            lng, lat = (c.copy() for c in position.source.coordinates())
+            changed = set(position.source._saved)
+            changed.update(self.index.values())  # type: ignore
+            for i in changed:
+                p = position.peek(i)
+                lng[i], lat[i] = p.longitude, p.latitude
+            return lng, lat
+        ps = self._peek()
+        lng = np.fromiter((p.longitude for p in ps), np.float64, len(self.position))
+        lat = np.fromiter((p.latitude for p in ps), np.float64, len(self.position))
+        return lng, lat
+
+    def _peek(self) -> Sequence["Position"]:
+        # 只读地获取所有地点，分支地图不复制尚未访问的地点
+        if isinstance(self.position, _ForkedPositions):
+            return [self.position.peek(i) for i in range(len(self.position))]
+        return self.position
+
+    def resource(
+        self, name: str, kind: Optional[type["Position"]] = None
+    ) -> np.ndarray:
+        """批量获取地点的某一属性，如 resource("supply", DisasterArea)
+
+        地点表中的列直接返回（修改会写回地点表），否则从各地点对象中收集
+
+        Args:
+            name (str): 属性名称
+            kind (Optional[type[Position]]): 只获取该类型的地点
+
+        Returns:
+            np.ndarray: 属性值，顺序与 indices_of_type 一致
+        """
+        if self.table is not None:
+            if kind is None:
+                return self.table.column(name)
+            return self.table._readonly(name)[self.table.indices_of_type(kind)]
+        ps = self._peek() if kind is None else self.of_type(kind)
+        return np.array([getattr(p, name) for p in ps])
+
+    def distance_matrix(
+        self,
+        method: Optional[DistanceCalculateMethod] = None,
+        tolerance: Optional[float] = None,
+    ) -> np.ndarray:
+        """获取所有地点两两之间的距离矩阵（km），首次调用时计算
+
+        设置了 cache_dir 时，矩阵以坐标与计算方式的哈希值命名保存到磁盘，之后以只读
+        内存映射的方式打开，多个进程可以共享同一个文件
+
+        Args:
+            method (Optional[DistanceCalculateMethod]): 距离计算方式，默认为 Position 的全局设置
+            tolerance (Optional[float]): Auto 方式允许的误差（km），默认为 Position 的全局设置
+
+        Returns:
+            np.ndarray: n x n 的对称矩阵，下标与 index 一致
+        """
+        method, tolerance = Position._resolve_method(method, tolerance)
+        key = (method, tolerance)
+        if key not in self._distance_matrix:
+            if self.cache_dir is not None:
+                self._distance_matrix[key] = self._load_distance_matrix(method, tolerance)
+            else:
+                self._distance_matrix[key] = self._build_distance_matrix(method, tolerance)
+                logger.info(f"完成 {method} 距离矩阵计算，共有 {len(self.position)} 个地点")
+        return self._distance_matrix[key]
+
+    def distance_matrix_path(
+        self,
+        method: Optional[DistanceCalculateMethod] = None,
+        tolerance: Optional[float] = None,
+    ) -> Optional[str]:
+        """距离矩阵在磁盘缓存中的路径，未设置 cache_dir 时为 None"""
+        if self.cache_dir is None:
+            return None
+        method, tolerance = Position._resolve_method(method, tolerance)
+        lng, lat = self.coordinates()
+        digest = hashlib.sha256()
+        digest.update(f"{Map._CACHE_VERSION}:{method}:{tolerance!r}:{len(lng)}".encode())
+        digest.update(np.ascontiguousarray(lng, dtype="<f8").tobytes())
+        digest.update(np.ascontiguousarray(lat, dtype="<f8").tobytes())
+        return os.path.join(self.cache_dir, f"distance-{digest.hexdigest()}.npy")
+
+    def _load_distance_matrix(
+        self, method: DistanceCalculateMethod, tolerance: Optional[float]
+    ) -> np.ndarray:
+        path: str = self.distance_matrix_path(method, tolerance)  # type: ignore
+        if not os.path.exists(path):
+            matrix = self._build_distance_matrix(method, tolerance)
+            os.makedirs(self.cache_dir, exist_ok=True)  # type: ignore
+            # 先写入临时文件再替换，避免其他进程读到未写完的文件
+            tmp = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+            out = np.lib.format.open_memmap(
+                tmp, mode="w+", dtype=np.float64, shape=matrix.shape
+            )
+            out[:] = matrix
+            out.flush()
+            del out
+            os.replace(tmp, path)
+            logger.info(f"完成 {method} 距离矩阵计算，已保存到 {path}")
+        else:
+            logger.info(f"从 {path} 读取 {method} 距离矩阵")
+        return np.load(path, mmap_mode="r")
+
+    def _build_distance_matrix(
+        self, method: DistanceCalculateMethod, tolerance: Optional[float] = None
+    ) -> np.ndarray:
+        n = len(self.position)
+        lng, lat = self.coordinates()
+        matrix = np.zeros((n, n), dtype=np.float64)
+        row, col = np.triu_indices(n, 1)
+        for begin in range(0, len(row), Map._MATRIX_CHUNK):
+            r = row[begin : begin + Map._MATRIX_CHUNK]
+            c = col[begin : begin + Map._MATRIX_CHUNK]
+            d = _distance_np(lng[r], lat[r], lng[c], lat[c], method, tolerance)
+            matrix[r, c] = d
+            matrix[c, r] = d
+        return matrix
+
+    def uses_distance_matrix(
+        self,
+        method: Optional[DistanceCalculateMethod] = None,
+        tolerance: Optional[float] = None,
+    ) -> bool:
+        """distance 是否查询距离矩阵：矩阵已经计算过，或地点数量不超过 matrix_threshold
+
+        Args:
+            method (Optional[DistanceCalculateMethod]): 距离计算方式
+            tolerance (Optional[float]): Auto 方式允许的误差（km）
+
+        Returns:
+            bool: 为 False 时逐对计算，不会分配距离矩阵
+        """
+        if len(self.position) <= self.matrix_threshold:
+            return True
+        return Position._resolve_method(method, tolerance) in self._distance_matrix
+
+    def distance(
+        self,
+        p1: "Position",
+        p2: "Position",
+        method: Optional[DistanceCalculateMethod] = None,
+        tolerance: Optional[float] = None,
+    ) -> float:
+        """计算两个地点之间的距离（km）
+
+        地图内的地点在 uses_distance_matrix 时直接查距离矩阵，地点较多的地图则逐对计算，
+        结果保存在 Position 的距离缓存中
+
+        Args:
+            p1 (Position): 起点
+            p2 (Position): 终点
+            method (Optional[DistanceCalculateMethod]): 距离计算方式
+            tolerance (Optional[float]): Auto 方式允许的误差（km）
+
+        Returns:
+            float: 距离（km）
+        """
+        i = self.index.get(p1)
+        j = self.index.get(p2)
+        if i is None or j is None or not self.uses_distance_matrix(method, tolerance):
+            return Position.distance(p1, p2, method, tolerance)
+        return float(self.distance_matrix(method, tolerance)[i, j])
+
+    def spatial_index(self, kind: Optional[type["Position"]] = None) -> SphereGrid:
+        """获取某一类地点的空间索引，首次调用时建立
+
+        Args:
+            kind (Optional[type[Position]]): 地点类型，None 表示所有地点
+
+        Returns:
+            SphereGrid: 空间索引，编号与 index 一致
+        """
+        if kind not in self._spatial_index:
+            lng, lat = self.coordinates()
+            if kind is None:
+                ids = np.arange(len(self.position), dtype=np.int64)
+            else:
+                ids = np.array(self.indices_of_type(kind), dtype=np.int64)
+            self._spatial_index[kind] = SphereGrid(lng[ids], lat[ids], ids)
+            logger.info(f"建立空间索引，共有 {len(ids)} 个地点")
+        return self._spatial_index[kind]
+
+    def nearest(
+        self,
+        pos: "Position",
+        k: int = 1,
+        kind: Optional[type["Position"]] = None,
+    ) -> list["Position"]:
+        """查询距离给定地点最近的 k 个地点（不包括该地点本身）
+
+        Args:
+            pos (Position): 给定地点
+            k (int): 数量
+            kind (Optional[type[Position]]): 只查询该类型的地点，如 Hospital
+
+        Returns:
+            list[Position]: 按球面距离从近到远排序的地点
+        """
+        ids, _ = self.spatial_index(kind).nearest(
+            pos.longitude, pos.latitude, k, self.index.get(pos)
+        )
+        return [self.position[i] for i in ids]
+
+    def within(
+        self,
+        pos: "Position",
+        radius_km: float,
+        kind: Optional[type["Position"]] = None,
+    ) -> list["Position"]:
+        """查询给定地点半径范围内的所有地点（不包括该地点本身）
+
+        Args:
+            pos (Position): 给定地点
+            radius_km (float): 半径（km）
+            kind (Optional[type[Position]]): 只查询该类型的地点，如 Hospital
+
+        Returns:
+            list[Position]: 按球面距离从近到远排序的地点
+        """
+        ids, _ = self.spatial_index(kind).within(
+            pos.longitude, pos.latitude, radius_km, self.index.get(pos)
+        )
+        return [self.position[i] for i in ids]
+
+
+DistanceCacheKey = tuple[
+    tuple[float, float], tuple[float, float], DistanceCalculateMethod, Optional[float]
+]
+
+# WGS84 椭球长半轴（km）与第一偏心率的平方
+_WGS84_A: float = 6378.137
+_WGS84_E2: float = 0.00669437999014
+# 局部椭球平面公式误差上限的余量系数
+_LOCAL_ERROR_MARGIN: float = 1.01
+# Haversine 公式误差上限中测地线偏离大圆的系数、余量系数与绝对下限（km）
+_HAVERSINE_PATH_ERROR: float = 4.0
+_HAVERSINE_ERROR_MARGIN: float = 1.2
+_HAVERSINE_ERROR_FLOOR: float = 1e-5
+
 
 class Position:
     _distance_method: DistanceCalculateMethod = "Vincenty"
+    # Auto 方式允许的最大误差（km）
+    _distance_tolerance: float = 0.1
+    # 距离计算缓存，键只依赖经纬度与计算方式，不依赖地点上可变的资源
+    _distance_cache: LRUCache[DistanceCacheKey, float] = LRUCache(4096)
+    # 有分支尚未复制全部地点的地图，其中的地点被修改前需要通知这些地图
+    _fork_sources: list[Map] = []
 
     def __init__(
         self,
@@ -98,22 +543,168 @@ class Position:
             Callable[["Position", Aircraft], bool]
         ] = special_condition
 
+    def _write_barrier(self, name: str, value: object) -> None:
+        # 有分支待复制时安装为 __setattr__，修改地点前让所在的地图记录修改前的状态
+        for mp in Position._fork_sources:
+            mp._before_write(self)
+        object.__setattr__(self, name, value)
+
+    @staticmethod
+    def _watch(mp: Map) -> None:
+        # 地图有了待复制的分支；没有分支时 Position 不定义 __setattr__，写入没有额外开销
+        if len(Position._fork_sources) == 0:
+            type.__setattr__(Position, "__setattr__", Position._write_barrier)
+        Position._fork_sources.append(mp)
+
+    @staticmethod
+    def _unwatch(mp: Map) -> None:
+        Position._fork_sources.remove(mp)
+        if len(Position._fork_sources) == 0:
+            type.__delattr__(Position, "__setattr__")
+
+    @staticmethod
+    def _resolve_method(
+        method: Optional[DistanceCalculateMethod], tolerance: Optional[float]
+    ) -> tuple[DistanceCalculateMethod, Optional[float]]:
+        # 补全默认的计算方式，只有 Auto 方式保留误差上限
+        if method is None:
+            method = Position._distance_method
+        if method != "Auto":
+            return method, None
+        return method, Position._distance_tolerance if tolerance is None else tolerance
+
     @staticmethod
     def distance(
-        p1: "Position", p2: "Position", method: Optional[DistanceCalculateMethod] = None
+        p1: "Position",
+        p2: "Position",
+        method: Optional[DistanceCalculateMethod] = None,
+        tolerance: Optional[float] = None,
     ) -> float:
         """
         计算两个地点之间的距离（km）
+
+        Auto 方式选择误差上限不超过 tolerance（km）的最快公式
         """
-        if method is None:
-            method = Position._distance_method
+        method, tolerance = Position._resolve_method(method, tolerance)
+
+        # 点对无序，按经纬度排序作为缓存键
+        c1 = (p1.longitude, p1.latitude)
+        c2 = (p2.longitude, p2.latitude)
+        key: DistanceCacheKey = (
+            (c1, c2, method, tolerance) if c1 <= c2 else (c2, c1, method, tolerance)
+        )
+        cached = Position._distance_cache.get(key)
+        if cached is not None:
+            return cached
 
         if method == "Flat":
-            return Position._distance_flat(p1, p2)
+            result = Position._distance_flat(p1, p2)
         elif method == "Vincenty":
-            return Position._distance_vincenty(p1, p2) / 1000
+            result = Position._distance_ellipsoid(p1, p2) / 1000
         elif method == "Haversine":
-            return Position._distance_haversine(p1, p2)
+            result = Position._distance_haversine(p1, p2)
+        elif method == "Auto":
+            result = Position._distance_auto(p1, p2, tolerance)  # type: ignore
+        else:
+            raise ValueError(f"不支持的距离计算方式 {method}")
+
+        Position._distance_cache.put(key, result)
+        return result
+
+    @staticmethod
+    def distance_many(
+        origins: Sequence["Position"],
+        destinations: Sequence["Position"],
+        method: Optional[DistanceCalculateMethod] = None,
+        tolerance: Optional[float] = None,
+    ) -> np.ndarray:
+        """批量计算一一对应的多组地点之间的距离（km）
+
+        Vincenty 方式下不收敛的点对（接近对跖点）不会抛出异常，而是改用 _distance_antipodal_np
+
+        Args:
+            origins (Sequence[Position]): 起点
+            destinations (Sequence[Position]): 终点，长度与起点相同
+            method (Optional[DistanceCalculateMethod]): 距离计算方式
+            tolerance (Optional[float]): Auto 方式允许的误差（km）
+
+        Returns:
+            np.ndarray: 各组点对的距离
+        """
+        if len(origins) != len(destinations):
+            raise ValueError("起点与终点的数量不一致")
+        method, tolerance = Position._resolve_method(method, tolerance)
+
+        n = len(origins)
+        lng1 = np.fromiter((p.longitude for p in origins), np.float64, n)
+        lat1 = np.fromiter((p.latitude for p in origins), np.float64, n)
+        lng2 = np.fromiter((p.longitude for p in destinations), np.float64, n)
+        lat2 = np.fromiter((p.latitude for p in destinations), np.float64, n)
+        return _distance_np(lng1, lat1, lng2, lat2, method, tolerance)
+
+    @staticmethod
+    def set_distance_method(
+        method: DistanceCalculateMethod, tolerance: Optional[float] = None
+    ) -> None:
+        """设置全局默认的距离计算方式，场景中可以单独设置
+
+        Args:
+            method (DistanceCalculateMethod): 距离计算方式
+            tolerance (Optional[float]): Auto 方式允许的误差（km）
+        """
+        Position._distance_method = method
+        if tolerance is not None:
+            Position._distance_tolerance = tolerance
+
+    @staticmethod
+    def set_distance_cache_size(maxsize: int) -> None:
+        """设置距离缓存的容量，为 0 时关闭缓存
+
+        Args:
+            maxsize (int): 最大缓存的点对数量
+        """
+        Position._distance_cache.resize(maxsize)
+
+    @staticmethod
+    def distance_cache_stats() -> dict[str, float]:
+        """距离缓存的命中、未命中与淘汰统计"""
+        return Position._distance_cache.stats()
+
+    @staticmethod
+    def _distance_auto(p1: "Position", p2: "Position", tolerance: float) -> float:
+        """
+        依次尝试局部椭球平面公式、Haversine、Vincenty 公式，返回误差上限不超过
+        tolerance 的结果（km）
+        """
+        lat1, lat2 = p1.latitude, p2.latitude
+        local, bound, x, y = _distance_local(p1.longitude, lat1, p2.longitude, lat2)
+        if bound <= tolerance:
+            return local
+        # 航段较长或 Haversine 的相对误差明显超出时直接使用 Vincenty
+        if _haversine_path_error(local) <= tolerance:
+            relative = _haversine_relative_error(lat1, lat2, x, y)
+        else:
+            relative = math.inf
+        if relative * local <= tolerance:
+            haversine = Position._distance_haversine(p1, p2)
+            if _haversine_error_bound(relative, haversine) <= tolerance:
+                return haversine
+        return Position._distance_ellipsoid(p1, p2) / 1000
+
+    @staticmethod
+    def _distance_ellipsoid(p1: "Position", p2: "Position") -> float:
+        """椭球面上的测地线距离（m），Vincenty 不收敛时与批量计算一样改用 _distance_antipodal_np"""
+        try:
+            return Position._distance_vincenty(p1, p2)
+        except FailConvertException:
+            return float(
+                _distance_antipodal_np(
+                    np.array([p1.longitude]),
+                    np.array([p1.latitude]),
+                    np.array([p2.longitude]),
+                    np.array([p2.latitude]),
+                )[0]
+            )
 
     @staticmethod
     def _distance_flat(p1: "Position", p2: "Position") -> float:
@@ -139,7 +730,8 @@ class Position:
         U2 = math.atan((1 - f) * math.tan(math.radians(p2.latitude)))
         sinU1, cosU1 = math.sin(U1), math.cos(U1)
         sinU2, cosU2 = math.sin(U2), math.cos(U2)
-        lam, lamP = L, math.pi
+        # 至少迭代一次，经差恰好为 π 的点对同样需要迭代
+        lam, lamP = L, L + 1
         cosSqAlpha: float = 0
         sinSigma: float = 0
         cos2SigmaM: float = 0
@@ -154,9 +746,11 @@ class Position:
                 + (cosU1 * sinU2 - sinU1 * cosU2 * cosLam)
                 * (cosU1 * sinU2 - sinU1 * cosU2 * cosLam)
             )
-            if sinSigma == 0:
-                return 0
             cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+            if sinSigma == 0:
+                if cosSigma > 0:
+                    return 0
+                raise FailConvertException("对跖点无法使用 Vincenty 公式计算距离")
             sigma = math.atan2(sinSigma, cosSigma)
             alpha = math.asin(cosU1 * cosU2 * sinLam / sinSigma)
             cosSqAlpha = math.cos(alpha) * math.cos(alpha)
@@ -221,3 +815,992 @@ class Position:
             )
             * 6378.137
         )
+
+
+class PositionTable:
+    """以列存储的地点表
+
+    坐标、面积、资源等属性分别保存在定长的 NumPy 数组中，每个地点只占用几十个
+    字节；需要 Position 对象时按需生成视图，视图的属性读写直接作用于地点表。
+    """
+
+    # 列名与类型
+    _COLUMNS: dict[str, type] = {
+        "longitude": np.float64,
+        "latitude": np.float64,
+        "helicopter_area": np.float32,
+        "fixed_area": np.float32,
+        "air_work_area": np.float32,
+        "supply": np.int32,
+        "rescue_people": np.int32,
+        "trapped_people": np.int32,
+        "device": np.int32,
+        "patient": np.int32,
+        "water": np.int32,
+        # 灾区的需求
+        "need_supply": np.int32,
+        "need_water": np.int32,
+        "need_rescue_people": np.int32,
+        "need_device": np.int32,
+        "search": np.bool_,
+        "search_area": np.float32,
+        "already_search": np.float32,
+        # 是否为海上地点
+        "sea": np.bool_,
+        # 地点类型在 kinds 中的编号
+        "kind": np.int16,
+    }
+
+    def __init__(self, capacity: int = 0) -> None:
+        self._size: int = 0
+        self._columns: dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype)
+            for name, dtype in PositionTable._COLUMNS.items()
+        }
+        # 本表独占的列，copy 后两张表共享的列在第一次写入时才复制
+        self._owned: set[str] = set(self._columns)
+        # 地点名称
+        self.name: list[str] = []
+        # 地点类型
+        self.kinds: list[type[Position]] = []
+        self._kind_code: dict[type[Position], int] = {}
+        # 特殊需求，只保存设置了的地点
+        self.special_condition: dict[int, Callable[[Position, Aircraft], bool]] = {}
+        self._names: Optional[dict[str, list[int]]] = None
+        self._views: weakref.WeakValueDictionary[int, Position] = (
+            weakref.WeakValueDictionary()
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """数值列占用的内存（字节）"""
+        return sum(c[: self._size].nbytes for c in self._columns.values())
+
+    def column(self, name: str) -> np.ndarray:
+        """获取某一列，返回的数组与地点表共享内存，修改会写回地点表
+
+        Args:
+            name (str): 列名
+
+        Returns:
+            np.ndarray: 长度为地点数量的数组
+        """
+        return self._writable(name)[: self._size]
+
+    def _readonly(self, name: str) -> np.ndarray:
+        # 只读的列，不触发复制
+        column = self._columns[name][: self._size]
+        column.flags.writeable = False
+        return column
+
+    def _writable(self, name: str) -> np.ndarray:
+        # 写入前复制与其他表共享的列
+        if name not in self._owned:
+            self._columns[name] = self._columns[name].copy()
+            self._owned.add(name)
+        return self._columns[name]
+
+    def code(self, kind: type["Position"]) -> int:
+        """地点类型的编号，未出现过的类型会被登记"""
+        if kind not in self._kind_code:
+            self._kind_code[kind] = len(self.kinds)
+            self.kinds.append(kind)
+        return self._kind_code[kind]
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._columns["kind"])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 16)
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+            self._owned.add(name)
+
+    def extend(
+        self,
+        kind: Union[type["Position"], Sequence[type["Position"]]],
+        name: Sequence[str],
+        **columns: Union[Sequence[float], np.ndarray],
+    ) -> None:
+        """批量添加地点，未给出的列为 0
+
+        Args:
+            kind (Union[type[Position], Sequence[type[Position]]]): 地点类型
+            name (Sequence[str]): 地点名称
+            **columns: 各列的值，长度与 name 相同
+        """
+        n = len(name)
+        begin, end = self._size, self._size + n
+        self._reserve(end)
+        if isinstance(kind, type):
+            self._writable("kind")[begin:end] = self.code(kind)
+        else:
+            self._writable("kind")[begin:end] = [self.code(k) for k in kind]
+        for key, value in columns.items():
+            if key not in PositionTable._COLUMNS or key == "kind":
+                raise KeyError(f"地点表中没有列 {key}")
+            self._writable(key)[begin:end] = value
+        self.name.extend(name)
+        self._size = end
+        self._names = None
+
+    def append(self, kind: type["Position"], name: str, **values: float) -> int:
+        """添加一个地点
+
+        Returns:
+            int: 地点的下标
+        """
+        self.extend(kind, [name], **{k: [v] for k, v in values.items()})
+        return self._size - 1
+
+    def add(self, pos: "Position") -> int:
+        """将一个 Position 对象的属性存入地点表
+
+        Returns:
+            int: 地点的下标
+        """
+        values: dict[str, float] = {
+            key: getattr(pos, key)
+            for key in PositionTable._COLUMNS
+            if key not in ("search", "search_area", "sea", "kind")
+            and hasattr(pos, key)
+        }
+        search = getattr(pos, "search", (False, 0))
+        row = self.append(
+            type(pos),
+            pos.name,
+            search=search[0],
+            search_area=search[1],
+            sea=pos.type == "Sea",
+            **values,
+        )
+        if pos.special_condition is not None:
+            self.special_condition[row] = pos.special_condition
+        return row
+
+    @staticmethod
+    def from_positions(*pos: "Position") -> "PositionTable":
+        """将多个 Position 对象转化为地点表"""
+        table = PositionTable(len(pos))
+        for p in pos:
+            table.add(p)
+        return table
+
+    def find(self, name: str) -> list[int]:
+        """按名称查找地点的下标"""
+        if self._names is None:
+            self._names = {}
+            for i, n in enumerate(self.name):
+                self._names.setdefault(n, []).append(i)
+        return self._names.get(name, [])
+
+    def indices_of_type(self, kind: type["Position"]) -> np.ndarray:
+        """某一类型（包括子类）的所有地点下标"""
+        codes = [c for k, c in self._kind_code.items() if issubclass(k, kind)]
+        return np.nonzero(np.isin(self._readonly("kind"), codes))[0]
+
+    def view(self, row: int) -> "Position":
+        """获取某一行的地点视图，同一行在视图存活期间返回同一对象
+
+        Args:
+            row (int): 下标
+
+        Returns:
+            Position: 与地点类型相同的视图
+        """
+        if not 0 <= row < self._size:
+            raise IndexError(f"地点下标 {row} 越界")
+        pos = self._views.get(row)
+        if pos is None:
+            kind = self.kinds[int(self._columns["kind"][row])]
+            pos = _view_class(kind)(self, row)
+            self._views[row] = pos
+        return pos
+
+    def views(self) -> "_TableSequence":
+        """按需生成视图的地点序列"""
+        return _TableSequence(self)
+
+    def copy(self) -> "PositionTable":
+        """复制地点表，名称与类型共享
+
+        数值列写时复制：两张表先共享同一组数组，任意一方第一次写入某一列时才复制该列，
+        复制的开销与地点数量无关
+        """
+        table = PositionTable.__new__(PositionTable)
+        table._size = self._size
+        table._columns = dict(self._columns)
+        table._owned = set()
+        self._owned = set()
+        table.name = self.name
+        table.kinds = self.kinds
+        table._kind_code = self._kind_code
+        table.special_condition = self.special_condition
+        table._names = self._names
+        table._views = weakref.WeakValueDictionary()
+        return table
+
+
+class _TableSequence(Sequence["Position"]):
+    def __init__(self, table: PositionTable) -> None:
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self.table.view(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.table.view(index)
+
+    def __contains__(self, pos: object) -> bool:
+        return isinstance(pos, _PositionView) and pos._table is self.table
+
+
+class _ForkedPositions(Sequence["Position"]):
+    """分支地图的地点序列，地点在第一次访问时按分支创建时的状态复制"""
+
+    def __init__(self, mp: Map, source: Map, epoch: int) -> None:
+        self.map: Map = mp
+        # 复制地点的来源，全部复制后释放
+        self.source: Optional[Map] = source
+        # 分支创建时来源地图的版本号
+        self.epoch: int = epoch
+        # 最初由地点对象创建的地图，用于按名称查询
+        self.root: Map = (
+            source.position.root if isinstance(source.position, _ForkedPositions) else source
+        )
+        self._items: list[Optional[Position]] = [None] * len(source)
+        self._missing: int = len(source)
+        # 分支被回收时同样通知来源地图
+        self._release: Optional[weakref.finalize] = (
+            weakref.finalize(self, source._release_fork) if self._missing > 0 else None
+        )
+
+    @property
+    def complete(self) -> bool:
+        """是否已经复制全部地点"""
+        return self._missing == 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        pos = self._items[index]
+        if pos is None:
+            pos = copy.copy(self.peek(index))
+            self._items[index] = pos
+            self.map.index[pos] = index  # type: ignore
+            self._missing -= 1
+            if self._missing == 0:
+                self.source = None
+                self._release()  # type: ignore
+        return pos
+
+    def peek(self, index: int) -> Position:
+        """只读地获取地点，尚未复制时返回分支创建时的状态而不复制"""
+        pos = self._items[index]
+        if pos is None:
+            return self.source._state_at(index, self.epoch)  # type: ignore
+        return pos
+
+    def __contains__(self, pos: object) -> bool:
+        return pos in self.map.index
+
+
+class _TableIndex:
+    # 地点表视图到下标的映射，与 Map.index 的字典用法一致
+    def __init__(self, table: PositionTable) -> None:
+        self.table = table
+
+    def get(self, pos: object, default: Optional[int] = None) -> Optional[int]:
+        if isinstance(pos, _PositionView) and pos._table is self.table:
+            return pos._row
+        return default
+
+    def __contains__(self, pos: object) -> bool:
+        return self.get(pos) is not None
+
+    def __getitem__(self, pos: object) -> int:
+        row = self.get(pos)
+        if row is None:
+            raise KeyError(pos)
+        return row
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+
+def _column_property(name: str, cast: Callable[[object], object]) -> property:
+    def fget(self: "_PositionView"):
+        return cast(self._table._columns[name][self._row])
+
+    def fset(self: "_PositionView", value) -> None:
+        self._table._writable(name)[self._row] = value
+
+    return property(fget, fset)
+
+
+class _PositionView:
+    """地点表中一行的视图，属性读写直接作用于地点表"""
+
+    # 视图的状态保存在地点表中，由地点表写时复制，不需要通知分支地图
+    __setattr__ = object.__setattr__
+
+    def __init__(self, table: PositionTable, row: int) -> None:
+        self._table: PositionTable = table
+        self._row: int = row
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, _PositionView)
+            and other._table is self._table
+            and other._row == self._row
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self._table), self._row))
+
+    @property
+    def name(self) -> str:
+        return self._table.name[self._row]
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._table.name[self._row] = value
+        self._table._names = None
+
+    @property
+    def type(self) -> PositionType:
+        return "Sea" if self._table._columns["sea"][self._row] else "Land"
+
+    @type.setter
+    def type(self, value: PositionType) -> None:
+        self._table._writable("sea")[self._row] = value == "Sea"
+
+    @property
+    def search(self) -> tuple[bool, float]:
+        return (
+            bool(self._table._columns["search"][self._row]),
+            float(self._table._columns["search_area"][self._row]),
+        )
+
+    @search.setter
+    def search(self, value: tuple[bool, float]) -> None:
+        self._table._writable("search")[self._row] = value[0]
+        self._table._writable("search_area")[self._row] = value[1]
+
+    @property
+    def special_condition(self) -> Optional[Callable[["Position", Aircraft], bool]]:
+        return self._table.special_condition.get(self._row)
+
+    @special_condition.setter
+    def special_condition(
+        self, value: Optional[Callable[["Position", Aircraft], bool]]
+    ) -> None:
+        if value is None:
+            self._table.special_condition.pop(self._row, None)
+        else:
+            self._table.special_condition[self._row] = value
+
+    longitude = _column_property("longitude", float)
+    latitude = _column_property("latitude", float)
+    helicopter_area = _column_property("helicopter_area", float)
+    fixed_area = _column_property("fixed_area", float)
+    air_work_area = _column_property("air_work_area", float)
+    supply = _column_property("supply", int)
+    rescue_people = _column_property("rescue_people", int)
+    trapped_people = _column_property("trapped_people", int)
+    device = _column_property("device", int)
+    patient = _column_property("patient", int)
+    water = _column_property("water", int)
+    need_supply = _column_property("need_supply", int)
+    need_water = _column_property("need_water", int)
+    need_rescue_people = _column_property("need_rescue_people", int)
+    need_device = _column_property("need_device", int)
+    already_search = _column_property("already_search", float)
+
+
+_view_classes: dict[type["Position"], type] = {}
+
+
+def _view_class(kind: type["Position"]) -> type:
+    # 为每种地点类型生成视图类，使视图仍是该类型的实例
+    if kind not in _view_classes:
+        _view_classes[kind] = type(
+            kind.__name__, (_PositionView, kind), {"__module__": kind.__module__}
+        )
+    return _view_classes[kind]
+
+
+MapFileFormat = Literal["csv"] | Literal["geojson"] | Literal["parquet"]
+
+
+def load_positions(
+    path: str,
+    file_format: Optional[MapFileFormat] = None,
+    /,
+    type_column: str = "type",
+    kinds: Optional[dict[str, type[Position]]] = None,
+    chunk_size: int = 10_000,
+) -> PositionTable:
+    """从 CSV、GeoJSON 或 Parquet 文件中分块读取地点，生成地点表
+
+    文件中的列名与 PositionTable 的列名一致（GeoJSON 的经纬度取自 Point 几何），
+    缺失的列为 0；type_column 列的值按 kinds 映射到地点类型，默认可使用
+    arsim.examples.positions 中的类名（不区分大小写）。
+
+    Args:
+        path (str): 文件路径
+        file_format (Optional[MapFileFormat]): 文件格式，默认按扩展名判断
+        type_column (str): 地点类型所在的列
+        kinds (Optional[dict[str, type[Position]]]): 类型名到地点类型的映射
+        chunk_size (int): 每次写入地点表的地点数量
+
+    Returns:
+        PositionTable: 地点表
+    """
+    if file_format is None:
+        ext = path.rsplit(".", 1)[-1].lower()
+        file_format = {  # type: ignore
+            "csv": "csv",
+            "json": "geojson",
+            "geojson": "geojson",
+            "parquet": "parquet",
+            "pq": "parquet",
+        }.get(ext)
+        if file_format is None:
+            logger.error(f"无法识别文件 {path} 的格式")
+            raise ValueError(f"无法识别文件 {path} 的格式")
+
+    if kinds is None:
+        from .examples import positions as epos
+
+        kinds = {
+            cls.__name__.lower(): cls
+            for cls in (
+                epos.Airport,
+                epos.DisasterArea,
+                epos.Hospital,
+                epos.NormalArea,
+                epos.Source,
+                epos.Destination,
+            )
+        }
+    else:
+        kinds = {k.lower(): v for k, v in kinds.items()}
+
+    if file_format == "csv":
+        rows = _read_csv(path)
+    elif file_format == "geojson":
+        rows = _read_geojson(path)
+    elif file_format == "parquet":
+        rows = _read_parquet(path, chunk_size)
+    else:
+        raise ValueError(f"不支持的文件格式 {file_format}")
+
+    table = PositionTable()
+    chunk: list[dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _extend_table(table, chunk, type_column, kinds)
+            chunk = []
+    if len(chunk) > 0:
+        _extend_table(table, chunk, type_column, kinds)
+
+    logger.info(f"从文件 {path} 读取 {len(table)} 个地点")
+    return table
+
+
+def load_map(
+    path: str,
+    file_format: Optional[MapFileFormat] = None,
+    /,
+    type_column: str = "type",
+    kinds: Optional[dict[str, type[Position]]] = None,
+    chunk_size: int = 10_000,
+) -> Map:
+    """从文件中读取地点并创建地图，参数与 load_positions 相同"""
+    return Map.from_table(
+        load_positions(
+            path,
+            file_format,
+            type_column=type_column,
+            kinds=kinds,
+            chunk_size=chunk_size,
+        )
+    )
+
+
+def _extend_table(
+    table: PositionTable,
+    chunk: list[dict],
+    type_column: str,
+    kinds: dict[str, type[Position]],
+) -> None:
+    kind: list[type[Position]] = []
+    for row in chunk:
+        name = str(row.get(type_column, "")).lower()
+        if name not in kinds:
+            logger.error(f"未知的地点类型 {name}")
+            raise ValueError(f"未知的地点类型 {name}")
+        kind.append(kinds[name])
+
+    columns: dict[str, np.ndarray] = {}
+    for key, dtype in PositionTable._COLUMNS.items():
+        if key == "kind" or all(key not in row for row in chunk):
+            continue
+        values = []
+        for i, row in enumerate(chunk):
+            try:
+                values.append(_convert(row.get(key), dtype))
+            except ValueError as e:
+                message = f"第 {len(table) + i + 1} 个地点（{row.get('name', '')}）的 {key} 列：{e}"
+                logger.error(message)
+                raise ValueError(message) from e
+        columns[key] = np.array(values, dtype=dtype)
+    table.extend(kind, [str(row.get("name", "")) for row in chunk], **columns)
+
+
+def _convert(value: object, dtype: type) -> object:
+    # CSV 中的值均为字符串，空值视为 0
+    if value is None or value == "":
+        return 0
+    if dtype is np.bool_:
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "y", "sea")
+        return bool(value)
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError(f"{value!r} 不是数值") from None
+    if np.issubdtype(dtype, np.integer) and not float(value).is_integer():  # type: ignore
+        # 整数列不截断小数
+        raise ValueError(f"{value!r} 不是整数")
+    return value
+
+
+def _read_csv(path: str) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _read_geojson(path: str) -> Iterator[dict]:
+    try:
+        import ijson  # type: ignore
+    except ImportError as e:
+        logger.error("流式读取 GeoJSON 文件需要安装 ijson")
+        raise ImportError("流式读取 GeoJSON 文件需要安装 ijson") from e
+
+    with open(path, "rb") as f:
+        for feature in ijson.items(f, "features.item", use_float=True):
+            row = dict(feature.get("properties") or {})
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point":
+                row["longitude"], row["latitude"] = geometry["coordinates"][:2]
+            yield row
+
+
+def _read_parquet(path: str, batch_size: int) -> Iterator[dict]:
+    try:
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError as e:
+        logger.error("读取 Parquet 文件需要安装 pyarrow")
+        raise ImportError("读取 Parquet 文件需要安装 pyarrow") from e
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def _distance_local(
+    lng1: float, lat1: float, lng2: float, lat2: float
+) -> tuple[float, float, float, float]:
+    """局部椭球平面公式的距离（km）与误差上限（km）
+
+    在两点的平均纬度处用子午圈曲率半径 M 与卯酉圈曲率半径 N 把经纬度差换算为
+    南北、东西方向的长度后取欧氏距离。误差上限由经纬度差的二阶项估计，
+    并留出 1% 的余量。
+
+    Returns:
+        距离、误差上限，以及南北、东西方向的分量（km）
+    """
+    dlng = (lng2 - lng1 + 180) % 360 - 180
+    phi = math.radians((lat1 + lat2) / 2)
+    sin_phi, cos_phi = math.sin(phi), math.cos(phi)
+    w = 1 - _WGS84_E2 * sin_phi * sin_phi
+    n = _WGS84_A / math.sqrt(w)
+    m = n * (1 - _WGS84_E2) / w
+    dp = math.radians(lat2 - lat1)
+    dl = math.radians(dlng)
+    x = m * dp
+    y = n * cos_phi * dl
+    local = math.sqrt(x * x + y * y)
+    dl2 = dl * dl
+    bound = _LOCAL_ERROR_MARGIN * local * (
+        dl2 * sin_phi * sin_phi / 8 + (dp * dp + dl2 * cos_phi * cos_phi) / 24
+    )
+    return local, bound, x, y
+
+
+def _radius_error(latitude: float, cos2: float, sin2: float) -> float:
+    # 给定纬度与方位处，长半轴相对法截线曲率半径的相对误差
+    s2 = math.sin(math.radians(latitude)) ** 2
+    w = 1 - _WGS84_E2 * s2
+    return abs(1 - (cos2 * w**1.5 / (1 - _WGS84_E2) + sin2 * math.sqrt(w)))
+
+
+def _haversine_relative_error(lat1: float, lat2: float, x: float, y: float) -> float:
+    """Haversine 公式（半径取长半轴）的相对误差主项
+
+    按 _distance_local 给出的南北、东西分量确定方位，取两点纬度范围两端
+    法截线曲率半径与长半轴之差的较大者。
+
+    Args:
+        lat1: 起点纬度
+        lat2: 终点纬度
+        x: 南北方向的分量（km）
+        y: 东西方向的分量（km）
+    """
+    d2 = x * x + y * y
+    if d2 == 0:
+        return 0.0
+    cos2, sin2 = x * x / d2, y * y / d2
+    a1, a2 = abs(lat1), abs(lat2)
+    low = 0.0 if lat1 * lat2 < 0 else min(a1, a2)
+    return max(_radius_error(low, cos2, sin2), _radius_error(max(a1, a2), cos2, sin2))
+
+
+def _haversine_path_error(haversine: float) -> float:
+    # 测地线偏离大圆引起的误差（km），与纬度、方位无关，只随距离平方增长
+    return _HAVERSINE_ERROR_MARGIN * _HAVERSINE_PATH_ERROR * _WGS84_E2 * haversine**2 / _WGS84_A
+
+
+def _haversine_error_bound(relative: float, haversine: float) -> float:
+    """Haversine 公式的误差上限（km），在相对误差主项上加入测地线偏离大圆的项"""
+    return (
+        _HAVERSINE_ERROR_MARGIN * relative * haversine
+        + _haversine_path_error(haversine)
+        + _HAVERSINE_ERROR_FLOOR
+    )
+
+
+def _distance_local_np(
+    lng1: np.ndarray, lat1: np.ndarray, lng2: np.ndarray, lat2: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """向量化的局部椭球平面公式，与 _distance_local 一致"""
+    dlng = (lng2 - lng1 + 180) % 360 - 180
+    phi = np.radians((lat1 + lat2) / 2)
+    sin2 = np.sin(phi) ** 2
+    cos2 = 1 - sin2
+    w = 1 - _WGS84_E2 * sin2
+    n = _WGS84_A / np.sqrt(w)
+    m = n * (1 - _WGS84_E2) / w
+    dp = np.radians(lat2 - lat1)
+    dl = np.radians(dlng)
+    x = m * dp
+    y = n * np.sqrt(cos2) * dl
+    local = np.hypot(x, y)
+    dl2 = dl * dl
+    bound = _LOCAL_ERROR_MARGIN * local * (dl2 * sin2 / 8 + (dp * dp + dl2 * cos2) / 24)
+    return local, bound, x, y
+
+
+def _haversine_relative_error_np(
+    lat1: np.ndarray, lat2: np.ndarray, x: np.ndarray, y: np.ndarray
+) -> np.ndarray:
+    """向量化的 Haversine 相对误差主项，与 _haversine_relative_error 一致"""
+    d2 = x * x + y * y
+    safe = np.where(d2 == 0, 1, d2)
+    cos2, sin2 = x * x / safe, y * y / safe
+
+    def radius_error(latitude: np.ndarray) -> np.ndarray:
+        w = 1 - _WGS84_E2 * np.sin(np.radians(latitude)) ** 2
+        return np.abs(1 - (cos2 * w**1.5 / (1 - _WGS84_E2) + sin2 * np.sqrt(w)))
+
+    a1, a2 = np.abs(lat1), np.abs(lat2)
+    low = np.where(lat1 * lat2 < 0, 0, np.minimum(a1, a2))
+    relative = np.maximum(radius_error(low), radius_error(np.maximum(a1, a2)))
+    return np.where(d2 == 0, 0, relative)
+
+
+def _distance_np(
+    lng1: np.ndarray,
+    lat1: np.ndarray,
+    lng2: np.ndarray,
+    lat2: np.ndarray,
+    method: DistanceCalculateMethod,
+    tolerance: Optional[float] = None,
+) -> np.ndarray:
+    """向量化计算多组点对之间的距离（km），与 Position 中的标量公式一致"""
+    if method == "Auto":
+        return _distance_auto_np(
+            lng1,
+            lat1,
+            lng2,
+            lat2,
+            Position._distance_tolerance if tolerance is None else tolerance,
+        )
+    if method == "Flat":
+        return _distance_flat_np(lng1, lat1, lng2, lat2)
+    elif method == "Vincenty":
+        return _distance_vincenty_np(lng1, lat1, lng2, lat2) / 1000
+    elif method == "Haversine":
+        return _distance_haversine_np(lng1, lat1, lng2, lat2)
+    raise ValueError(f"不支持的距离计算方式 {method}")
+
+
+def _distance_auto_np(
+    lng1: np.ndarray,
+    lat1: np.ndarray,
+    lng2: np.ndarray,
+    lat2: np.ndarray,
+    tolerance: float,
+) -> np.ndarray:
+    """向量化的 Auto 方式（km），只对误差不满足要求的点对计算更精确的公式"""
+    result, bound, x, y = _distance_local_np(lng1, lat1, lng2, lat2)
+    rest = np.nonzero(bound > tolerance)[0]
+    if len(rest) > 0:
+        # 航段较长或 Haversine 的相对误差明显超出时直接使用 Vincenty
+        candidate = _haversine_path_error(result[rest]) <= tolerance
+        near, rest = rest[candidate], rest[~candidate]
+        relative = _haversine_relative_error_np(lat1[near], lat2[near], x[near], y[near])
+        candidate = relative * result[near] <= tolerance
+        rest = np.concatenate([rest, near[~candidate]])
+        near, relative = near[candidate], relative[candidate]
+        if len(near) > 0:
+            haversine = _distance_haversine_np(lng1[near], lat1[near], lng2[near], lat2[near])
+            ok = _haversine_error_bound(relative, haversine) <= tolerance  # type: ignore
+            result[near[ok]] = haversine[ok]
+            rest = np.concatenate([rest, near[~ok]])
+    if len(rest) > 0:
+        result[rest] = (
+            _distance_vincenty_np(lng1[rest], lat1[rest], lng2[rest], lat2[rest]) / 1000
+        )
+    return result
+
+
+def _distance_flat_np(
+    lng1: np.ndarray, lat1: np.ndarray, lng2: np.ndarray, lat2: np.ndarray
+) -> np.ndarray:
+    return np.sqrt(((lng1 - lng2) * 111) ** 2 + ((lat1 - lat2) * 111) ** 2)
+
+
+def _distance_haversine_np(
+    lng1: np.ndarray, lat1: np.ndarray, lng2: np.ndarray, lat2: np.ndarray
+) -> np.ndarray:
+    lng1, lat1 = np.radians(lng1), np.radians(lat1)
+    lng2, lat2 = np.radians(lng2), np.radians(lat2)
+    a = lat1 - lat2
+    b = lng1 - lng2
+    h = np.sin(a / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(b / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.minimum(h, 1))) * 6378.137
+
+
+def _distance_vincenty_np(
+    lng1: np.ndarray,
+    lat1: np.ndarray,
+    lng2: np.ndarray,
+    lat2: np.ndarray,
+    circleCount: int = 40,
+) -> np.ndarray:
+    """
+    向量化的 Vincenty 公式（m）
+
+    每轮迭代只计算尚未收敛的点对；迭代次数用尽仍未收敛的点对（接近对跖点）
+    改用 _distance_antipodal_np 求解，不会抛出 FailConvertException
+    """
+    a = 6378137.0
+    b = 6356752.314245
+    f = 1 / 298.257223563
+
+    L = np.radians(lng1) - np.radians(lng2)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    cosSqAlpha = np.zeros_like(L)
+    sinSigma = np.zeros_like(L)
+    cos2SigmaM = np.zeros_like(L)
+    cosSigma = np.zeros_like(L)
+    sigma = np.zeros_like(L)
+    # 重合的点对距离为 0
+    coincident = np.zeros(L.shape, dtype=bool)
+    # 恰好对跖的点对，与不收敛的点对一起求解
+    antipode = np.zeros(L.shape, dtype=bool)
+
+    # 尚未收敛的点对下标，经差恰好为 π 的点对同样需要迭代
+    active = np.arange(L.size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        while len(active) > 0 and circleCount > 0:
+            _L, _lam = L[active], lam[active]
+            _sinU1, _cosU1 = sinU1[active], cosU1[active]
+            _sinU2, _cosU2 = sinU2[active], cosU2[active]
+
+            sinLam, cosLam = np.sin(_lam), np.cos(_lam)
+            _sinSigma = np.sqrt(
+                (_cosU2 * sinLam) ** 2
+                + (_cosU1 * _sinU2 - _sinU1 * _cosU2 * cosLam) ** 2
+            )
+            _cosSigma = _sinU1 * _sinU2 + _cosU1 * _cosU2 * cosLam
+            _sigma = np.arctan2(_sinSigma, _cosSigma)
+            sinAlpha = _cosU1 * _cosU2 * sinLam / _sinSigma
+            _cosSqAlpha = 1 - sinAlpha * sinAlpha
+            # 赤道上的点对 cosSqAlpha 为 0
+            _cos2SigmaM = np.where(
+                _cosSqAlpha != 0, _cosSigma - 2 * _sinU1 * _sinU2 / _cosSqAlpha, 0
+            )
+            C = f / 16 * _cosSqAlpha * (4 + f * (4 - 3 * _cosSqAlpha))
+            lamNext = _L + (1 - C) * f * sinAlpha * (
+                _sigma
+                + C
+                * _sinSigma
+                * (_cos2SigmaM + C * _cosSigma * (-1 + 2 * _cos2SigmaM * _cos2SigmaM))
+            )
+
+            sinSigma[active] = _sinSigma
+            cosSigma[active] = _cosSigma
+            sigma[active] = _sigma
+            cosSqAlpha[active] = _cosSqAlpha
+            cos2SigmaM[active] = _cos2SigmaM
+            lam[active] = lamNext
+
+            zero = _sinSigma == 0
+            coincident[active[zero & (_cosSigma > 0)]] = True
+            antipode[active[zero & (_cosSigma <= 0)]] = True
+            active = active[~zero & (np.abs(lamNext - _lam) > 1e-12)]
+            circleCount -= 1
+
+    uSq = cosSqAlpha * (a * a - b * b) / (b * b)
+    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+    deltaSigma = (
+        B
+        * sinSigma
+        * (
+            cos2SigmaM
+            + B
+            / 4
+            * (
+                cosSigma * (-1 + 2 * cos2SigmaM * cos2SigmaM)
+                - B
+                / 6
+                * cos2SigmaM
+                * (-3 + 4 * sinSigma * sinSigma)
+                * (-3 + 4 * cos2SigmaM * cos2SigmaM)
+            )
+        )
+    )
+    result = np.where(coincident, 0, b * A * (sigma - deltaSigma))
+
+    active = np.union1d(active, np.nonzero(antipode)[0])
+    if len(active) > 0:
+        logger.warning(f"{len(active)} 组点对的 Vincenty 迭代未收敛，改为按方位角求解")
+        result[active] = _distance_antipodal_np(
+            lng1[active], lat1[active], lng2[active], lat2[active]
+        )
+    return result
+
+
+def _distance_antipodal_np(
+    lng1: np.ndarray,
+    lat1: np.ndarray,
+    lng2: np.ndarray,
+    lat2: np.ndarray,
+    iterations: int = 64,
+) -> np.ndarray:
+    """
+    椭球面上的测地线距离（m），用于 Vincenty 迭代不收敛的点对（接近对跖点）
+
+    Vincenty 以辅助球面上的经差迭代，接近对跖点时不收敛；这里按 Karney（2013）的做法
+    改以起点方位角为未知量：规范化为 |lat1| >= |lat2|、lat1 <= 0、经差在 [0, π] 后，
+    经差是起点方位角在 [0, π] 上的单调函数，用二分法求解，经差与距离仍使用 Vincenty 的级数
+    https://doi.org/10.1007/s00190-012-0578-z
+    """
+    a = 6378137.0
+    b = 6356752.314245
+    f = 1 / 298.257223563
+
+    # 交换起终点、南北翻转与东西翻转都不改变距离
+    swap = np.abs(lat1) < np.abs(lat2)
+    lat1, lat2 = np.where(swap, lat2, lat1), np.where(swap, lat1, lat2)
+    sign = np.where(lat1 > 0, -1.0, 1.0)
+    # 赤道上的起点取 -0，使向南出发的测地线从 σ1 = -π 开始
+    lat1, lat2 = -np.abs(lat1), lat2 * sign
+    L = np.abs(np.remainder(np.radians(lng2 - lng1) + np.pi, 2 * np.pi) - np.pi)
+
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    def solve(alpha1: np.ndarray) -> tuple[np.ndarray, ...]:
+        # 给定起点方位角，求到达终点纬度（北行一侧）时的经差与辅助球面上的弧长
+        sinAlpha1, cosAlpha1 = np.sin(alpha1), np.cos(alpha1)
+        sinAlpha = cosU1 * sinAlpha1
+        cosSqAlpha = 1 - sinAlpha * sinAlpha
+        sigma1 = np.arctan2(sinU1, cosAlpha1 * cosU1)
+        omega1 = np.arctan2(sinAlpha * sinU1, cosAlpha1 * cosU1)
+        cosAlpha2cosU2 = np.sqrt(
+            np.maximum((cosAlpha1 * cosU1) ** 2 + (cosU2 * cosU2 - cosU1 * cosU1), 0)
+        )
+        sigma2 = np.arctan2(sinU2, cosAlpha2cosU2)
+        omega2 = np.arctan2(sinAlpha * sinU2, cosAlpha2cosU2)
+        sigma = sigma2 - sigma1
+        cos2SigmaM = np.cos(sigma1 + sigma2)
+        C = f / 16 * cosSqAlpha * (4 + f * (4 - 3 * cosSqAlpha))
+        lng = (omega2 - omega1) - (1 - C) * f * sinAlpha * (
+            sigma
+            + C
+            * np.sin(sigma)
+            * (cos2SigmaM + C * np.cos(sigma) * (-1 + 2 * cos2SigmaM * cos2SigmaM))
+        )
+        return lng, sigma, cosSqAlpha, cos2SigmaM
+
+    low = np.zeros_like(L)
+    high = np.full_like(L, np.pi)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        less = solve(mid)[0] < L
+        low = np.where(less, mid, low)
+        high = np.where(less, high, mid)
+    _, sigma, cosSqAlpha, cos2SigmaM = solve((low + high) / 2)
+
+    sinSigma, cosSigma = np.sin(sigma), np.cos(sigma)
+    uSq = cosSqAlpha * (a * a - b * b) / (b * b)
+    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+    deltaSigma = (
+        B
+        * sinSigma
+        * (
+            cos2SigmaM
+            + B
+            / 4
+            * (
+                cosSigma * (-1 + 2 * cos2SigmaM * cos2SigmaM)
+                - B
+                / 6
+                * cos2SigmaM
+                * (-3 + 4 * sinSigma * sinSigma)
+                * (-3 + 4 * cos2SigmaM * cos2SigmaM)
+            )
+        )
+    )
+    # 两点都在赤道上且经差不超过 (1 - f)π 时测地线就是赤道
+    equator = (lat1 == 0) & (lat2 == 0) & (L <= (1 - f) * np.pi)
+    return np.where(equator, a * L, b * A * (sigma - deltaSigma))
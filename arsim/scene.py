@@ -1,12 +1,50 @@
-from typing import Optional, Unpack, Literal, Callable
-from math import isclose
-
-from .aircraft import Aircraft
-from .map import Map, Position
-from .task import SubTask, Task, TaskType, SubTaskParams
+from typing import Optional, Unpack, Literal, Callable, TypeVar, NamedTuple, Iterator, Sequence
+from collections import deque
+import copy
+import heapq
+import numpy as np
+
+from .aircraft import Aircraft, AircraftType
+from .map import Map, Position, DistanceCalculateMethod
+from .task import SubTask, Task, TaskType, SubTaskParams, PlanItem
+from .validate import PlanValidationException, validate_plan
+from .checkpoint import CheckpointPolicy, save_checkpoint, restore_checkpoint
 from .examples import positions as epos
 from .utils.logger import logger
 
+T = TypeVar("T")
+
+
+# 类型 -> 各层基类声明的 __slots__
+_SLOTS: dict[type, tuple[str, ...]] = {}
+
+
+def _slots(cls: type) -> tuple[str, ...]:
+    names = _SLOTS.get(cls)
+    if names is None:
+        names = tuple(
+            name
+            for base in cls.__mro__
+            for name in base.__dict__.get("__slots__", ())
+            if name not in ("__dict__", "__weakref__")
+        )
+        _SLOTS[cls] = names
+    return names
+
+
+def _clone(obj: T) -> T:
+    # 比 copy.copy 快数倍，推演对象都没有自定义复制逻辑
+    new = object.__new__(type(obj))
+    for name in _slots(type(obj)):
+        try:
+            setattr(new, name, getattr(obj, name))
+        except AttributeError:
+            # 尚未赋值的槽，例如未开始执行的子任务没有 leg_ticks
+            pass
+    if hasattr(obj, "__dict__"):
+        new.__dict__.update(obj.__dict__)
+    return new
+
 
 class AircraftAlreadyHasSubtask(Exception):
     def __init__(self, aircraft: Aircraft) -> None:
@@ -22,10 +60,26 @@ class ParallelSubtaskException(Exception):
 
 
 TimespanType = Literal["Move", "Subtask"]
+# 推演过程中对外发布的事件：开始执行（起飞）、到达、完成，加油保障完成时为 Refuel
+SceneEventType = Literal["Start", "Arrive", "Finish", "Refuel"]
+
+
+class SceneEvent(NamedTuple):
+    # 事件发生的推演时间
+    time: float
+    type: SceneEventType
+    aircraft: Aircraft
+    subtask: SubTask
+
+    @property
+    def position(self) -> Position:
+        return self.subtask.position
 
 
 class Scene:
     MAX_RESCUE_TIME: float = 3600 * 24 * 3
+    # 推演内部使用的整数时间单位：每秒 1000 个（毫秒），事件时间的比较都是整数比较
+    TICKS_PER_SECOND: int = 1000
 
     def __init__(
         self,
@@ -34,15 +88,50 @@ class Scene:
         tasks: list[Task],
         /,
         on_subtask_finish: Optional[Callable[["Scene"], None]] = None,
+        distance_method: Optional[DistanceCalculateMethod] = None,
+        distance_tolerance: Optional[float] = None,
+        stop_when_tasks_finished: bool = False,
     ) -> None:
         self.aircrafts: list[Aircraft] = aircrafts
         self.map: Map = map
-        self.tasks: list[Task] = tasks
-        self.now_time: float = 0
+        # 场景中的任务，Task 创建时自动加入
+        self.tasks: list[Task] = []
+        # 任务完成条件的观察者：(地点, 地点属性) -> 完成条件依赖该属性的任务
+        self._task_watchers: dict[tuple[Position, str], list[Task]] = {}
+        # 尚未完成的任务数
+        self._unfinished_tasks: int = 0
+        # 有任务且所有任务完成后结束推演，不再执行剩余的子任务
+        self.stop_when_tasks_finished: bool = stop_when_tasks_finished
+        # 当前推演时间（整数时间单位），now_time 为对应的秒数
+        self.now_tick: int = 0
+        # 本场景使用的距离计算方式，None 表示使用 Position 的全局设置
+        self.distance_method: Optional[DistanceCalculateMethod] = distance_method
+        # Auto 方式允许的误差（km）
+        self.distance_tolerance: Optional[float] = distance_tolerance
+        # 各巡航速度对应的航段飞行时间表，下标与 map.index 一致，只在向量化推演时按需建立
+        self._travel_time: dict[float, np.ndarray] = {}
+        self._travel_ticks: dict[float, np.ndarray] = {}
 
         self.aircraft_to_subtask: dict[Aircraft, Optional[SubTask]] = {}
-        self.aircraft_subtask_queue: dict[Aircraft, list[SubTask]] = {}
+        self.aircraft_subtask_queue: dict[Aircraft, deque[SubTask]] = {}
+        # 所有队列中等待执行的子任务总数
+        self._pending_subtask: int = 0
+        # 各地点上各类航空器的占用：(地点, 航空器类型) -> [旋翼面积之和, 空中作业面积之和, 数量]
+        self._occupancy: dict[tuple[Position, AircraftType], list[float]] = {}
+        # 推演过程中添加了子任务的空闲航空器，处理完当前事件后开始执行
+        self._ready_aircraft: dict[Aircraft, None] = {}
         self.on_subtask_finish: Optional[Callable[["Scene"], None]] = on_subtask_finish
+        # 事件队列：(绝对时间（整数时间单位）, 序号, 事件类型, 子任务)
+        self._events: list[tuple[int, int, TimespanType, SubTask]] = []
+        self._event_seq: int = 0
+        # 当前 step 中产生的事件记录，None 表示不记录
+        self._records: Optional[list[SceneEvent]] = None
+        # 推演过程中写入检查点的策略，None 表示不写入
+        self.checkpoint: Optional[CheckpointPolicy] = None
+
+        for task in tasks:
+            task.scene = self
+            self._add_task(task)
 
         self.setup_env()
 
@@ -53,31 +142,290 @@ class Scene:
 
         # 航空器子任务队列
         for ac in self.aircrafts:
-            self.aircraft_subtask_queue[ac] = []
+            self.aircraft_subtask_queue[ac] = deque()
 
         logger.info("成功建立任务执行环境")
 
-    def check_parallel_subtask(self, aircraft: Aircraft, subtask: SubTask) -> bool:
-        # 获取在同一地点执行任务的航空器
-        # 检查作业空间
-        tmp = [
-            ac
-            for ac, sub in self.aircraft_to_subtask.items()
-            if sub is not None
-            and sub.position == subtask.position
-            and ac.type == aircraft.type
+    def fork(self) -> "Scene":
+        """复制当前推演状态，得到可以独立继续推演的场景
+
+        航空器、子任务与任务只做浅复制并重新关联；地点状态写时复制（见 Map.fork），
+        只有被引用或被修改的地点才会复制。距离矩阵、飞行时间表、空间索引以及
+        special_condition、on_finished 等回调与原场景共享
+
+        Returns:
+            Scene: 新场景
+        """
+        sc = copy.copy(self)
+        sc.map = self.map.fork()
+        # 分支不写入原场景的检查点
+        sc.checkpoint = None
+
+        def position(p: Optional[Position]) -> Optional[Position]:
+            if p is None:
+                return None
+            i = self.map.index.get(p)
+            return p if i is None else sc.map.position[i]
+
+        aircrafts: dict[Aircraft, Aircraft] = {}
+        for ac in self.aircrafts:
+            new_ac = _clone(ac)
+            new_ac.now_position = position(ac.now_position)
+            aircrafts[ac] = new_ac
+        sc.aircrafts = list(aircrafts.values())
+
+        subtasks: dict[SubTask, SubTask] = {}
+
+        def subtask(st: SubTask) -> SubTask:
+            if st not in subtasks:
+                new_st = _clone(st)
+                new_st.scene = sc
+                new_st.aircraft = aircrafts[st.aircraft]
+                new_st.position = position(st.position)  # type: ignore
+                subtasks[st] = new_st
+            return subtasks[st]
+
+        sc.aircraft_to_subtask = {
+            aircrafts[ac]: None if st is None else subtask(st)
+            for ac, st in self.aircraft_to_subtask.items()
+        }
+        sc.aircraft_subtask_queue = {
+            aircrafts[ac]: deque(subtask(st) for st in queue)
+            for ac, queue in self.aircraft_subtask_queue.items()
+        }
+        sc._ready_aircraft = {aircrafts[ac]: None for ac in self._ready_aircraft}
+        sc._occupancy = {
+            (position(p), a_type): list(occupied)  # type: ignore
+            for (p, a_type), occupied in self._occupancy.items()
+        }
+        sc._events = [
+            (time, seq, kind, subtask(st))
+            for time, seq, kind, st in self._events
+            if self._is_valid_event(st)
         ]
+        heapq.heapify(sc._events)
+        # 在 on_subtask_finish 中复制时，刚完成的子任务尚未释放，由新场景 run 时接着开始下一个
+        for ac, st in sc.aircraft_to_subtask.items():
+            if st is not None and st.is_finished:
+                sc._set_current_subtask(ac, None)
+                sc._ready_aircraft[ac] = None
+
+        sc.tasks = []
+        sc._task_watchers = {}
+        sc._unfinished_tasks = 0
+        for task in self.tasks:
+            new_task = _clone(task)
+            new_task.scene = sc
+            new_task.position = position(task.position)  # type: ignore
+            sc._add_task(new_task)
+        return sc
+
+    def save_checkpoint(self, path: str) -> None:
+        """把当前推演状态写入检查点文件
+
+        Args:
+            path (str): 检查点文件路径
+        """
+        save_checkpoint(self, path)
+
+    def restore_checkpoint(self, path: str) -> None:
+        """从检查点文件恢复推演状态，场景需要由同一份数据创建
+
+        Args:
+            path (str): 检查点文件路径
+        """
+        restore_checkpoint(self, path)
+        if self.checkpoint is not None:
+            self.checkpoint.reset(self.now_time)
+
+    @property
+    def now_time(self) -> float:
+        """当前推演时间（秒）"""
+        return self.now_tick / self.TICKS_PER_SECOND
+
+    @now_time.setter
+    def now_time(self, value: float) -> None:
+        self.now_tick = self.to_ticks(value)
+
+    @classmethod
+    def to_ticks(cls, seconds: float) -> int:
+        """把秒数换算为整数时间单位，四舍五入到最近的单位
+
+        Args:
+            seconds (float): 秒数
+
+        Returns:
+            int: 整数时间单位
+        """
+        return round(seconds * cls.TICKS_PER_SECOND)
+
+    def distance(self, p1: Position, p2: Position) -> float:
+        """按本场景的距离计算方式计算两个地点之间的距离（km）"""
+        return self.map.distance(p1, p2, self.distance_method, self.distance_tolerance)
+
+    def travel_time_table(self, cruising_speed: float) -> np.ndarray:
+        """某一巡航速度下所有地点之间的飞行时间表，同型号的航空器共用一张表
+
+        表的大小与地点数量的平方成正比，只用于地图的 uses_distance_matrix 为 True 时的
+        向量化推演；逐个航段的查询使用 travel_time
+
+        Args:
+            cruising_speed (float): 巡航速度
+
+        Returns:
+            np.ndarray: 飞行时间矩阵，与 SubTask.move_time 的单位一致
+        """
+        if cruising_speed not in self._travel_time:
+            self._travel_time[cruising_speed] = (
+                self.map.distance_matrix(self.distance_method, self.distance_tolerance)
+                / cruising_speed
+            )
+            logger.info(f"建立巡航速度 {cruising_speed} 的飞行时间表")
+        return self._travel_time[cruising_speed]
+
+    def travel_time(self, aircraft: Aircraft, p1: Position, p2: Position) -> float:
+        """航空器从 p1 飞到 p2 所需的时间
+
+        按需查询两点间的距离（距离矩阵或 Position 的距离缓存），不建立飞行时间表，
+        结果与 travel_time_table 中的对应元素相同
+        """
+        return self.distance(p1, p2) / aircraft.cruising_speed
+
+    def travel_tick_table(self, cruising_speed: float) -> np.ndarray:
+        """travel_time_table 换算为整数时间单位后的飞行时间表
+
+        Args:
+            cruising_speed (float): 巡航速度
+
+        Returns:
+            np.ndarray: int64 飞行时间矩阵
+        """
+        if cruising_speed not in self._travel_ticks:
+            table = self.travel_time_table(cruising_speed) * self.TICKS_PER_SECOND
+            self._travel_ticks[cruising_speed] = np.rint(table).astype(np.int64)
+        return self._travel_ticks[cruising_speed]
+
+    def travel_ticks(self, aircraft: Aircraft, p1: Position, p2: Position) -> int:
+        """航空器从 p1 飞到 p2 所需的时间（整数时间单位），与 travel_tick_table 中的对应元素相同"""
+        return self.to_ticks(self.travel_time(aircraft, p1, p2))
+
+    def _set_current_subtask(self, ac: Aircraft, subtask: Optional[SubTask]) -> None:
+        # 更换航空器当前的子任务，同时维护各地点的占用面积
+        old = self.aircraft_to_subtask.get(ac)
+        if old is not None:
+            occupied = self._occupancy[(old.position, ac.type)]
+            occupied[0] -= ac.rotor_area
+            occupied[1] -= ac.air_area
+            occupied[2] -= 1
+            if occupied[2] == 0:
+                del self._occupancy[(old.position, ac.type)]
+        if subtask is not None:
+            occupied = self._occupancy.setdefault((subtask.position, ac.type), [0, 0, 0])
+            occupied[0] += ac.rotor_area
+            occupied[1] += ac.air_area
+            occupied[2] += 1
+        self.aircraft_to_subtask[ac] = subtask
+
+    def occupancy(self, position: Position, a_type: AircraftType) -> tuple[float, float]:
+        """某一地点上某类航空器当前占用的面积
+
+        Args:
+            position (Position): 地点
+            a_type (AircraftType): 航空器类型
+
+        Returns:
+            tuple[float, float]: (旋翼面积之和, 空中作业面积之和)
+        """
+        occupied = self._occupancy.get((position, a_type))
+        if occupied is None:
+            return 0, 0
+        return occupied[0], occupied[1]
+
+    def pad_utilisation(self, position: Position) -> dict[str, float]:
+        """某一地点当前的面积利用率
+
+        Args:
+            position (Position): 地点
+
+        Returns:
+            dict[str, float]: 直升机起降面积、固定翼起降面积与各类航空器空中作业面积的利用率
+        """
 
-        if subtask.type in SubTask._LAND_SUBTASK:
-            sum_area = sum([ac.rotor_area for ac in tmp]) + aircraft.rotor_area
+        def ratio(used: float, total: float) -> float:
+            if total > 0:
+                return used / total
+            return 0 if used == 0 else float("inf")
+
+        heli_rotor, heli_air = self.occupancy(position, "Helicopter")
+        fixed_rotor, fixed_air = self.occupancy(position, "FixedWing")
+        return {
+            "Helicopter": ratio(heli_rotor, position.helicopter_area),
+            "FixedWing": ratio(fixed_rotor, position.fixed_area),
+            "HelicopterAir": ratio(heli_air, position.air_work_area),
+            "FixedWingAir": ratio(fixed_air, position.air_work_area),
+        }
+
+    def _add_task(self, task: Task) -> None:
+        # 由 Task 创建时调用，登记任务完成条件依赖的地点属性
+        self.tasks.append(task)
+        for name in task.kind.position_resources:
+            self._task_watchers.setdefault((task.position, name), []).append(task)
+        if not task.is_finished:
+            task.check()
+        if not task.is_finished:
+            self._unfinished_tasks += 1
+
+    def notify_resource(self, position: Position, name: str) -> None:
+        """地点属性改变后调用，检查依赖该属性的任务是否完成
+
+        Args:
+            position (Position): 地点
+            name (str): 改变的属性
+        """
+        for task in self._task_watchers.get((position, name), ()):
+            if task.check():
+                self._unfinished_tasks -= 1
+
+    @property
+    def is_timeout(self) -> bool:
+        """下一个事件晚于最长救援时间，推演因此停止"""
+        event_tick = self._next_event_tick()
+        return event_tick is not None and event_tick > self.to_ticks(Scene.MAX_RESCUE_TIME)
+
+    def pending_events(self) -> dict[SubTask, tuple[int, int, TimespanType]]:
+        """执行中的子任务各自尚未处理的事件
+
+        每个执行中的子任务在事件队列中只有一个有效事件（到达或完成），已经作废的事件不包括在内
+
+        Returns:
+            dict[SubTask, tuple[int, int, TimespanType]]: 子任务 -> (时间（整数时间单位）, 序号, 事件类型)
+        """
+        return {
+            st: (tick, seq, kind)
+            for tick, seq, kind, st in self._events
+            if self._is_valid_event(st)
+        }
+
+    @property
+    def is_tasks_finished(self) -> bool:
+        """场景中有任务且全部完成"""
+        return len(self.tasks) > 0 and self._unfinished_tasks == 0
+
+    def check_parallel_subtask(self, aircraft: Aircraft, subtask: SubTask) -> bool:
+        # 在同一地点执行任务的同类航空器已占用的面积
+        rotor_area, air_area = self.occupancy(subtask.position, aircraft.type)
+
+        # 检查作业空间
+        if subtask.kind.work == "Land":
+            sum_area = rotor_area + aircraft.rotor_area
             if aircraft.type == "FixedWing":
                 if sum_area > subtask.position.fixed_area:
                     return False
             elif aircraft.type == "Helicopter":
                 if sum_area > subtask.position.helicopter_area:
                     return False
-        elif subtask.type in SubTask._AIR_SUBTASK:
-            sum_area = sum([ac.air_area for ac in tmp]) + aircraft.air_area
+        elif subtask.kind.work == "Air":
+            sum_area = air_area + aircraft.air_area
             if sum_area > subtask.position.air_work_area:
                 return False
 
@@ -89,10 +437,12 @@ class Scene:
         Returns:
             bool: 是否为空
         """
-        for _, v in self.aircraft_subtask_queue.items():
-            if len(v) != 0:
-                return False
-        return True
+        return self._pending_subtask == 0
+
+    @property
+    def pending_subtask_count(self) -> int:
+        """所有队列中等待执行的子任务总数"""
+        return self._pending_subtask
 
     def set_subtask(
         self,
@@ -147,9 +497,37 @@ class Scene:
             logger.error(f"航空器 {aircraft.name} 已经在执行子任务")
             raise AircraftAlreadyHasSubtask(aircraft)
         tmp_subtask = SubTask(self, s_type, aircraft, position, **addition)
-        self.aircraft_subtask_queue[aircraft].append(tmp_subtask)
+        self._enqueue(tmp_subtask)
+
+    def add_plan(self, plan: Sequence[PlanItem]) -> None:
+        """整体检查并添加方案中的所有子任务
+
+        与逐个调用 add_subtask 不同，子任务按方案演算后的航空器载荷与地点资源检查，
+        可以在一个方案中先装载、再卸货；有任何问题时不添加任何子任务
 
-        logger.info(f"航空器 {aircraft.name} 添加子任务 {tmp_subtask.type}")
+        Args:
+            plan (Sequence[PlanItem]): 按添加顺序排列的子任务
+
+        Raises:
+            AircraftAlreadyHasSubtask: 航空器已经在执行子任务
+            PlanValidationException: 方案中有问题，violations 为全部问题
+        """
+        for aircraft, _, _, _ in plan:
+            if self.aircraft_to_subtask.get(aircraft) is not None:
+                logger.error(f"航空器 {aircraft.name} 已经在执行子任务")
+                raise AircraftAlreadyHasSubtask(aircraft)
+        violations = validate_plan(self, plan)
+        if len(violations) > 0:
+            raise PlanValidationException(violations)
+        for aircraft, s_type, position, addition in plan:
+            self._enqueue(SubTask.unchecked(self, s_type, aircraft, position, dict(addition)))  # type: ignore
+
+    def _enqueue(self, subtask: SubTask) -> None:
+        self.aircraft_subtask_queue[subtask.aircraft].append(subtask)
+        self._pending_subtask += 1
+        self._ready_aircraft[subtask.aircraft] = None
+
+        logger.info(f"航空器 {subtask.aircraft.name} 添加子任务 {subtask.type}")
 
     def find_minimum_subtask(self) -> Optional[SubTask]:
         minimum: Optional[tuple[SubTask, float]] = None
@@ -189,75 +567,166 @@ class Scene:
         logger.info(f"找到 {mimimum[0]} 最小时间片 {mimimum[1].type}, 用时 {mimimum[2]}")
         return mimimum[0], mimimum[1]
 
-    def update_subtask_time(self, time: float, ex: SubTask) -> None:
-        if not ex.is_arrived:
-            ex.move_process += time * ex.aircraft.cruising_speed / ex.distance
-            if ex.is_arrived:
-                ex.aircraft.now_position = ex.position
-                logger.info(f'[{self.now_time}] 航空器 {ex.aircraft.name} 到达地点 {ex.position.name}')
+    def _schedule(self, subtask: SubTask, kind: TimespanType, tick: int) -> None:
+        # 记录子任务下一个事件（到达或完成）的绝对时间
+        heapq.heappush(self._events, (tick, self._event_seq, kind, subtask))
+        self._event_seq += 1
+
+    def _is_valid_event(self, subtask: SubTask) -> bool:
+        # 每个子任务的到达与完成事件各只安排一次，航空器已经更换子任务的事件作废
+        return self.aircraft_to_subtask.get(subtask.aircraft) is subtask
+
+    def _start_next_subtask(self, ac: Aircraft) -> Optional[SubTask]:
+        """为航空器设置队列中的下一个子任务，并安排其到达事件
+
+        Args:
+            ac (Aircraft): 航空器
+
+        Returns:
+            Optional[SubTask]: 新的子任务，队列为空时为 None
+        """
+        # 判断下一个进行的子任务是否需要加油
+        next_st = (
+            self.aircraft_subtask_queue[ac][0]
+            if len(self.aircraft_subtask_queue[ac]) > 0
+            else None
+        )
+        if next_st is None:
+            self._set_current_subtask(ac, None)
+            return None
+        if isinstance(ac.now_position, epos.Airport) and (not next_st.is_fueled):
+            # 需要加油
+            tmp_st = SubTask(self, "加油保障", ac, ac.now_position)
+            next_st.is_fueled = True
+        else:
+            tmp_st = self.aircraft_subtask_queue[ac].popleft()
+            self._pending_subtask -= 1
+        tmp_st.setup()
+        self._set_current_subtask(ac, tmp_st)
+        self._schedule(tmp_st, "Move", tmp_st.arrive_tick)  # type: ignore
+        if self._records is not None:
+            self._records.append(SceneEvent(self.now_time, "Start", ac, tmp_st))
+        logger.info(f"[{self.now_time}] 航空器 {ac.name} 开始执行 {tmp_st.type} 任务")
+        return tmp_st
+
+    def _start_ready_aircraft(self) -> None:
+        # 空闲且有子任务的航空器开始执行
+        ready, self._ready_aircraft = self._ready_aircraft, {}
+        for ac in ready:
+            if self.aircraft_to_subtask[ac] is None:
+                self._start_next_subtask(ac)
+
+    def _next_event_tick(self) -> Optional[int]:
+        # 丢弃已经作废的事件，返回下一个有效事件的时间
+        while len(self._events) > 0:
+            event_tick, _, _, st = self._events[0]
+            if self._is_valid_event(st):
+                return event_tick
+            heapq.heappop(self._events)
+        return None
+
+    def _advance(self) -> bool:
+        # 开始执行空闲航空器的子任务，然后处理下一个事件，没有可处理的事件时返回 False
+        if self.stop_when_tasks_finished and self.is_tasks_finished:
+            return False
+        self._start_ready_aircraft()
+
+        event_tick = self._next_event_tick()
+        if event_tick is None or event_tick > self.to_ticks(Scene.MAX_RESCUE_TIME):
+            return False
+        _, _, kind, st = heapq.heappop(self._events)
+
+        # 其他子任务的进度由时间戳推导，无需逐个更新
+        self.now_tick = event_tick
+
+        if kind == "Move":
+            st.arrive(self.now_tick)
+            logger.info(f"[{self.now_time}] 航空器 {st.aircraft.name} 到达地点 {st.position.name}")
+            if self._records is not None:
+                self._records.append(SceneEvent(self.now_time, "Arrive", st.aircraft, st))
+            self._schedule(st, "Subtask", st.finish_tick)  # type: ignore
         else:
-            ex.task_process += time / ex.consume_time_raw
-            if ex.is_finished:
-                ex.on_finish()
-                logger.info(f'[{self.now_time}] 航空器 {ex.aircraft.name} 完成 {ex.type} 任务')
+            st.finish(self.now_tick)
+            logger.info(f"[{self.now_time}] 航空器 {st.aircraft.name} 完成 {st.type} 任务")
+            if self._records is not None:
+                record_type = "Refuel" if st.type == "加油保障" else "Finish"
+                self._records.append(SceneEvent(self.now_time, record_type, st.aircraft, st))
+
+            if self.on_subtask_finish is not None:
+                self.on_subtask_finish(self)
+
+            if self.aircraft_to_subtask[st.aircraft] is st:
+                self._start_next_subtask(st.aircraft)
+            self._start_ready_aircraft()
+
+        if self.checkpoint is not None:
+            self.checkpoint.step(self)
+        return True
+
+    def step(self) -> list[SceneEvent]:
+        """处理下一个事件（到达或完成）
+
+        两次调用之间添加的子任务会在处理事件前开始执行
+
+        Returns:
+            list[SceneEvent]: 本次产生的事件记录，为空表示没有剩余事件或已超过最长救援时间
+        """
+        self._records = records = []
+        try:
+            self._advance()
+        finally:
+            self._records = None
+        return records
+
+    def run_until(self, time: float) -> list[SceneEvent]:
+        """推演到指定时间，处理该时间及之前的所有事件
+
+        推演尚未结束时，当前时间前进到 time，此时子任务的进度反映该时刻的状态
+
+        Args:
+            time (float): 推演时间（秒）
+
+        Returns:
+            list[SceneEvent]: 产生的事件记录
+        """
+        limit = self.to_ticks(min(time, Scene.MAX_RESCUE_TIME))
+        self._records = records = []
+        try:
+            while True:
+                if self.stop_when_tasks_finished and self.is_tasks_finished:
+                    event_tick = None
+                    break
+                self._start_ready_aircraft()
+                event_tick = self._next_event_tick()
+                if event_tick is None or event_tick > limit:
+                    break
+                if not self._advance():
+                    event_tick = None
+                    break
+        finally:
+            self._records = None
+        # 推演已经结束（没有剩余事件或任务全部完成）时不再推进时间
+        if event_tick is not None and limit > self.now_tick:
+            self.now_tick = limit
+        return records
+
+    def events(self) -> Iterator[SceneEvent]:
+        """逐个产生推演事件，迭代结束即推演结束，中途停止迭代即可提前结束推演
+
+        Yields:
+            Iterator[SceneEvent]: 事件记录
+        """
+        while True:
+            records = self.step()
+            if len(records) == 0:
+                return
+            yield from records
 
     def run(self) -> None:
-        while (
-            self.now_time <= Scene.MAX_RESCUE_TIME and not self.is_subtask_queue_empty()
-        ):
-            # 得到最小时间片
-            minimum = self.find_minimum_timespan()
-            if minimum is None:
-                logger.error("无法找到最小时间片")
-                raise RuntimeError("无法找到最小时间片")
-
-            # 获取时间片需要时间，并完成该最小时间片
-            minimum_consume_time: float = 0
-            if minimum[0] == "Move":
-                minimum_consume_time = minimum[1].move_time
-                minimum[1].move_process = 1
-                minimum[1].aircraft.now_position = minimum[1].position
-            elif minimum[0] == "Subtask":
-                minimum_consume_time = minimum[1].consume_time
-                minimum[1].task_process = 1
-                minimum[1].on_finish()
-                logger.info(f'[{self.now_time}] 航空器 {minimum[1].aircraft.name} 完成 {minimum[1].type} 任务')
-                
-                if self.on_subtask_finish is not None:
-                    self.on_subtask_finish(self)
-
-            # 更新时间，
-            self.now_time += minimum_consume_time
-            # 完成其他子任务
-            for st in self.aircraft_to_subtask.values():
-                if st is not None and st is not minimum[1]:
-                    self.update_subtask_time(minimum_consume_time, st)
-
-            # 去除完成的子任务，设置新的子任务
-            for ac in self.aircraft_to_subtask:
-                now_st = self.aircraft_to_subtask[ac]
-                if now_st is None:
-                    continue
-                if now_st.is_finished:
-                    # 判断下一个进行的子任务是否需要加油
-                    next_st = (
-                        self.aircraft_subtask_queue[ac][0]
-                        if len(self.aircraft_subtask_queue[ac]) > 0
-                        else None
-                    )
-                    if next_st is None:
-                        self.aircraft_to_subtask[ac] = None
-                        continue
-                    if isinstance(ac.now_position, epos.Airport) and (
-                        not next_st.is_fueled
-                    ):
-                        # 需要加油
-                        tmp_st = SubTask(self, "加油保障", ac, ac.now_position)
-                        tmp_st.setup()
-                        self.aircraft_to_subtask[ac] = tmp_st
-                        next_st.is_fueled = True
-                    else:
-                        tmp_st = self.aircraft_subtask_queue[ac].pop(0)
-                        tmp_st.setup()
-                        self.aircraft_to_subtask[ac] = tmp_st
-                        logger.info(f'[{self.now_time}] 航空器 {ac.name} 开始执行 {tmp_st.type} 任务')
+        """运行推演，直到所有子任务完成或超过最长救援时间
+
+        每个执行中的子任务在事件队列中只保留下一个事件（到达或完成）的绝对时间，
+        每次取出最早的事件处理，复杂度为 O(事件数 * log 航空器数)
+        """
+        while self._advance():
+            pass
@@ -1,32 +1,41 @@
 from typing import Literal, Any, TypedDict, Unpack, NotRequired, Callable, Optional
-from math import isclose
+from enum import StrEnum
 
-from .aircraft import Aircraft
+from .aircraft import Aircraft, AircraftAbility, AircraftAbilitySpecial
 from .map import Position
 from .examples import positions as mpos
 from .utils.logger import logger
 
 # pyright: reportTypedDictNotRequiredAccess = false
 
-TaskType = (
-    Literal["装载"]
-    | Literal["卸货"]
-    | Literal["运送"]
-    | Literal["投放"]
-    | Literal["绞车投放"]
-    | Literal["吊运"]
-    | Literal["卸载"]
-    | Literal["转移"]
-    | Literal["绞车转移"]
-    | Literal["安置"]
-    | Literal["转运"]
-    | Literal["绞车转运"]
-    | Literal["交接"]
-    | Literal["取水"]
-    | Literal["灭火"]
-    | Literal["侦查搜寻"]
-    | Literal["加油保障"]
-)
+
+class TaskType(StrEnum):
+    # 货运
+    LOAD_SUPPLY = "装载"
+    UNLOAD_SUPPLY = "卸货"
+    # 载人
+    LOAD_PEOPLE = "运送"
+    DROP_PEOPLE = "投放"
+    WINCH_DROP_PEOPLE = "绞车投放"
+    # 吊挂
+    LOAD_DEVICE = "吊运"
+    UNLOAD_DEVICE = "卸载"
+    # 转移灾民
+    LOAD_REFUGEE = "转移"
+    WINCH_LOAD_REFUGEE = "绞车转移"
+    UNLOAD_REFUGEE = "安置"
+    # 转运伤患
+    LOAD_PATIENT = "转运"
+    WINCH_LOAD_PATIENT = "绞车转运"
+    UNLOAD_PATIENT = "交接"
+    # 消防
+    LOAD_WATER = "取水"
+    EXTINGUISH = "灭火"
+    # 侦查
+    SEARCH = "侦查搜寻"
+    # 保障
+    REFUEL = "加油保障"
+
 
 
 class UnsupportedSubtaskException(Exception):
@@ -97,30 +106,414 @@ class SubTaskParams(TypedDict):
     # unload_water: NotRequired[int]
 
 
+# 子任务作业方式：在地点起降（Land）或空中作业（Air）
+SubTaskWork = Literal["Land", "Air"]
+# 作业耗时的计量：附加信息中的数量、航空器当前的载荷、剩余的搜索面积或固定一次
+SubTaskQuantity = Literal["amount", "load", "search", "once"]
+
+
+class SubTaskKind:
+    def __init__(
+        self,
+        t_type: str,
+        work: SubTaskWork,
+        positions: tuple[type[Position], ...],
+        rate: Callable[[Aircraft], float],
+        /,
+        quantity: SubTaskQuantity = "once",
+        abilities: tuple[AircraftAbilitySpecial, ...] = (),
+        amount: Optional[str] = None,
+        load: Optional[str] = None,
+        resource: Optional[str] = None,
+        unload: bool = False,
+        assign: bool = False,
+        capacity: Optional[Callable[[Aircraft, int], bool]] = None,
+        need: Optional[str] = None,
+        position_check: Optional[Callable[[Position], bool]] = None,
+        effect: Optional[Callable[["SubTask"], None]] = None,
+        effect_resources: tuple[str, ...] = (),
+        completed: Optional[Callable[[Position], bool]] = None,
+        messages: Optional[dict[str, str]] = None,
+    ) -> None:
+        """子任务类型的描述，SubTask 的耗时、检查与结算都由此查表完成
+
+        Args:
+            t_type (str): 子任务类型
+            work (SubTaskWork): 作业方式，决定检查起降面积还是空中作业面积
+            positions (tuple[type[Position], ...]): 允许的地点类型
+            rate (Callable[[Aircraft], float]): 单位数量的作业耗时（秒）
+            quantity (SubTaskQuantity, optional): 作业耗时的计量. Defaults to "once".
+            abilities (tuple[AircraftAbilitySpecial, ...], optional): 需要的航空器功能. Defaults to ().
+            amount (Optional[str], optional): 必须提供的附加信息. Defaults to None.
+            load (Optional[str], optional): 变化的航空器载荷属性. Defaults to None.
+            resource (Optional[str], optional): 与载荷对应的地点资源属性. Defaults to None.
+            unload (bool, optional): True 为把载荷全部卸到地点，False 为从地点装载 amount. Defaults to False.
+            assign (bool, optional): 装载时直接设置载荷而不是累加. Defaults to False.
+            capacity (Optional[Callable[[Aircraft, int], bool]], optional): 装载数量是否在航空器能力之内. Defaults to None.
+            need (Optional[str], optional): 地点的需求属性，资源已满足需求时任务已经完成. Defaults to None.
+            position_check (Optional[Callable[[Position], bool]], optional): 地点类型之外的附加条件. Defaults to None.
+            effect (Optional[Callable[[SubTask], None]], optional): 载荷之外的结算. Defaults to None.
+            effect_resources (tuple[str, ...], optional): effect 改变的地点属性. Defaults to ().
+            completed (Optional[Callable[[Position], bool]], optional): 作为任务时地点上的任务是否已经完成，
+                None 且提供 need 时为资源达到需求，否则该类型不能作为任务. Defaults to None.
+            messages (Optional[dict[str, str]], optional): 检查失败时的提示，可用 {aircraft}、{position}、{amount}. Defaults to None.
+        """
+        self.type: str = t_type
+        self.work: SubTaskWork = work
+        self.positions: tuple[type[Position], ...] = positions
+        self.rate: Callable[[Aircraft], float] = rate
+        self.quantity: SubTaskQuantity = quantity
+        self.abilities: tuple[AircraftAbilitySpecial, ...] = abilities
+        self.ability_mask: int = AircraftAbility(*abilities).map
+        self.amount: Optional[str] = amount
+        self.load: Optional[str] = load
+        self.resource: Optional[str] = resource
+        self.unload: bool = unload
+        self.assign: bool = assign
+        self.capacity: Optional[Callable[[Aircraft, int], bool]] = capacity
+        self.need: Optional[str] = need
+        self.position_check: Optional[Callable[[Position], bool]] = position_check
+        self.effect: Optional[Callable[["SubTask"], None]] = effect
+        self.effect_resources: tuple[str, ...] = effect_resources
+        if completed is None and need is not None:
+            completed = lambda position: getattr(position, resource) >= getattr(position, need)  # type: ignore
+        self.completed: Optional[Callable[[Position], bool]] = completed
+        self.messages: dict[str, str] = messages if messages is not None else {}
+
+    def work_area_message(self, aircraft: Aircraft, position: Position) -> Optional[str]:
+        """检查地点的起降或空中作业面积
+
+        Args:
+            aircraft (Aircraft): 航空器
+            position (Position): 地点
+
+        Returns:
+            Optional[str]: 面积不足时的提示，满足时为 None
+        """
+        if self.work == "Land":
+            if aircraft.type == "Helicopter":
+                if aircraft.rotor_area > position.helicopter_area:
+                    return f"地点 {position.name} 的空间不支持航空器 {aircraft.name} 起降"
+            elif aircraft.type == "FixedWing":
+                if aircraft.rotor_area > position.fixed_area:
+                    return f"地点 {position.name} 的空间不支持航空器 {aircraft.name} 起降"
+        elif self.work == "Air":
+            if aircraft.air_area > position.air_work_area:
+                return f"地点 {position.name} 的空间不支持航空器 {aircraft.name} 空中作业"
+        return None
+
+    @property
+    def position_resources(self) -> tuple[str, ...]:
+        """完成时会改变的地点属性"""
+        if self.resource is None:
+            return self.effect_resources
+        return (self.resource,) + self.effect_resources
+
+    def duration(self, subtask: "SubTask") -> float:
+        """子任务的作业耗时（秒），由单位耗时乘以作业数量
+
+        Args:
+            subtask (SubTask): 子任务，只使用其 aircraft、position 与 addition
+
+        Returns:
+            float: 需要的时间
+        """
+        if self.quantity == "once":
+            return self.rate(subtask.aircraft)
+        if self.quantity == "amount":
+            quantity = subtask.addition[self.amount]  # type: ignore
+        elif self.quantity == "load":
+            quantity = getattr(subtask.aircraft, self.load)  # type: ignore
+        else:
+            tmp: mpos.DisasterArea = subtask.position  # type: ignore
+            quantity = tmp.search[1] - tmp.already_search
+        return self.rate(subtask.aircraft) * quantity
+
+    def message(self, key: str, subtask: "SubTask") -> str:
+        return self.messages.get(key, _DEFAULT_MESSAGES[key]).format(
+            aircraft=subtask.aircraft.name,
+            position=subtask.position.name,
+            amount=subtask.addition.get(self.amount) if self.amount is not None else None,  # type: ignore
+        )
+
+
+# 注册类型未提供 messages 时使用的提示
+_DEFAULT_MESSAGES: dict[str, str] = {
+    "capacity": "航空器 {aircraft} 无法装载 {amount}",
+    "empty": "航空器 {aircraft} 上没有可以卸载的载荷",
+    "position": "地点 {position} 不能执行该任务",
+    "stock": "地点 {position} 没有 {amount} 的资源",
+    "done": "地点 {position} 的任务已经完成",
+}
+
+# 子任务类型 -> 描述
+SUBTASK_KINDS: dict[str, SubTaskKind] = {}
+
+
+def register_subtask_kind(kind: SubTaskKind, /, replace: bool = False) -> SubTaskKind:
+    """注册子任务类型，之后即可用该类型创建 SubTask
+
+    Args:
+        kind (SubTaskKind): 子任务类型的描述
+        replace (bool, optional): 是否替换已注册的同名类型. Defaults to False.
+
+    Raises:
+        ValueError: 类型已经注册
+
+    Returns:
+        SubTaskKind: 注册的描述
+    """
+    if kind.type in SUBTASK_KINDS and not replace:
+        raise ValueError(f"子任务类型 {kind.type} 已经注册")
+    SUBTASK_KINDS[kind.type] = kind
+    return kind
+
+
+def subtask_kind(t_type: str) -> SubTaskKind:
+    """查找子任务类型的描述
+
+    Args:
+        t_type (str): 子任务类型
+
+    Raises:
+        UnsupportedSubtaskException: 不支持的子任务类型
+
+    Returns:
+        SubTaskKind: 描述
+    """
+    kind = SUBTASK_KINDS.get(t_type)
+    if kind is None:
+        logger.error(f"不支持的子任务类型 {t_type}")
+        raise UnsupportedSubtaskException(f"不支持的子任务类型 {t_type}")
+    return kind
+
+
+def _refuel_rate(ac: Aircraft) -> float:
+    # 原有规则：仅当航空器当前位置为 Aircraft 时计入加油时间，实际推演中加油保障耗时为 0
+    return ac.fuel_fill_time if isinstance(ac.now_position, mpos.Aircraft) else 0
+
+
+def _refuel(st: "SubTask") -> None:
+    st.aircraft.current_fuel = st.aircraft.max_fuel
+
+
+def _search(st: "SubTask") -> None:
+    tmp: mpos.DisasterArea = st.position  # type: ignore
+    tmp.already_search = tmp.search[1]
+
+
+def _fit_internal(ac: Aircraft, amount: int) -> bool:
+    return amount + ac.now_internal <= ac.max_internal_load
+
+
+def _fit_external(ac: Aircraft, amount: int) -> bool:
+    return amount + ac.now_external <= ac.max_external_load
+
+
+def _fit_people(ac: Aircraft, amount: int) -> bool:
+    return ac.now_people + amount <= ac.max_capacity
+
+
+for _kind in (
+    SubTaskKind(
+        TaskType.LOAD_SUPPLY, "Land", (mpos.Source,), lambda ac: ac.supply_load_time,
+        quantity="amount", abilities=("Freight",), amount="load_supply",
+        load="now_supply", resource="supply", assign=True, capacity=_fit_internal,
+        messages={
+            "capacity": "航空器 {aircraft} 无法装载救援物资 {amount} 千克",
+            "position": "不能从地点 {position} 装载物资",
+            "stock": "地点 {position} 没有 {amount} 千克物资",
+        },
+    ),
+    SubTaskKind(
+        TaskType.UNLOAD_SUPPLY, "Land", (mpos.DisasterArea,), lambda ac: ac.supply_load_time,
+        quantity="load", abilities=("Freight",),
+        load="now_supply", resource="supply", unload=True, need="need_supply",
+        messages={
+            "empty": "航空器 {aircraft} 上没有装载的物资",
+            "position": "地点 {position} 不需要卸载物资",
+            "done": "地点 {position} 的物资任务已经完成",
+        },
+    ),
+    SubTaskKind(
+        TaskType.LOAD_PEOPLE, "Land", (mpos.Source,), lambda ac: ac.person_on_off_time,
+        quantity="amount", abilities=("Manned",), amount="load_people",
+        load="now_resuce_people", resource="rescue_people", capacity=_fit_people,
+        messages={
+            "capacity": "航空器 {aircraft} 无法运送人员 {amount} 人",
+            "position": "不能从地点 {position} 运送人员",
+            "stock": "地点 {position} 没有 {amount} 个人员",
+        },
+    ),
+    SubTaskKind(
+        TaskType.DROP_PEOPLE, "Land", (mpos.DisasterArea,), lambda ac: ac.person_on_off_time,
+        quantity="load", abilities=("Manned",),
+        load="now_resuce_people", resource="rescue_people", unload=True, need="need_rescue_people",
+        messages={
+            "empty": "航空器 {aircraft} 上没有救援人员",
+            "position": "地点 {position} 不需要投放救援人员",
+            "done": "地点 {position} 的投放人员任务已经完成",
+        },
+    ),
+    SubTaskKind(
+        TaskType.WINCH_DROP_PEOPLE, "Air", (mpos.DisasterArea,), lambda ac: ac.winch_person_time,
+        quantity="load", abilities=("Manned", "Winch"),
+        load="now_resuce_people", resource="rescue_people", unload=True, need="need_rescue_people",
+        messages={
+            "empty": "航空器 {aircraft} 上没有救援人员",
+            "position": "地点 {position} 不需要投放救援人员",
+            "done": "地点 {position} 的投放人员任务已经完成",
+        },
+    ),
+    SubTaskKind(
+        TaskType.LOAD_DEVICE, "Air", (mpos.Source,), lambda ac: ac.device_load_time,
+        abilities=("Hanging",), amount="load_device",
+        load="now_device", resource="device", assign=True,
+        capacity=lambda ac, amount: ac.now_external + 10_000 <= ac.max_external_load,
+        messages={
+            "capacity": "航空器 {aircraft} 无法吊运 10 吨的设备",
+            "position": "不能从地点 {position} 吊运设备",
+            "stock": "地点 {position} 没有 {amount} 个设备",
+        },
+    ),
+    SubTaskKind(
+        TaskType.UNLOAD_DEVICE, "Air", (mpos.DisasterArea,), lambda ac: ac.device_load_time,
+        abilities=("Hanging",),
+        load="now_device", resource="device", unload=True, need="need_device",
+        messages={
+            "empty": "航空器 {aircraft} 上没有吊运的设备",
+            "position": "地点 {position} 不需要卸载设备",
+            "done": "地点 {position} 的卸载设备任务已经完成",
+        },
+    ),
+    SubTaskKind(
+        TaskType.LOAD_REFUGEE, "Land", (mpos.DisasterArea,), lambda ac: ac.person_on_off_time,
+        quantity="amount", abilities=("Manned",), amount="load_refugee",
+        load="now_trapped_people", resource="trapped_people", capacity=_fit_people,
+        completed=lambda position: position.trapped_people <= 0,  # type: ignore
+        messages={
+            "capacity": "航空器 {aircraft} 无法转运灾民 {amount} 人",
+            "position": "不能从地点 {position} 转移灾民",
+            "stock": "地点 {position} 没有 {amount} 个灾民",
+        },
+    ),
+    SubTaskKind(
+        TaskType.WINCH_LOAD_REFUGEE, "Air", (mpos.DisasterArea,), lambda ac: ac.winch_person_time,
+        quantity="amount", abilities=("Manned", "Winch"), amount="load_refugee",
+        load="now_trapped_people", resource="trapped_people", capacity=_fit_people,
+        completed=lambda position: position.trapped_people <= 0,  # type: ignore
+        messages={
+            "capacity": "航空器 {aircraft} 无法转移灾民 {amount} 人",
+            "position": "不能从地点 {position} 转移灾民",
+            "stock": "地点 {position} 没有 {amount} 个灾民",
+        },
+    ),
+    SubTaskKind(
+        TaskType.UNLOAD_REFUGEE, "Land", (mpos.Destination,), lambda ac: ac.person_on_off_time,
+        quantity="load", abilities=("Manned",),
+        load="now_trapped_people", resource="trapped_people", unload=True,
+        messages={
+            "empty": "航空器 {aircraft} 上没有要转移的灾民",
+            "position": "地点 {position} 不能接受灾民",
+        },
+    ),
+    SubTaskKind(
+        TaskType.LOAD_PATIENT, "Land", (mpos.DisasterArea,), lambda ac: ac.patient_on_off_time,
+        quantity="amount", abilities=("Manned", "Medical"), amount="load_patient",
+        load="now_ill_people", resource="patient", capacity=_fit_people,
+        completed=lambda position: position.patient <= 0,  # type: ignore
+        messages={
+            "capacity": "航空器 {aircraft} 无法转运伤患 {amount} 人",
+            "position": "不能从地点 {position} 转运患者",
+            "stock": "地点 {position} 没有 {amount} 个伤患",
+        },
+    ),
+    SubTaskKind(
+        TaskType.WINCH_LOAD_PATIENT, "Air", (mpos.DisasterArea,), lambda ac: ac.winch_patient_time,
+        quantity="amount", abilities=("Manned", "Winch", "Medical"), amount="load_patient",
+        load="now_ill_people", resource="patient", capacity=_fit_people,
+        completed=lambda position: position.patient <= 0,  # type: ignore
+        messages={
+            "capacity": "航空器 {aircraft} 无法转运伤患 {amount} 人",
+            "position": "不能从地点 {position} 转运患者",
+            "stock": "地点 {position} 没有 {amount} 个伤患",
+        },
+    ),
+    SubTaskKind(
+        TaskType.UNLOAD_PATIENT, "Land", (mpos.Hospital,), lambda ac: ac.patient_on_off_time,
+        quantity="load", abilities=("Manned", "Medical"),
+        load="now_ill_people", resource="patient", unload=True,
+        messages={
+            "empty": "航空器 {aircraft} 上没有要交接的伤患",
+            "position": "地点 {position} 不能接受伤患",
+        },
+    ),
+    SubTaskKind(
+        TaskType.LOAD_WATER, "Air", (mpos.Source,),
+        lambda ac: ac.water_load_time / ac.max_external_load,
+        quantity="amount", abilities=("Fire",), amount="load_water",
+        load="now_water", resource="water", capacity=_fit_external,
+        messages={
+            "capacity": "航空器 {aircraft} 无法取水 {amount} 吨",
+            "position": "不能从地点 {position} 取水",
+            "stock": "地点 {position} 没有 {amount} 吨水",
+        },
+    ),
+    SubTaskKind(
+        TaskType.EXTINGUISH, "Air", (mpos.DisasterArea,),
+        lambda ac: ac.extinguishing_time / ac.max_external_load,
+        quantity="load", abilities=("Fire",),
+        load="now_water", resource="water", unload=True, need="need_water",
+        messages={
+            "empty": "航空器 {aircraft} 上没有多余的水",
+            "position": "地点 {position} 不需要水源灭火",
+            "done": "地点 {position} 的灭火任务已经完成",
+        },
+    ),
+    SubTaskKind(
+        TaskType.SEARCH, "Air", (mpos.DisasterArea,), lambda ac: ac.search_time,
+        quantity="search", abilities=("Reconnoitre",),
+        position_check=lambda position: position.search[0],  # type: ignore
+        effect=_search,
+        effect_resources=("already_search",),
+        completed=lambda position: position.already_search >= position.search[1],  # type: ignore
+        messages={"position": "地点 {position} 不需要侦查搜寻"},
+    ),
+    SubTaskKind(
+        TaskType.REFUEL, "Land", (mpos.Airport,), _refuel_rate,
+        effect=_refuel,
+        messages={"position": "所选择的地点 {position} 不能进行加油保障"},
+    ),
+):
+    register_subtask_kind(_kind)
+
+
+# 方案中的一个子任务：(航空器, 子任务类型, 地点, 附加信息)
+PlanItem = tuple[Aircraft, TaskType, Position, SubTaskParams]
+
+
 class SubTask:
-    # from .scene import Scene
-
-    _LAND_SUBTASK: list[TaskType] = [
-        "装载",
-        "卸货",
-        "运送",
-        "投放",
-        "转移",
-        "安置",
-        "转运",
-        "交接",
-        "加油保障",
-    ]
-    _AIR_SUBTASK: list[TaskType] = [
-        "绞车投放",
-        "吊运",
-        "卸载",
-        "绞车转移",
-        "绞车转运",
-        "取水",
-        "灭火",
-        "侦查搜寻",
-    ]
+    __slots__ = (
+        "scene",
+        "kind",
+        "type",
+        "aircraft",
+        "position",
+        "addition",
+        "is_fueled",
+        "start_tick",
+        "arrive_tick",
+        "finish_tick",
+        "_arrived",
+        "_finished",
+        "_duration",
+        "distance",
+        "leg_time",
+        "leg_ticks",
+    )
+
+    # 调试模式下统计读取耗时时命中缓存、免于重新计算的次数
+    avoided_duration_computations: int = 0
 
     def __init__(
         self,
@@ -130,20 +523,9 @@ class SubTask:
         position: Position,
         **kwargs: Unpack[SubTaskParams],
     ) -> None:
-        # 所属推演场景
-        self.scene: 'Scene' = scene
-        # 所属子任务类型
-        self.type: TaskType = task_type
-        # 执行任务的航空器
-        self.aircraft: Aircraft = aircraft
-        # 执行任务的地点
-        self.position: Position = position
-        # 任务附加信息
-        self.addition: SubTaskParams = kwargs
-        # 是否已经加油保障
-        self.is_fueled: bool = False
+        self._init(scene, task_type, aircraft, position, kwargs)
 
-        if self.position not in self.scene.map.position:
+        if self.position not in self.scene.map:
             logger.error(f"地点 {self.position.name} 不存在")
             raise PositionNotExistException(f"地点 {self.position.name} 不存在")
 
@@ -159,98 +541,195 @@ class SubTask:
                 f"航空器 {self.aircraft.name} 在地点 {self.position.name} 不能执行 {self.type} 任务"
             )
 
+    @classmethod
+    def unchecked(
+        cls,
+        scene: 'Scene',
+        task_type: TaskType,
+        aircraft: Aircraft,
+        position: Position,
+        addition: SubTaskParams,
+    ) -> "SubTask":
+        """创建子任务，不按航空器与地点的当前状态检查，用于已经由 validate_plan 整体检查过的方案
+
+        Args:
+            scene (Scene): 推演场景
+            task_type (TaskType): 子任务类型
+            aircraft (Aircraft): 执行任务的航空器
+            position (Position): 执行任务的地点
+            addition (SubTaskParams): 任务附加信息
+
+        Returns:
+            SubTask: 子任务
+        """
+        st = object.__new__(cls)
+        st._init(scene, task_type, aircraft, position, addition)
+        return st
+
+    def _init(
+        self,
+        scene: 'Scene',
+        task_type: TaskType,
+        aircraft: Aircraft,
+        position: Position,
+        addition: SubTaskParams,
+    ) -> None:
+        # 所属推演场景
+        self.scene: 'Scene' = scene
+        # 子任务类型的描述
+        self.kind: SubTaskKind = subtask_kind(task_type)
+        # 所属子任务类型
+        self.type: TaskType = self.kind.type  # type: ignore
+        # 执行任务的航空器
+        self.aircraft: Aircraft = aircraft
+        # 执行任务的地点
+        self.position: Position = position
+        # 任务附加信息
+        self.addition: SubTaskParams = addition
+        # 是否已经加油保障
+        self.is_fueled: bool = False
+
+        # 进度由以下时间戳推导，不随事件逐步累加，单位为场景的整数时间单位（毫秒）
+        # 开始执行（起飞）的时间
+        self.start_tick: Optional[int] = None
+        # 到达地点的时间，setup 后为预计到达时间
+        self.arrive_tick: Optional[int] = None
+        # 完成的时间，到达后为预计完成时间
+        self.finish_tick: Optional[int] = None
+        self._arrived: bool = False
+        self._finished: bool = False
+        # 开始执行时计算的作业耗时（秒）
+        self._duration: Optional[float] = None
+
     def setup(self) -> None:
         """子任务初始化"""
         # 移动初始化
         if self.aircraft.now_position is not None:
-            # 航空器移动距离
-            self.distance: float = Position.distance(
+            # 航空器移动距离，航段时间由同一次距离查询得到
+            self.distance: float = self.scene.distance(
                 self.aircraft.now_position, self.position
             )
-            self.move_process: float = 0
+            # 航段飞行时间（秒），与 Scene.travel_time 相同
+            self.leg_time: float = self.distance / self.aircraft.cruising_speed
+            # 推演使用的航段飞行时间（整数时间单位）
+            self.leg_ticks: int = self.scene.to_ticks(self.leg_time)
         else:
             logger.error("子任务初始化失败，航空器当前位置为空")
             raise
 
-        # 任务初始化
-        self.task_process: float = 0
+        self.start_tick = self.scene.now_tick
+        self.arrive_tick = self.start_tick + self.leg_ticks
+        self.finish_tick = None
+        self._arrived = False
+        self._finished = False
+        # 执行期间航空器载荷不变，耗时只需在开始时计算一次
+        self._duration = self.kind.duration(self)
+
+    def arrive(self, tick: int) -> None:
+        """航空器到达地点，开始作业
+
+        Args:
+            tick (int): 到达时间（整数时间单位）
+        """
+        self.aircraft.now_position = self.position
+        self.arrive_tick = tick
+        # 飞行期间其他航空器可能已经完成同一灾区的部分搜索
+        if self.kind.quantity == "search":
+            self._duration = None
+        self.finish_tick = tick + self.scene.to_ticks(self.consume_time_raw)
+        self._arrived = True
+
+    def finish(self, tick: int) -> None:
+        """子任务完成，结算资源
+
+        Args:
+            tick (int): 完成时间（整数时间单位）
+        """
+        self.finish_tick = tick
+        self._finished = True
+        self.on_finish()
+
+    def _seconds(self, tick: Optional[int]) -> Optional[float]:
+        return None if tick is None else tick / self.scene.TICKS_PER_SECOND
+
+    @property
+    def start_time(self) -> Optional[float]:
+        """开始执行的时间（秒）"""
+        return self._seconds(self.start_tick)
+
+    @property
+    def arrive_time(self) -> Optional[float]:
+        """到达地点的时间（秒）"""
+        return self._seconds(self.arrive_tick)
+
+    @property
+    def finish_time(self) -> Optional[float]:
+        """完成的时间（秒）"""
+        return self._seconds(self.finish_tick)
+
+    @property
+    def move_process(self) -> float:
+        """
+        移动进度（0 ~ 1），由起飞时间与当前时间推导
+        """
+        if self._arrived:
+            return 1
+        if self.start_tick is None:
+            return 0
+        if self.leg_ticks <= 0:
+            return 1
+        return min(max((self.scene.now_tick - self.start_tick) / self.leg_ticks, 0), 1)
+
+    @property
+    def task_process(self) -> float:
+        """
+        作业进度（0 ~ 1），由到达时间与当前时间推导
+        """
+        if self._finished:
+            return 1
+        if not self._arrived:
+            return 0
+        duration = self.finish_tick - self.arrive_tick  # type: ignore
+        if duration <= 0:
+            return 1
+        return min(max((self.scene.now_tick - self.arrive_tick) / duration, 0), 1)  # type: ignore
 
     @property
     def is_arrived(self) -> bool:
         """
         航空器是否移动到目的地
         """
-        return (
-            isclose(self.move_process, 1)
-            and self.aircraft.now_position == self.position
-        )
+        return self._arrived
 
     @property
     def is_finished(self) -> bool:
         """
         航空器是否完成该子任务
         """
-        return isclose(self.task_process, 1)
+        return self._finished
 
     @property
     def consume_time_raw(self) -> float:
         """任务总共消耗时间（秒）
 
-        Raises:
-            UnsupportedSubtaskException: 不支持的子任务类型
+        子任务开始执行后使用 setup 时计算的耗时，invalidate_duration 后重新计算
 
         Returns:
             float: 需要的时间
         """
-        c_time: float = 0
-        if self.type == "加油保障":
-            if isinstance(self.aircraft.now_position, mpos.Aircraft):
-                c_time = self.aircraft.fuel_fill_time
-            else:
-                c_time = 0
-        elif self.type == "装载":
-            c_time = self.aircraft.supply_load_time * self.addition["load_supply"]
-        elif self.type == "卸货":
-            c_time = self.aircraft.supply_load_time * self.aircraft.now_supply
-        elif self.type == "运送":
-            c_time = self.aircraft.person_on_off_time * self.addition["load_people"]
-        elif self.type == "投放":
-            c_time = self.aircraft.person_on_off_time * self.aircraft.now_resuce_people
-        elif self.type == "绞车投放":
-            c_time = self.aircraft.winch_person_time * self.aircraft.now_resuce_people
-        elif self.type == "吊运" or self.type == "卸载":
-            c_time = self.aircraft.device_load_time
-        elif self.type == "转移":
-            c_time = self.aircraft.person_on_off_time * self.addition["load_refugee"]
-        elif self.type == "绞车转移":
-            c_time = self.aircraft.winch_person_time * self.addition["load_refugee"]
-        elif self.type == "安置":
-            c_time = self.aircraft.person_on_off_time * self.aircraft.now_trapped_people
-        elif self.type == "转运":
-            c_time = self.aircraft.patient_on_off_time * self.addition["load_patient"]
-        elif self.type == "绞车转运":
-            c_time = self.aircraft.winch_patient_time * self.addition["load_patient"]
-        elif self.type == "交接":
-            c_time = self.aircraft.patient_on_off_time * self.aircraft.now_ill_people
-        elif self.type == "取水":
-            c_time = (
-                self.aircraft.water_load_time
-                / self.aircraft.max_external_load
-                * self.addition["load_water"]
-            )
-        elif self.type == "灭火":
-            c_time = (
-                self.aircraft.extinguishing_time
-                / self.aircraft.max_external_load
-                * self.aircraft.now_water
-            )
-        elif self.type == "侦查搜寻":
-            tmp: mpos.DisasterArea = self.position  # type: ignore
-            c_time = self.aircraft.search_time * (tmp.search[1] - tmp.already_search)
-        else:
-            logger.error(f"不支持的子任务类型 {self.type}")
-            raise UnsupportedSubtaskException(f"不支持的子任务类型 {self.type}")
-        return c_time
+        if self._duration is not None:
+            if __debug__:
+                SubTask.avoided_duration_computations += 1
+            return self._duration
+        duration = self.kind.duration(self)
+        # 尚未开始的子任务，航空器载荷等还可能被之前的子任务改变，不缓存
+        if self.start_tick is not None:
+            self._duration = duration
+        return duration
+
+    def invalidate_duration(self) -> None:
+        """耗时依赖的航空器载荷或地点状态被改变后调用，下次读取时重新计算"""
+        self._duration = None
 
     @property
     def consume_time(self) -> float:
@@ -258,193 +737,38 @@ class SubTask:
         任务还需要进行的时间 (单位：秒)
         """
 
-        return self.consume_time_raw * (1 - self.task_process)
+        if self._finished:
+            return 0
+        if not self._arrived:
+            return self.consume_time_raw
+        return max(self.finish_tick - self.scene.now_tick, 0) / self.scene.TICKS_PER_SECOND  # type: ignore
 
     @property
     def move_time(self) -> float:
         """
         飞机移动时间 (单位：秒)
         """
-        return self.distance * (1 - self.move_process) / self.aircraft.cruising_speed
+        if self._arrived:
+            return 0
+        return max(self.arrive_tick - self.scene.now_tick, 0) / self.scene.TICKS_PER_SECOND  # type: ignore
 
     def check_aircraft_valid(self) -> bool:
         """
         检验所指派的航空器能否执行该任务
         """
-        # 侦查
-        if self.type == "侦查搜寻":
-            if not self.aircraft.ability.can("Reconnoitre"):
-                return False
-        # 消防
-        elif self.type == "取水":
-            if not self.aircraft.ability.can("Fire"):
-                return False
-            if "load_water" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_water 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_water 信息"
-                )
-            if (
-                self.addition["load_water"] + self.aircraft.now_external
-                > self.aircraft.max_external_load
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法取水 {self.addition["load_water"]} 吨')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法取水 {self.addition["load_water"]} 吨'
-                )
-        elif self.type == "灭火":
-            if not self.aircraft.ability.can("Fire"):
-                return False
-            if self.aircraft.now_water <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有多余的水")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有多余的水")
-        # 货运
-        elif self.type == "装载":
-            if not self.aircraft.ability.can("Freight"):
-                return False
-            if "load_supply" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_supply 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_supply 信息"
-                )
-            if (
-                self.addition["load_supply"] + self.aircraft.now_internal
-                > self.aircraft.max_internal_load
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法装载救援物资 {self.addition["load_supply"]} 千克')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法装载救援物资 {self.addition["load_supply"]} 千克'
-                )
-        elif self.type == "卸货":
-            if not self.aircraft.ability.can("Freight"):
-                return False
-            if self.aircraft.now_supply <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有装载的物资")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有装载的物资")
-        # 载人
-        elif self.type == "运送":
-            if not self.aircraft.ability.can("Manned"):
-                return False
-            if "load_people" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_people 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_people 信息"
-                )
-            if (
-                self.aircraft.now_people + self.addition["load_people"]
-                > self.aircraft.max_capacity
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法运送人员 {self.addition["load_people"]} 人')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法运送人员 {self.addition["load_people"]} 人'
-                )
-        elif self.type == "投放":
-            if not self.aircraft.ability.can("Manned"):
-                return False
-            if self.aircraft.now_resuce_people <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有救援人员")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有救援人员")
-        elif self.type == "绞车投放":
-            if not self.aircraft.ability.can("Manned", "Winch"):
-                return False
-            if self.aircraft.now_resuce_people <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有救援人员")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有救援人员")
-        # 吊挂
-        elif self.type == "吊运":
-            if not self.aircraft.ability.can("Hanging"):
-                return False
-            if self.aircraft.now_external + 10_000 > self.aircraft.max_external_load:
-                logger.error(f"航空器 {self.aircraft.name} 无法吊运 10 吨的设备")
-                raise UnsupportedSubtaskException(
-                    f"航空器 {self.aircraft.name} 无法吊运 10 吨的设备"
-                )
-        elif self.type == "卸载":
-            if not self.aircraft.ability.can("Hanging"):
-                return False
-            if self.aircraft.now_device <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有吊运的设备")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有吊运的设备")
-        # 转移灾民
-        elif self.type == "转移":
-            if not self.aircraft.ability.can("Manned"):
-                return False
-            if "load_refugee" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_refugee 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_refugee 信息"
-                )
-            if (
-                self.addition["load_refugee"] + self.aircraft.now_people
-                > self.aircraft.max_capacity
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法转运灾民 {self.addition["load_refugee"]} 人')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法转运灾民 {self.addition["load_refugee"]} 人'
-                )
-        elif self.type == "绞车转移":
-            if not self.aircraft.ability.can("Manned", "Winch"):
-                return False
-            if "load_refugee" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_refugee 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_refugee 信息"
-                )
-            if (
-                self.addition["load_refugee"] + self.aircraft.now_people
-                > self.aircraft.max_capacity
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法转移灾民 {self.addition["load_refugee"]} 人')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法转移灾民 {self.addition["load_refugee"]} 人'
-                )
-        elif self.type == "安置":
-            if not self.aircraft.ability.can("Manned"):
-                return False
-            if self.aircraft.now_trapped_people <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有要安置的灾民")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有要转移的灾民")
-        # 转运伤患
-        elif self.type == "转运":
-            if not self.aircraft.ability.can("Manned", "Medical"):
-                return False
-            if "load_patient" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_patient 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_patient 信息"
-                )
-            if (
-                self.addition["load_patient"] + self.aircraft.now_people
-                > self.aircraft.max_capacity
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法转运伤患 {self.addition["load_patient"]} 人')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法转运伤患 {self.addition["load_patient"]} 人'
-                )
-        elif self.type == "绞车转运":
-            if not self.aircraft.ability.can("Manned", "Winch", "Medical"):
-                return False
-            if "load_patient" not in self.addition:
-                logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_patient 信息")
-                raise MissingSubtaskInformationException(
-                    f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 load_patient 信息"
-                )
-            if (
-                self.addition["load_patient"] + self.aircraft.now_people
-                > self.aircraft.max_capacity
-            ):
-                logger.error(f'航空器 {self.aircraft.name} 无法转运伤患 {self.addition["load_patient"]} 人')
-                raise UnsupportedSubtaskException(
-                    f'航空器 {self.aircraft.name} 无法转运灾民 {self.addition["load_patient"]} 人'
-                )
-        elif self.type == "交接":
-            if not self.aircraft.ability.can("Manned", "Medical"):
-                return False
-            if self.aircraft.now_ill_people <= 0:
-                logger.error(f"航空器 {self.aircraft.name} 上没有要交接的伤患")
-                raise UnsupportedSubtaskException(f"航空器 {self.aircraft.name} 上没有要交接的伤患")
-        elif self.type == "加油保障":
-            pass
+        kind = self.kind
+        if self.aircraft.ability.map & kind.ability_mask != kind.ability_mask:
+            return False
+        if kind.amount is not None and kind.amount not in self.addition:
+            logger.error(f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 {kind.amount} 信息")
+            raise MissingSubtaskInformationException(
+                f"航空器 {self.aircraft.name} 执行 {self.type} 任务时缺少 {kind.amount} 信息"
+            )
+        if kind.capacity is not None:
+            if not kind.capacity(self.aircraft, self.addition[kind.amount]):  # type: ignore
+                self._fail(UnsupportedSubtaskException, "capacity")
+        if kind.unload and getattr(self.aircraft, kind.load) <= 0:  # type: ignore
+            self._fail(UnsupportedSubtaskException, "empty")
 
         return True
 
@@ -456,137 +780,21 @@ class SubTask:
 
         # 通用需求
         # 此时未考虑多个飞机的情况，需要额外工作
-        if self.type in SubTask._LAND_SUBTASK:
-            if self.aircraft.type == "Helicopter":
-                if self.aircraft.rotor_area > self.position.helicopter_area:
-                    logger.error(f"地点 {self.position.name} 的空间不支持航空器 {self.aircraft.name} 起降")
-                    raise PositionNotSupportedException(
-                        f"地点 {self.position.name} 的空间不支持航空器 {self.aircraft.name} 起降"
-                    )
-            elif self.aircraft.type == "FixedWing":
-                if self.aircraft.rotor_area > self.position.fixed_area:
-                    logger.error(f"地点 {self.position.name} 的空间不支持航空器 {self.aircraft.name} 起降")
-                    raise PositionNotSupportedException(
-                        f"地点 {self.position.name} 的空间不支持航空器 {self.aircraft.name} 起降"
-                    )
-        elif self.type in SubTask._AIR_SUBTASK:
-            if self.aircraft.air_area > self.position.air_work_area:
-                logger.error(f"地点 {self.position.name} 的空间不支持航空器 {self.aircraft.name} 空中作业")
-                raise PositionNotSupportedException(
-                    f"地点 {self.position.name} 的空间不支持航空器 {self.aircraft.name} 空中作业"
-                )
-        # 侦查
-        if self.type == "侦查搜寻":
-            if (
-                not isinstance(self.position, mpos.DisasterArea)
-                or not self.position.search[0]
-            ):
-                logger.error(f"地点 {self.position.name} 不需要侦查搜寻")
-                raise PositionNotSupportedException(f"地点 {self.position.name} 不需要侦查搜寻")
-        # 消防
-        elif self.type == "取水":
-            if not isinstance(self.position, mpos.Source):
-                logger.error(f"不能从地点 {self.position.name} 取水")
-                raise PositionNotSupportedException(f"不能从地点 {self.position.name} 取水")
-            if self.position.water < self.addition["load_water"]:
-                logger.error(f'地点 {self.position.name} 没有 {self.addition["load_water"]} 吨水')
-                raise PositionNotSupportedException(
-                    f'地点 {self.position.name} 没有 {self.addition["load_water"]} 吨水'
-                )
-        elif self.type == "灭火":
-            if not isinstance(self.position, mpos.DisasterArea):
-                logger.error(f"地点 {self.position.name} 不需要水源灭火")
-                raise PositionNotSupportedException(f"地点 {self.position.name} 不需要水源灭火")
-            if self.position.water >= self.position.need_water:
-                logger.error(f"地点 {self.position.name} 的灭火任务已经完成")
-                raise SubTaskSucceedException(f"地点 {self.position.name} 的灭火任务已经完成")
-        # 货运
-        elif self.type == "装载":
-            if not isinstance(self.position, mpos.Source):
-                logger.error(f"不能从地点 {self.position.name} 装载物资")
-                raise PositionNotSupportedException(f"不能从地点 {self.position.name} 装载物资")
-            if self.position.supply < self.addition["load_supply"]:
-                logger.error(f'地点 {self.position.name} 没有 {self.addition["load_supply"]} 千克物资')
-                raise PositionNotSupportedException(
-                    f'地点 {self.position.name} 没有 {self.addition["load_supply"]} 千克物资'
-                )
-        elif self.type == "卸货":
-            if not isinstance(self.position, mpos.DisasterArea):
-                logger.error(f"地点 {self.position.name} 不需要卸载物资")
-                raise PositionNotSupportedException(f"地点 {self.position.name} 不需要卸载物资")
-            if self.position.supply >= self.position.need_supply:
-                logger.error(f"地点 {self.position.name} 的物资任务已经完成")
-                raise SubTaskSucceedException(f"地点 {self.position.name} 的物资任务已经完成")
-        # 载人
-        elif self.type == "运送":
-            if not isinstance(self.position, mpos.Source):
-                logger.error(f"不能从地点 {self.position.name} 运送人员")
-                raise PositionNotSupportedException(f"不能从地点 {self.position.name} 运送人员")
-            if self.position.rescue_people < self.addition["load_people"]:
-                logger.error(f'地点 {self.position.name} 没有 {self.addition["load_people"]} 个人员')
-                raise PositionNotSupportedException(
-                    f'地点 {self.position.name} 没有 {self.addition["load_people"]} 个人员'
-                )
-        elif self.type == "投放" or self.type == "绞车投放":
-            if not isinstance(self.position, mpos.DisasterArea):
-                logger.error(f"地点 {self.position.name} 不需要投放救援人员")
-                raise PositionNotSupportedException(
-                    f"地点 {self.position.name} 不需要投放救援人员"
-                )
-            if self.position.rescue_people >= self.position.need_rescue_people:
-                logger.error(f"地点 {self.position.name} 的投放人员任务已经完成")
-                raise SubTaskSucceedException(f"地点 {self.position.name} 的投放人员任务已经完成")
-        # 吊挂
-        elif self.type == "吊运":
-            if not isinstance(self.position, mpos.Source):
-                logger.error(f"不能从地点 {self.position.name} 吊运设备")
-                raise PositionNotSupportedException(f"不能从地点 {self.position.name} 吊运设备")
-            if self.position.device < self.addition["load_device"]:
-                logger.error(f'地点 {self.position.name} 没有 {self.addition["load_device"]} 个设备')
-                raise PositionNotSupportedException(
-                    f'地点 {self.position.name} 没有 {self.addition["load_device"]} 个设备'
-                )
-        elif self.type == "卸载":
-            if not isinstance(self.position, mpos.DisasterArea):
-                logger.error(f"地点 {self.position.name} 不需要卸载设备")
-                raise PositionNotSupportedException(f"地点 {self.position.name} 不需要卸载设备")
-            if self.position.device >= self.position.need_device:
-                logger.error(f"地点 {self.position.name} 的卸载设备任务已经完成")
-                raise SubTaskSucceedException(f"地点 {self.position.name} 的卸载设备任务已经完成")
-        # 转移灾民
-        elif self.type == "转移" or self.type == "绞车转移":
-            if not isinstance(self.position, mpos.DisasterArea):
-                logger.error(f"不能从地点 {self.position.name} 转移灾民")
-                raise PositionNotSupportedException(f"不能从地点 {self.position.name} 转移灾民")
-            if self.position.trapped_people < self.addition["load_refugee"]:
-                logger.error(f'地点 {self.position.name} 没有 {self.addition["load_refugee"]} 个灾民')
-                raise PositionNotSupportedException(
-                    f'地点 {self.position.name} 没有 {self.addition["load_refugee"]} 个灾民'
-                )
-        elif self.type == "安置":
-            if not isinstance(self.position, mpos.Destination):
-                logger.error(f"地点 {self.position.name} 不需要安置灾民")
-                raise PositionNotSupportedException(f"地点 {self.position.name} 不能接受灾民")
-        # 转运伤患
-        elif self.type == "转运" or self.type == "绞车转运":
-            if not isinstance(self.position, mpos.DisasterArea):
-                logger.error(f"不能从地点 {self.position.name} 转运患者")
-                raise PositionNotSupportedException(f"不能从地点 {self.position.name} 转运患者")
-            if self.position.patient < self.addition["load_patient"]:
-                logger.error(f'地点 {self.position.name} 没有 {self.addition["load_patient"]} 个伤患')
-                raise PositionNotSupportedException(
-                    f'地点 {self.position.name} 没有 {self.addition["load_patient"]} 个伤患'
-                )
-        elif self.type == "交接":
-            if not isinstance(self.position, mpos.Hospital):
-                logger.error(f"地点 {self.position.name} 不需要交接伤患")
-                raise PositionNotSupportedException(f"地点 {self.position.name} 不能接受伤患")
-        elif self.type == "加油保障":
-            if not isinstance(self.position, mpos.Airport):
-                logger.error(f"地点 {self.position.name} 不能进行加油保障")
-                raise PositionNotSupportedException(
-                    f"所选择的地点 {self.position.name} 不能进行加油保障"
-                )
+        message = self.kind.work_area_message(self.aircraft, self.position)
+        if message is not None:
+            logger.error(message)
+            raise PositionNotSupportedException(message)
+        kind = self.kind
+        if not isinstance(self.position, kind.positions) or (
+            kind.position_check is not None and not kind.position_check(self.position)
+        ):
+            self._fail(PositionNotSupportedException, "position")
+        if kind.amount is not None and kind.resource is not None and not kind.unload:
+            if getattr(self.position, kind.resource) < self.addition[kind.amount]:  # type: ignore
+                self._fail(PositionNotSupportedException, "stock")
+        if kind.need is not None:
+            if getattr(self.position, kind.resource) >= getattr(self.position, kind.need):  # type: ignore
+                self._fail(SubTaskSucceedException, "done")
 
         # 特殊要求
         if self.position.special_condition is not None:
@@ -598,100 +806,35 @@ class SubTask:
 
         return True
 
-    def on_finish(self) -> None:
-        if self.type == "加油保障":
-            self.aircraft.current_fuel = self.aircraft.max_fuel
-        elif self.type == "装载":
-            self.aircraft.now_supply = self.addition["load_supply"]
-            self.position.supply -= self.addition["load_supply"]
-        elif self.type == "卸货":
-            self.position.supply += self.aircraft.now_supply
-            self.aircraft.now_supply = 0
-        elif self.type == "运送":
-            self.aircraft.now_resuce_people += self.addition["load_people"]
-            self.position.rescue_people -= self.addition["load_people"]
-        elif self.type == "投放" or self.type == "绞车投放":
-            self.position.rescue_people += self.aircraft.now_resuce_people
-            self.aircraft.now_resuce_people = 0
-        elif self.type == "吊运":
-            self.aircraft.now_device = self.addition["load_device"]
-            self.position.device -= self.addition["load_device"]
-        elif self.type == "卸载":
-            self.position.device += self.aircraft.now_device
-            self.aircraft.now_device = 0
-        elif self.type == "转移" or self.type == "绞车转移":
-            self.aircraft.now_trapped_people += self.addition["load_refugee"]
-            self.position.trapped_people -= self.addition["load_refugee"]
-        elif self.type == "安置":
-            self.position.trapped_people += self.aircraft.now_trapped_people
-            self.aircraft.now_trapped_people = 0
-        elif self.type == "转运" or self.type == "绞车转运":
-            self.aircraft.now_ill_people += self.addition["load_patient"]
-            self.position.patient -= self.addition["load_patient"]
-        elif self.type == "交接":
-            self.position.patient += self.aircraft.now_ill_people
-            self.aircraft.now_ill_people = 0
-        elif self.type == "取水":
-            self.aircraft.now_water += self.addition["load_water"]
-            self.position.water -= self.addition["load_water"]
-        elif self.type == "灭火":
-            self.position.water += self.aircraft.now_water
-            self.aircraft.now_water = 0
-        elif self.type == "侦查搜寻":
-            tmp: mpos.DisasterArea = self.position  # type: ignore
-            tmp.already_search = tmp.search[1]
-        else:
-            logger.error(f"不支持的子任务类型 {self.type}")
-            raise UnsupportedSubtaskException(f"不支持的子任务类型 {self.type}")
-
-
-def _attach_fset_侦查(self: mpos.DisasterArea, value: float, task: "Task") -> None:
-    self._attach_already_search = value  # type: ignore
-
-    if self._attach_already_search >= self.search[1]:  # type: ignore
-        task.is_finished = True
-
-
-def _attach_fset_灭火(self: mpos.DisasterArea, value: int, task: "Task") -> None:
-    self._attach_water = value  # type: ignore
+    def _fail(self, exception: type[Exception], key: str) -> None:
+        message = self.kind.message(key, self)
+        logger.error(message)
+        raise exception(message)
 
-    if self._attach_water >= self.need_water:  # type: ignore
-        task.is_finished = True
-
-
-def _attach_fset_卸货(self: mpos.DisasterArea, value: int, task: "Task") -> None:
-    self._attach_supply = value  # type: ignore
-
-    if self._attach_supply >= self.need_supply:  # type: ignore
-        task.is_finished = True
-
-
-def _attach_fset_吊挂(self: mpos.DisasterArea, value: int, task: "Task") -> None:
-    self._attach_rescue_people = value  # type: ignore
-
-    if self._attach_rescue_people >= self.need_rescue_people:  # type: ignore
-        task.is_finished = True
-
-
-def _attach_fset_载人(self: mpos.DisasterArea, value: int, task: "Task") -> None:
-    self._attach_device = value  # type: ignore
-
-    if self._attach_device >= self.need_device:  # type: ignore
-        task.is_finished = True
-
-
-def _attach_fset_灾民(self: mpos.DisasterArea, value: int, task: "Task") -> None:
-    self._attach_trapped_people = value  # type: ignore
-
-    if self._attach_trapped_people <= 0:  # type: ignore
-        task.is_finished = True
-
-
-def _attach_fset_伤患(self: mpos.DisasterArea, value: int, task: "Task") -> None:
-    self._attach_patient = value  # type: ignore
-
-    if self._attach_patient <= 0:  # type: ignore
-        task.is_finished = True
+    def on_finish(self) -> None:
+        kind = self.kind
+        if kind.load is not None and kind.resource is not None:
+            if kind.unload:
+                setattr(
+                    self.position,
+                    kind.resource,
+                    getattr(self.position, kind.resource) + getattr(self.aircraft, kind.load),
+                )
+                setattr(self.aircraft, kind.load, 0)
+            else:
+                amount = self.addition[kind.amount]  # type: ignore
+                if not kind.assign:
+                    amount += getattr(self.aircraft, kind.load)
+                setattr(self.aircraft, kind.load, amount)
+                setattr(
+                    self.position,
+                    kind.resource,
+                    getattr(self.position, kind.resource) - self.addition[kind.amount],  # type: ignore
+                )
+        if kind.effect is not None:
+            kind.effect(self)
+        for name in kind.position_resources:
+            self.scene.notify_resource(self.position, name)
 
 
 class Task:
@@ -703,110 +846,45 @@ class Task:
         /,
         on_finished: Optional[Callable[['Scene', "Task"], None]] = None,
     ) -> None:
+        """地点上的任务，创建时加入场景，地点资源变化时由场景检查是否完成
+
+        Args:
+            scene (Scene): 推演场景
+            t_type (TaskType): 任务类型
+            position (mpos.DisasterArea): 任务地点
+            on_finished (Optional[Callable[[Scene, Task], None]], optional): 任务完成时调用. Defaults to None.
+
+        Raises:
+            PositionNotExistException: 地点不在地图上
+            NotSupportedTaskException: 该类型不能作为任务
+        """
         self.scene: 'Scene' = scene
         self.position: mpos.DisasterArea = position
-        self.type: TaskType = t_type
+        self.kind: SubTaskKind = subtask_kind(t_type)
+        self.type: TaskType = self.kind.type  # type: ignore
         self.is_finished: bool = False
 
-        if self.position not in self.scene.map.position:
+        if self.position not in self.scene.map:
             raise PositionNotExistException(f"地点 {self.position.name} 不存在")
+        if self.kind.completed is None:
+            logger.error(f"类型 {self.type} 不能作为任务")
+            raise NotSupportedTaskException(f"类型 {self.type} 不能作为任务")
 
         self.on_finished: Callable[['Scene', "Task"], None] = (
             on_finished if on_finished is not None else lambda scene, task: None
         )
 
-        self.attach()
+        self.scene._add_task(self)
 
-    def attach(self) -> None:
-        mtask = self
-        # 侦查
-        if self.type == "侦查搜寻":
-            setattr(
-                self.position, "_attach_already_search", self.position.already_search
-            )
-            del self.position.already_search
-            setattr(
-                self.position,
-                "already_search",
-                property(
-                    lambda self: self._attach_already_search,
-                    lambda self, value: _attach_fset_侦查(self, value, mtask),
-                ),
-            )
-        # 消防
-        elif self.type == "灭火":
-            setattr(self.position, "_attach_water", self.position.water)
-            del self.position.need_water
-            setattr(
-                self.position,
-                "water",
-                property(
-                    lambda self: self._attach_water,
-                    lambda self, value: _attach_fset_灭火(self, value, mtask),
-                ),
-            )
-        # 货运
-        elif self.type == "卸货":
-            setattr(self.position, "_attach_supply", self.position.supply)
-            del self.position.supply
-            setattr(
-                self.position,
-                "supply",
-                property(
-                    lambda self: self._attach_supply,
-                    lambda self, value: _attach_fset_卸货(self, value, mtask),
-                ),
-            )
-        # 载人
-        elif self.type == "投放" or self.type == "绞车投放":
-            setattr(self.position, "_attach_rescue_people", self.position.rescue_people)
-            del self.position.rescue_people
-            setattr(
-                self.position,
-                "rescue_people",
-                property(
-                    lambda self: self._attach_rescue_people,
-                    lambda self, value: _attach_fset_载人(self, value, mtask),
-                ),
-            )
-        # 吊挂
-        elif self.type == "卸载":
-            setattr(self.position, "_attach_device", self.position.device)
-            del self.position.device
-            setattr(
-                self.position,
-                "device",
-                property(
-                    lambda self: self._attach_device,
-                    lambda self, value: _attach_fset_吊挂(self, value, mtask),
-                ),
-            )
-        # 转移灾民
-        elif self.type == "转移" or self.type == "绞车转移":
-            setattr(
-                self.position, "_attach_trapped_people", self.position.trapped_people
-            )
-            del self.position.trapped_people
-            setattr(
-                self.position,
-                "trapped_people",
-                property(
-                    lambda self: self._attach_trapped_people,
-                    lambda self, value: _attach_fset_灾民(self, value, mtask),
-                ),
-            )
-        # 转运伤患
-        elif self.type == "转运" or self.type == "绞车转运":
-            setattr(self.position, "_attach_patient", self.position.patient)
-            del self.position.patient
-            setattr(
-                self.position,
-                "patient",
-                property(
-                    lambda self: self._attach_patient,
-                    lambda self, value: _attach_fset_伤患(self, value, mtask),
-                ),
-            )
-        elif self.type in ["取水", "加油保障", "装载", "运送", "吊运", "安置", "交接"]:
-            logger.error(f"类型 {self.type} 不能作为任务")
-            raise NotSupportedTaskException(f"类型 {self.type} 不能作为任务")
+    def check(self) -> bool:
+        """检查任务是否刚刚完成，完成时调用 on_finished
+
+        Returns:
+            bool: 本次检查时完成
+        """
+        if self.is_finished or not self.kind.completed(self.position):  # type: ignore
+            return False
+        self.is_finished = True
+        logger.info(f"[{self.scene.now_time}] 地点 {self.position.name} 的 {self.type} 任务完成")
+        self.on_finished(self.scene, self)
+        return True
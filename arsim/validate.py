@@ -0,0 +1,191 @@
+"""方案的整体检查
+
+逐个创建 SubTask 时按航空器与地点的当前状态检查，遇到第一个问题即抛出异常，
+并且无法添加依赖前序子任务载荷的子任务（例如先装载、再卸货）。
+validate_plan 一次检查方案中的所有子任务并返回全部问题：静态规则与
+SubTask.check_aircraft_valid、check_position_valid 相同，航空器载荷与地点资源则从场景当前状态出发，
+先结算场景中已排队的子任务，再按方案顺序逐个结算。
+
+航空器载荷只由自己的子任务改变，演算结果与推演一致；地点资源按方案顺序结算，
+实际推演中不同航空器在同一地点的先后由到达时间决定，可能与方案顺序不同。
+"""
+
+from typing import Literal, NamedTuple, Optional, Sequence, TYPE_CHECKING
+import copy
+
+from .aircraft import Aircraft
+from .map import Position
+from .task import (
+    SUBTASK_KINDS,
+    PlanItem,
+    SubTaskKind,
+    SubTaskParams,
+    MissingSubtaskInformationException,
+    PositionNotExistException,
+    PositionNotSupportedException,
+    SpecialConditionNotSatisfiedException,
+    SubTaskSucceedException,
+    UnsupportedSubtaskException,
+)
+from .utils.logger import logger
+
+if TYPE_CHECKING:
+    from .scene import Scene
+
+
+PlanRule = (
+    Literal["aircraft_not_exist"]
+    | Literal["position_not_exist"]
+    | Literal["unsupported_type"]
+    | Literal["ability"]
+    | Literal["missing_information"]
+    | Literal["capacity"]
+    | Literal["empty"]
+    | Literal["work_area"]
+    | Literal["position"]
+    | Literal["stock"]
+    | Literal["done"]
+    | Literal["special_condition"]
+)
+
+
+class PlanViolation(NamedTuple):
+    # 子任务在方案中的下标
+    index: int
+    aircraft: Aircraft
+    type: str
+    position: Position
+    # 违反的规则
+    rule: PlanRule
+    # 逐个创建 SubTask 时对应的异常类型
+    exception: type[Exception]
+    message: str
+
+
+class PlanValidationException(Exception):
+    def __init__(self, violations: list[PlanViolation]) -> None:
+        super().__init__(f"方案中有 {len(violations)} 个问题，第一个：{violations[0].message}")
+        self.violations: list[PlanViolation] = violations
+
+
+class _Probe(NamedTuple):
+    # 生成提示信息时代替子任务
+    aircraft: Aircraft
+    position: Position
+    addition: SubTaskParams
+
+
+class _Ledger:
+    # 演算中的航空器载荷与地点资源，只在第一次改变时复制
+    def __init__(self) -> None:
+        self.aircrafts: dict[Aircraft, Aircraft] = {}
+        self.resources: dict[tuple[Position, str], int] = {}
+
+    def aircraft(self, ac: Aircraft) -> Aircraft:
+        state = self.aircrafts.get(ac)
+        if state is None:
+            state = self.aircrafts[ac] = copy.copy(ac)
+        return state
+
+    def resource(self, position: Position, name: str) -> int:
+        value = self.resources.get((position, name))
+        return getattr(position, name) if value is None else value
+
+    def apply(self, kind: SubTaskKind, ac: Aircraft, position: Position, amount: Optional[int]) -> None:
+        # 与 SubTask.on_finish 相同的载荷结算，effect 只改变燃油或搜索进度，不影响检查
+        if kind.load is None or kind.resource is None:
+            return
+        state = self.aircraft(ac)
+        key = (position, kind.resource)
+        if kind.unload:
+            self.resources[key] = self.resource(position, kind.resource) + getattr(state, kind.load)
+            setattr(state, kind.load, 0)
+        elif amount is not None:
+            setattr(state, kind.load, amount if kind.assign else getattr(state, kind.load) + amount)
+            self.resources[key] = self.resource(position, kind.resource) - amount
+
+
+def validate_plan(scene: "Scene", plan: Sequence[PlanItem]) -> list[PlanViolation]:
+    """检查方案中的所有子任务
+
+    Args:
+        scene (Scene): 推演场景，检查从其当前状态与已排队的子任务之后开始
+        plan (Sequence[PlanItem]): 按添加顺序排列的子任务
+
+    Returns:
+        list[PlanViolation]: 全部问题，按子任务在方案中的顺序排列，没有问题时为空
+    """
+    ledger = _Ledger()
+    for ac in scene.aircrafts:
+        current = scene.aircraft_to_subtask[ac]
+        if current is not None and not current.is_finished:
+            ledger.apply(current.kind, ac, current.position, current.addition.get(current.kind.amount))  # type: ignore
+        for st in scene.aircraft_subtask_queue[ac]:
+            ledger.apply(st.kind, ac, st.position, st.addition.get(st.kind.amount))  # type: ignore
+
+    violations: list[PlanViolation] = []
+    for index, (ac, t_type, position, addition) in enumerate(plan):
+
+        def report(rule: PlanRule, exception: type[Exception], message: str) -> None:
+            violations.append(
+                PlanViolation(index, ac, t_type, position, rule, exception, message)
+            )
+
+        if ac not in scene.aircraft_subtask_queue:
+            report("aircraft_not_exist", ValueError, f"航空器 {ac.name} 不在场景中")
+            continue
+        if position not in scene.map:
+            report("position_not_exist", PositionNotExistException, f"地点 {position.name} 不存在")
+            continue
+        kind = SUBTASK_KINDS.get(t_type)
+        if kind is None:
+            report("unsupported_type", UnsupportedSubtaskException, f"不支持的子任务类型 {t_type}")
+            continue
+        probe = _Probe(ac, position, addition)
+        state = ledger.aircraft(ac)
+
+        # 航空器
+        if ac.ability.map & kind.ability_mask != kind.ability_mask:
+            report("ability", UnsupportedSubtaskException, f"航空器 {ac.name} 不能执行 {t_type} 任务")
+        amount: Optional[int] = None
+        if kind.amount is not None:
+            if kind.amount not in addition:
+                report(
+                    "missing_information",
+                    MissingSubtaskInformationException,
+                    f"航空器 {ac.name} 执行 {t_type} 任务时缺少 {kind.amount} 信息",
+                )
+            else:
+                amount = addition[kind.amount]  # type: ignore
+                if kind.capacity is not None and not kind.capacity(state, amount):  # type: ignore
+                    report("capacity", UnsupportedSubtaskException, kind.message("capacity", probe))  # type: ignore
+        if kind.unload and getattr(state, kind.load) <= 0:  # type: ignore
+            report("empty", UnsupportedSubtaskException, kind.message("empty", probe))  # type: ignore
+
+        # 地点
+        message = kind.work_area_message(ac, position)
+        if message is not None:
+            report("work_area", PositionNotSupportedException, message)
+        if not isinstance(position, kind.positions) or (
+            kind.position_check is not None and not kind.position_check(position)
+        ):
+            # 地点类型不符时没有对应的资源，不再检查与结算
+            report("position", PositionNotSupportedException, kind.message("position", probe))  # type: ignore
+        else:
+            if amount is not None and kind.resource is not None and not kind.unload:
+                if ledger.resource(position, kind.resource) < amount:
+                    report("stock", PositionNotSupportedException, kind.message("stock", probe))  # type: ignore
+            if kind.need is not None:
+                if ledger.resource(position, kind.resource) >= getattr(position, kind.need):  # type: ignore
+                    report("done", SubTaskSucceedException, kind.message("done", probe))  # type: ignore
+            ledger.apply(kind, ac, position, amount)
+        if position.special_condition is not None and not position.special_condition(position, ac):
+            report(
+                "special_condition",
+                SpecialConditionNotSatisfiedException,
+                f"地点 {position.name} 的特殊需求未满足",
+            )
+
+    if len(violations) > 0:
+        logger.warning(f"方案的 {len(plan)} 个子任务中有 {len(violations)} 个问题")
+    return violations
@@ -0,0 +1,89 @@
+"""距离计算方式的耗时与误差对比
+
+python ./benchmarks/bench_distance.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from arsim.map import Map, Position  # noqa: E402
+
+METHODS = ("Vincenty", "Haversine", "Flat", "Auto")
+
+
+def make_position(name: str, longitude: float, latitude: float) -> Position:
+    return Position(name, longitude, latitude, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def bench(title: str, pairs: list[tuple[Position, Position]], tolerance: float) -> None:
+    print(f"{title}（{len(pairs)} 组点对，Auto 误差上限 {tolerance} km）")
+    reference = [Position._distance_vincenty(p1, p2) / 1000 for p1, p2 in pairs]
+    base = 0.0
+    for method in METHODS:
+        begin = time.perf_counter()
+        result = [Position.distance(p1, p2, method, tolerance) for p1, p2 in pairs]  # type: ignore
+        cost = time.perf_counter() - begin
+        if method == "Vincenty":
+            base = cost
+        error = max(abs(r - d) for r, d in zip(result, reference))
+        print(
+            f"  {method:<10} {cost / len(pairs) * 1e6:8.2f} us/次"
+            f"  加速 {base / cost:5.2f}x  最大误差 {error * 1000:10.3f} m"
+        )
+
+
+if __name__ == "__main__":
+    # 关闭缓存，只比较公式本身
+    Position.set_distance_cache_size(0)
+
+    # tests/test_map.py 中的坐标
+    test_positions = [
+        make_position("1", 75, 75),
+        make_position("2", 12.2, 12.2),
+        make_position("3", 10, 10),
+        make_position("4", 120, 10),
+    ]
+    test_pairs = [
+        (p1, p2)
+        for i, p1 in enumerate(test_positions)
+        for p2 in test_positions[i + 1 :]
+    ] * 2000
+    for tolerance in (0.01, Position._distance_tolerance):
+        bench("测试坐标", test_pairs, tolerance)
+
+    # 灾区附近的短距离航段（50 km 以内）
+    random.seed(0)
+    short_pairs = []
+    for i in range(10000):
+        lng, lat = random.uniform(100, 110), random.uniform(25, 35)
+        short_pairs.append(
+            (
+                make_position(f"a{i}", lng, lat),
+                make_position(f"b{i}", lng + random.uniform(-0.3, 0.3), lat + random.uniform(-0.3, 0.3)),
+            )
+        )
+    for tolerance in (0.01, 0.1, 1.0):
+        bench("短距离航段", short_pairs, tolerance)
+
+    # 向量化计算整张地图的距离矩阵
+    for title, low in (("赤道附近", 0), ("北纬 30 度附近", 30)):
+        sites = [
+            make_position(str(i), random.uniform(100, 102), random.uniform(low, low + 2))
+            for i in range(1500)
+        ]
+        print(f"距离矩阵（{len(sites)} 个地点，{title} 200 km 范围内）")
+        reference_matrix = Map(*sites).distance_matrix("Vincenty")
+        for tolerance in (0.01, 0.1, 1.0):
+            for method in METHODS:
+                mp = Map(*sites)
+                begin = time.perf_counter()
+                matrix = mp.distance_matrix(method, tolerance)  # type: ignore
+                cost = time.perf_counter() - begin
+                error = abs(matrix - reference_matrix).max()
+                print(
+                    f"  {method:<10} 误差上限 {tolerance:5} km  {cost * 1000:8.1f} ms"
+                    f"  最大误差 {error * 1000:10.3f} m"
+                )
@@ -0,0 +1,71 @@
+"""同一地图与机队上多个方案：逐个 Scene.run 与 LockstepEngine 的耗时
+
+python ./benchmarks/bench_lockstep.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import loguru  # noqa: E402
+
+from arsim.map import Map  # noqa: E402
+from arsim.scene import Scene  # noqa: E402
+from arsim.lockstep import LockstepEngine  # noqa: E402
+from arsim.examples import positions as epos  # noqa: E402
+from arsim.examples import aircrafts as eac  # noqa: E402
+
+
+def create(fleet: int):
+    airport = epos.Airport("机场", 100, 30, 1e9, 1e9)
+    sources = [
+        epos.Source(f"物资点{i}", 100 + i * 0.1, 30.2, 1e9, 1e9, 1e9, 10**9, 10**9, 0, 0)
+        for i in range(10)
+    ]
+    aircrafts = [eac.AC313() if i % 2 == 0 else eac.Mi26() for i in range(fleet)]
+    for ac in aircrafts:
+        ac.now_position = airport
+    return Scene(aircrafts, Map(airport, *sources), []), sources
+
+
+def bench(variants: int, fleet: int, length: int) -> None:
+    rng = random.Random(0)
+    # 每个方案为各航空器随机安排接人地点
+    specs = [
+        [
+            (a, rng.randrange(10))
+            for _ in range(length)
+            for a in range(fleet)
+        ]
+        for _ in range(variants)
+    ]
+
+    begin = time.perf_counter()
+    for spec in specs:
+        scene, sources = create(fleet)
+        for a, s in spec:
+            scene.add_subtask("运送", scene.aircrafts[a], sources[s], load_people=1)
+        scene.run()
+    old = time.perf_counter() - begin
+
+    scene, sources = create(fleet)
+    plans = [
+        [(scene.aircrafts[a], "运送", sources[s], {"load_people": 1}) for a, s in spec]
+        for spec in specs
+    ]
+    begin = time.perf_counter()
+    LockstepEngine(scene, plans).run()  # type: ignore
+    new = time.perf_counter() - begin
+    print(
+        f"  方案 {variants:5d} 航空器 {fleet:3d} 子任务 {length:3d}:"
+        f"  Scene.run {old * 1000:9.1f} ms  LockstepEngine {new * 1000:9.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    loguru.logger.remove()
+
+    for variants, fleet, length in ((100, 10, 5), (1000, 10, 5), (3000, 4, 3)):
+        bench(variants, fleet, length)
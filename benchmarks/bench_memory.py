@@ -0,0 +1,87 @@
+"""大规模机队与方案的内存占用
+
+python ./benchmarks/bench_memory.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import loguru  # noqa: E402
+
+from arsim.map import Map  # noqa: E402
+from arsim.scene import Scene, _slots  # noqa: E402
+from arsim.task import SubTask  # noqa: E402
+from arsim.examples import positions as epos  # noqa: E402
+from arsim.examples import aircrafts as eac  # noqa: E402
+
+
+class _DictLayout:
+    # 与原先相同的实例字典布局，用于对比
+    pass
+
+
+def _as_dict_layout(obj: object) -> _DictLayout:
+    tmp = _DictLayout()
+    for name in _slots(type(obj)):
+        if hasattr(obj, name):
+            setattr(tmp, name, getattr(obj, name))
+    return tmp
+
+
+def _measure(build):
+    tracemalloc.start()
+    begin = time.perf_counter()
+    objs = build()
+    cost = time.perf_counter() - begin
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objs, size, cost
+
+
+def bench(fleet: int, plan: int) -> None:
+    airport = epos.Airport("机场", 100, 30, 1e9, 1e9)
+    sources = [
+        epos.Source(f"物资点{i}", 100 + i * 0.1, 30.2, 1e9, 1e9, 1e9, 10**9, 0, 0, 0)
+        for i in range(10)
+    ]
+    mp = Map(airport, *sources)
+
+    aircrafts, ac_size, _ = _measure(lambda: [eac.AC313() for _ in range(fleet)])
+    for ac in aircrafts:
+        ac.now_position = airport
+    scene = Scene(aircrafts, mp, [])
+
+    def build_plan() -> list[SubTask]:
+        for i in range(plan):
+            scene.add_subtask(
+                "装载", aircrafts[i % fleet], sources[i % len(sources)], load_supply=100
+            )
+        return [st for queue in scene.aircraft_subtask_queue.values() for st in queue]
+
+    subtasks, st_size, st_cost = _measure(build_plan)
+
+    # 附加信息字典与航空器功能对象在两种布局下相同，对比时共享
+    _, ac_dict_size, _ = _measure(lambda: [_as_dict_layout(ac) for ac in aircrafts])
+    _, st_dict_size, _ = _measure(lambda: [_as_dict_layout(st) for st in subtasks])
+    addition = sum(sys.getsizeof(st.addition) for st in subtasks)
+
+    print(f"  航空器 {fleet:6d}: __slots__ {ac_size / fleet:7.1f} B/个  实例字典 {ac_dict_size / fleet:7.1f} B/个")
+    print(
+        f"  子任务 {plan:6d}: __slots__ {st_size / plan:7.1f} B/个"
+        f"  实例字典 {(st_dict_size + addition) / plan:7.1f} B/个"
+        f"  共 {st_size / 2**20:7.1f} MiB  创建耗时 {st_cost:5.2f} s"
+    )
+
+    begin = time.perf_counter()
+    scene.fork()
+    print(f"  复制场景（含全部子任务） {(time.perf_counter() - begin) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    loguru.logger.remove()
+
+    for fleet, plan in ((1_000, 100_000), (5_000, 300_000)):
+        bench(fleet, plan)
@@ -0,0 +1,85 @@
+"""长子任务队列下的推演耗时
+
+python ./benchmarks/bench_queue.py
+"""
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import loguru  # noqa: E402
+
+from arsim.map import Map  # noqa: E402
+from arsim.scene import Scene  # noqa: E402
+from arsim.task import SubTask  # noqa: E402
+from arsim.examples import positions as epos  # noqa: E402
+from arsim.examples import aircrafts as eac  # noqa: E402
+
+
+def bench_structure(fleet: int, length: int) -> None:
+    # 原先的实现：列表 pop(0) 出队，每次循环遍历所有队列判断是否为空
+    queues = [list(range(length)) for _ in range(fleet)]
+    ac = 0
+    begin = time.perf_counter()
+    while not all(len(q) == 0 for q in queues):
+        if len(queues[ac]) > 0:
+            queues[ac].pop(0)
+        ac = (ac + 1) % fleet
+    old = time.perf_counter() - begin
+
+    # 现在的实现：deque 出队，维护等待执行的子任务总数
+    dqueues = [deque(range(length)) for _ in range(fleet)]
+    pending = fleet * length
+    ac = 0
+    begin = time.perf_counter()
+    while pending != 0:
+        if len(dqueues[ac]) > 0:
+            dqueues[ac].popleft()
+            pending -= 1
+        ac = (ac + 1) % fleet
+    new = time.perf_counter() - begin
+    print(
+        f"  队列 {fleet} x {length}: 列表 + 遍历 {old * 1000:9.1f} ms"
+        f"  deque + 计数 {new * 1000:9.1f} ms"
+    )
+
+
+def bench_scene(fleet: int, length: int) -> None:
+    airport = epos.Airport("机场", 100, 30, 1e9, 1e9)
+    sources = [
+        epos.Source(f"物资点{i}", 100 + i * 0.1, 30.2, 1e9, 1e9, 1e9, 10**9, 0, 0, 0)
+        for i in range(10)
+    ]
+    mp = Map(airport, *sources)
+    aircrafts = [eac.AC313() for _ in range(fleet)]
+    scene = Scene(aircrafts, mp, [])
+    for ac in aircrafts:
+        ac.now_position = airport
+        for i in range(length):
+            scene.add_subtask("装载", ac, sources[i % len(sources)], load_supply=100)
+
+    avoided = SubTask.avoided_duration_computations
+    begin = time.perf_counter()
+    scene.run()
+    cost = time.perf_counter() - begin
+    events = fleet * (length + 1) * 2
+    # 调试模式下（未使用 -O）统计到达时直接使用缓存耗时的次数
+    cached = f"  耗时缓存命中 {SubTask.avoided_duration_computations - avoided}" if __debug__ else ""
+    print(
+        f"  航空器 {fleet:4d} 队列长度 {length:4d}: {cost * 1000:9.1f} ms"
+        f"  {cost / events * 1e6:6.2f} us/事件  推演结束时间 {scene.now_time:.1f}{cached}"
+    )
+
+
+if __name__ == "__main__":
+    loguru.logger.remove()
+
+    print("队列数据结构")
+    for fleet, length in ((100, 1000), (300, 300), (500, 2000)):
+        bench_structure(fleet, length)
+
+    print("Scene.run")
+    for fleet, length in ((50, 200), (200, 200), (500, 100)):
+        bench_scene(fleet, length)
@@ -0,0 +1,50 @@
+"""空间索引在不同数据分布下的建立与查询耗时
+
+python ./benchmarks/bench_spatial.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from arsim.collections.spatial import SphereGrid  # noqa: E402
+
+
+def bench(title: str, longitude: np.ndarray, latitude: np.ndarray, queries: list) -> None:
+    begin = time.perf_counter()
+    grid = SphereGrid(longitude, latitude)
+    cost = time.perf_counter() - begin
+    print(
+        f"{title}（{len(longitude)} 个地点，建立 {cost * 1000:.1f} ms，"
+        f"{len(grid._cell_keys)} 个非空网格）"
+    )
+    for name, lng, lat in queries:
+        repeat = 50
+        begin = time.perf_counter()
+        for _ in range(repeat):
+            grid.nearest(lng, lat, 5)
+        cost = (time.perf_counter() - begin) / repeat
+        print(f"  {name:<16} 最近 5 个地点 {cost * 1000:8.3f} ms/次")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n = 100000
+    queries = [("数据内部", 102.5, 32.5), ("数据边缘", 100, 30), ("远处 (-100,-40)", -100, -40)]
+
+    bench(
+        "全球均匀分布",
+        rng.uniform(-180, 180, n),
+        np.degrees(np.arcsin(rng.uniform(-1, 1, n))),
+        queries,
+    )
+    bench("5 度 x 5 度范围内", rng.uniform(100, 105, n), rng.uniform(30, 35, n), queries)
+    bench(
+        "两个相距很远的小簇",
+        np.r_[rng.uniform(100, 100.5, n // 2), rng.uniform(-60, -59.5, n // 2)],
+        np.r_[rng.uniform(30, 30.5, n // 2), rng.uniform(-20, -19.5, n // 2)],
+        queries,
+    )
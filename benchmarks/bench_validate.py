@@ -0,0 +1,59 @@
+"""大规模方案的整体检查耗时
+
+python ./benchmarks/bench_validate.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import loguru  # noqa: E402
+
+from arsim.map import Map  # noqa: E402
+from arsim.scene import Scene  # noqa: E402
+from arsim.validate import validate_plan  # noqa: E402
+from arsim.examples import positions as epos  # noqa: E402
+from arsim.examples import aircrafts as eac  # noqa: E402
+
+
+def bench(fleet: int, plan_size: int) -> None:
+    airport = epos.Airport("机场", 100, 30, 1e9, 1e9)
+    sources = [
+        epos.Source(f"物资点{i}", 100 + i * 0.1, 30.2, 1e9, 1e9, 1e9, 10**9, 0, 0, 0)
+        for i in range(10)
+    ]
+    areas = [
+        epos.DisasterArea(f"灾区{i}", 100 + i * 0.1, 30.6, 1e9, 1e9, 1e9, 10**9, 0, 0, 0, 0, 0)
+        for i in range(10)
+    ]
+    mp = Map(airport, *sources, *areas)
+    aircrafts = [eac.AC313() for _ in range(fleet)]
+    for ac in aircrafts:
+        ac.now_position = airport
+    scene = Scene(aircrafts, mp, [])
+
+    # 每架航空器交替装载与卸货，每 100 个子任务放入一个缺少数量的装载
+    plan = []
+    for i in range(plan_size):
+        ac = aircrafts[(i // 2) % fleet]
+        if i % 2 == 0:
+            addition = {} if i % 100 == 0 else {"load_supply": 100}
+            plan.append((ac, "装载", sources[i % 10], addition))
+        else:
+            plan.append((ac, "卸货", areas[i % 10], {}))
+
+    begin = time.perf_counter()
+    violations = validate_plan(scene, plan)  # type: ignore
+    cost = time.perf_counter() - begin
+    print(
+        f"  航空器 {fleet:5d} 子任务 {plan_size:7d}: {cost * 1000:8.1f} ms"
+        f"  {cost / plan_size * 1e6:5.2f} us/子任务  问题 {len(violations)}"
+    )
+
+
+if __name__ == "__main__":
+    loguru.logger.remove()
+
+    for fleet, plan_size in ((100, 10_000), (1_000, 100_000), (5_000, 300_000)):
+        bench(fleet, plan_size)
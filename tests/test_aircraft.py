@@ -1,5 +1,8 @@
+import copy
+import pickle
 import unittest
 from arsim import aircraft
+from arsim.examples import aircrafts as eac
 
 
 class TestAircraft(unittest.TestCase):
@@ -16,3 +19,18 @@ class TestAircraft(unittest.TestCase):
         self.assertTrue(tmp3.can("Manned", "Medical"))
         self.assertFalse(tmp3.can("Hanging"))
         self.assertFalse(tmp3.can("Hanging", "Sea", "Winch"))
+
+    def test_slots(self):
+        ac = eac.AC313()
+        self.assertFalse(hasattr(ac, "__dict__"))
+        self.assertFalse(hasattr(ac.ability, "__dict__"))
+        with self.assertRaises(AttributeError):
+            ac.unknown = 1  # type: ignore
+
+        ac.now_supply = 10
+        tmp = copy.copy(ac)
+        self.assertEqual(tmp.now_supply, 10)
+        self.assertIs(tmp.ability, ac.ability)
+        tmp = pickle.loads(pickle.dumps(ac))
+        self.assertEqual(tmp.name, ac.name)
+        self.assertEqual(tmp.ability.map, ac.ability.map)
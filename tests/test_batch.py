@@ -0,0 +1,142 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from arsim.cli.batch import expand_scenarios, run_batch
+from arsim.map import Position
+from arsim.task import SUBTASK_KINDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+SCENARIO = textwrap.dedent(
+    """
+    class SoSData:
+        def create_map(self):
+            self.pos = [
+                self.api.position.Airport("机场", 100, 30, 1000, 1000),
+                self.api.position.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+            ]
+            return self.api.map(*self.pos)
+
+        def create_aircraft(self):
+            self.aircrafts = [self.api.aircraft.AC313()]
+            self.aircrafts[0].now_position = self.pos[0]
+            return self.aircrafts
+
+        def on_init(self):
+            self.api._scene.add_subtask("装载", self.aircrafts[0], self.pos[1], load_supply=10)
+
+        def on_subtask_finish(self):
+            pass
+    """
+)
+
+
+# 修改全局状态的场景：全局距离计算方式、注册子任务类型，并从场景目录导入同名模块
+GLOBAL_SCENARIO = (
+    textwrap.dedent(
+        """
+        import helper
+        from arsim.map import Position
+        from arsim.task import SUBTASK_KINDS, SubTaskKind, register_subtask_kind
+        from arsim.examples import positions as epos
+
+        Position.set_distance_method("Flat")
+        Position.set_distance_cache_size(0)
+        register_subtask_kind(
+            SubTaskKind("空投", "Air", (epos.DisasterArea,), lambda ac: 1, quantity="once")
+        )
+        """
+    )
+    + SCENARIO
+).replace("load_supply=10", "load_supply=helper.SUPPLY")
+# 不修改全局状态，但同样从场景目录导入 helper
+HELPER_SCENARIO = "import helper\n" + SCENARIO.replace("load_supply=10", "load_supply=helper.SUPPLY")
+
+
+class TestBatch(unittest.TestCase):
+    def test_run_batch(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name in ["a.py", "b.py"]:
+                with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+                    f.write(SCENARIO)
+            with open(os.path.join(root, "broken.py"), "w", encoding="utf-8") as f:
+                f.write("raise RuntimeError('broken')\n")
+
+            files = expand_scenarios([os.path.join(root, "[ab].py"), os.path.join(root, "a.py")])
+            self.assertEqual([os.path.basename(f) for f in files], ["a.py", "b.py"])
+
+            results = run_batch(files + [os.path.join(root, "broken.py")], workers=1)
+            self.assertEqual(len(results), 3)
+            for result in results[:2]:
+                self.assertIsNone(result["error"])
+                self.assertGreater(result["now_time"], 0)
+                self.assertEqual(result["pending_subtasks"], 0)
+            self.assertEqual(results[0]["now_time"], results[1]["now_time"])
+            self.assertIn("RuntimeError", results[2]["error"])
+
+    def test_process_pool(self):
+        with tempfile.TemporaryDirectory() as root:
+            files = []
+            for name in ["a.py", "b.py", "c.py"]:
+                files.append(os.path.join(root, name))
+                with open(files[-1], "w", encoding="utf-8") as f:
+                    f.write(SCENARIO)
+
+            serial = run_batch(files, workers=1)
+            results = run_batch(files, workers=2)
+            for a, b in zip(serial, results):
+                self.assertIsNone(b["error"])
+                self.assertEqual(a["now_time"], b["now_time"])
+                self.assertFalse(b["timeout"])
+
+            # spawn 方式（macOS、Windows 的默认方式）下工作进程会重新导入命令行脚本
+            code = (
+                "import multiprocessing, runpy, sys\n"
+                "multiprocessing.set_start_method('spawn')\n"
+                "sys.argv = ['SoSAirRescue.py'] + sys.argv[1:]\n"
+                "runpy.run_path('SoSAirRescue.py', run_name='__main__')\n"
+            )
+            proc = subprocess.run(
+                [sys.executable, "-c", code, "batch", "-j", "2", *files],
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+                timeout=120,
+            )
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            self.assertIn("共 3 个场景，失败 0 个", proc.stdout)
+
+    def test_isolated_globals(self):
+        with tempfile.TemporaryDirectory() as root:
+            files = []
+            for name, supply in [("a", 10), ("b", 30)]:
+                os.mkdir(os.path.join(root, name))
+                with open(os.path.join(root, name, "helper.py"), "w", encoding="utf-8") as f:
+                    f.write(f"SUPPLY = {supply}\n")
+                files.append(os.path.join(root, name, "scenario.py"))
+                with open(files[-1], "w", encoding="utf-8") as f:
+                    f.write(GLOBAL_SCENARIO if name == "a" else HELPER_SCENARIO)
+
+            method = Position._distance_method
+            cache = Position._distance_cache
+            kinds = dict(SUBTASK_KINDS)
+            path = list(sys.path)
+            alone = run_batch(files[1:], workers=1)
+
+            # 同一进程中先运行修改全局状态的场景，后一个场景的结果不受影响
+            results = run_batch(files, workers=1)
+            for result in results + alone:
+                self.assertIsNone(result["error"])
+            self.assertEqual(results[1]["now_time"], alone[0]["now_time"])
+            self.assertNotEqual(results[0]["now_time"], results[1]["now_time"])
+
+            self.assertEqual(Position._distance_method, method)
+            self.assertIs(Position._distance_cache, cache)
+            self.assertGreater(cache.maxsize, 0)
+            self.assertDictEqual(SUBTASK_KINDS, kinds)
+            self.assertListEqual(sys.path, path)
+            self.assertNotIn("helper", sys.modules)
@@ -0,0 +1,105 @@
+import random
+import unittest
+from arsim import map as m
+from arsim.scene import Scene
+from arsim.lockstep import LockstepEngine, POSITION_RESOURCES, AIRCRAFT_LOADS
+from arsim.examples import positions as epos
+from arsim.examples import aircrafts as eac
+
+
+def create(matrix_threshold=None):
+    pos = [
+        epos.Airport("机场", 100, 30, 1000, 1000),
+        epos.Airport("机场2", 100.3, 30.1, 1000, 1000),
+        epos.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 50000, 200, 30, 400),
+        epos.DisasterArea(
+            "灾区", 100.7, 30.4, 1000, 1000, 1000, 100, 10, 50, 2, 20, 10, search=(True, 30)
+        ),
+    ]
+    aircrafts = [eac.AC313(), eac.Mi26(), eac.AC352()]
+    for i, ac in enumerate(aircrafts):
+        ac.now_position = pos[i % 2]
+        ac.now_supply = 50
+        ac.now_resuce_people = 2
+    return Scene(aircrafts, m.Map(*pos, matrix_threshold=matrix_threshold), []), pos
+
+
+class TestLockstep(unittest.TestCase):
+    def test_agree_with_scene(self):
+        rng = random.Random(0)
+        choices = [
+            ("装载", 2, "load_supply"),
+            ("运送", 2, "load_people"),
+            ("转移", 3, "load_refugee"),
+            ("侦查搜寻", 3, None),
+            ("卸货", 3, None),
+            ("投放", 3, None),
+        ]
+        specs = []
+        while len(specs) < 40:
+            spec = []
+            for _ in range(rng.randint(0, 6)):
+                kind, p, key = rng.choice(choices)
+                addition = {} if key is None else {key: rng.randint(1, 2)}
+                spec.append((rng.randrange(3), kind, p, addition))
+            # 只保留 Scene 中能够添加的方案
+            scene, pos = create()
+            try:
+                for a, kind, p, addition in spec:
+                    scene.add_subtask(kind, scene.aircrafts[a], pos[p], **addition)
+            except Exception:
+                continue
+            scene.run()
+            specs.append((spec, scene, pos))
+
+        template, pos = create()
+        plans = [
+            [(template.aircrafts[a], kind, pos[p], addition) for a, kind, p, addition in spec]
+            for spec, _, _ in specs
+        ]
+        result = LockstepEngine(template, plans).run()  # type: ignore
+        self.assertEqual(len(result), len(specs))
+        for i, (_, scene, pos) in enumerate(specs):
+            self.assertEqual(result.now_time[i], scene.now_time)
+            for name in POSITION_RESOURCES:
+                self.assertListEqual(
+                    result.resource(name)[i].tolist(), [getattr(p, name) for p in pos]
+                )
+            self.assertEqual(result.already_search[i, 3], pos[3].already_search)
+            for name in AIRCRAFT_LOADS:
+                self.assertListEqual(
+                    result.load(name)[i].tolist(),
+                    [getattr(ac, name) for ac in scene.aircrafts],
+                )
+            self.assertListEqual(
+                result.aircraft_position[i].tolist(),
+                [pos.index(ac.now_position) for ac in scene.aircrafts],
+            )
+        self.assertFalse(result.timeout.any())
+        # 方案中包含侦查搜寻
+        self.assertTrue((result.already_search[:, 3] > 0).any())
+
+        # 模板场景不受影响
+        self.assertEqual(template.now_time, 0)
+        self.assertEqual(pos[2].supply, 50000)
+
+        # 地点较多的地图逐对计算航段时间，结果相同且不分配距离矩阵
+        sparse, pos = create(matrix_threshold=2)
+        plans = [
+            [(sparse.aircrafts[a], kind, pos[p], addition) for a, kind, p, addition in spec]
+            for spec, _, _ in specs
+        ]
+        other = LockstepEngine(sparse, plans).run()  # type: ignore
+        self.assertListEqual(other.now_time.tolist(), result.now_time.tolist())
+        self.assertEqual(sparse.map._distance_matrix, {})
+
+    def test_aircraft_without_position(self):
+        scene, pos = create()
+        ac = scene.aircrafts[0]
+        ac.now_position = None
+        # 没有位置的航空器不能映射到地点下标 -1（即最后一个地点）
+        with self.assertRaisesRegex(ValueError, "AC313"):
+            LockstepEngine(scene, [[(ac, "装载", pos[2], {"load_supply": 1})]])
+        ac.now_position = epos.Airport("地图外机场", 101, 31, 1000, 1000)
+        with self.assertRaises(ValueError):
+            LockstepEngine(scene, [[(ac, "装载", pos[2], {"load_supply": 1})]])
@@ -1,4 +1,7 @@
+import gc
+import sys
 import unittest
+from unittest import mock
 from arsim import map as m
 from arsim.examples import positions as epos
 
@@ -32,6 +35,100 @@ class TestPosition(unittest.TestCase):
             m.Position.distance(self.pos[2], self.pos[3]), 11973.417122, delta=0.1
         )
 
+    def test_distance_cache(self) -> None:
+        m.Position.set_distance_cache_size(2)
+        m.Position._distance_cache.clear()
+        try:
+            d = m.Position.distance(self.pos[0], self.pos[1])
+            self.assertEqual(m.Position.distance(self.pos[1], self.pos[0]), d)
+            stats = m.Position.distance_cache_stats()
+            self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+            # 修改资源不影响缓存
+            self.pos[0].supply += 10
+            m.Position.distance(self.pos[0], self.pos[1])
+            self.assertEqual(m.Position.distance_cache_stats()["hits"], 2)
+
+            m.Position.distance(self.pos[0], self.pos[2])
+            m.Position.distance(self.pos[0], self.pos[3])
+            stats = m.Position.distance_cache_stats()
+            self.assertEqual(stats["size"], 2)
+            self.assertEqual(stats["evictions"], 1)
+        finally:
+            m.Position.set_distance_cache_size(4096)
+            m.Position._distance_cache.clear()
+
+    def test_distance_many(self) -> None:
+        origins = [self.pos[0], self.pos[0], self.pos[1], self.pos[2]]
+        destinations = [self.pos[1], self.pos[3], self.pos[2], self.pos[2]]
+        for method in ("Flat", "Vincenty", "Haversine"):
+            result = m.Position.distance_many(origins, destinations, method)  # type: ignore
+            for d, p1, p2 in zip(result, origins, destinations):
+                self.assertAlmostEqual(
+                    d, m.Position.distance(p1, p2, method), delta=0.1  # type: ignore
+                )
+
+        # 接近对跖点时 Vincenty 不收敛，批量计算不抛出异常
+        p1 = m.Position("a", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        p2 = m.Position("b", 179.7, 0.3, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        with self.assertRaises(m.FailConvertException):
+            m.Position._distance_vincenty(p1, p2)
+        result = m.Position.distance_many([p1], [p2], "Vincenty")
+        self.assertAlmostEqual(result[0], 19967.9, delta=50)
+
+    def test_distance_antipodal(self) -> None:
+        # Karney（2013）中的反解算例与恰好对跖的点对（半个子午线），参考值精确到毫米
+        cases = [
+            ((0, -30), (179.8, 29.9), 19989832.82761),
+            ((0, 10), (180, -10), 20003931.45862),
+        ]
+        for (lng1, lat1), (lng2, lat2), expected in cases:
+            p1 = m.Position("a", lng1, lat1, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+            p2 = m.Position("b", lng2, lat2, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+            with self.assertRaises(m.FailConvertException):
+                m.Position._distance_vincenty(p1, p2)
+            result = m.Position.distance_many([p1, p2], [p2, p1], "Vincenty") * 1000
+            self.assertAlmostEqual(result[0], expected, delta=0.001)
+            self.assertAlmostEqual(result[1], expected, delta=0.001)
+            # 单个点对的计算结果相同，不抛出异常
+            self.assertAlmostEqual(
+                m.Position.distance(p1, p2, "Vincenty") * 1000, expected, delta=0.001
+            )
+
+        # 经差恰好为 π 的点对经过极点
+        p1 = m.Position("a", 180, 10, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        p2 = m.Position("b", 0, 20, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        pole = m.Position("c", 0, 90, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        expected = m.Position.distance(p1, pole, "Vincenty") + m.Position.distance(
+            pole, p2, "Vincenty"
+        )
+        self.assertAlmostEqual(m.Position.distance(p1, p2, "Vincenty"), expected, delta=1e-6)
+        self.assertAlmostEqual(
+            m.Position.distance_many([p1], [p2], "Vincenty")[0], expected, delta=1e-6
+        )
+
+    def test_distance_auto(self) -> None:
+        pairs = [
+            (self.pos[0], self.pos[1]),
+            (self.pos[1], self.pos[2]),
+            (m.Position("a", 100, 0.1, 0, 0, 0, 0, 0, 0, 0, 0, 0), m.Position("b", 100.01, 0.1, 0, 0, 0, 0, 0, 0, 0, 0, 0)),
+            (m.Position("a", 100, 30, 0, 0, 0, 0, 0, 0, 0, 0, 0), m.Position("b", 100.2, 30.1, 0, 0, 0, 0, 0, 0, 0, 0, 0)),
+            (m.Position("a", 20, 70, 0, 0, 0, 0, 0, 0, 0, 0, 0), m.Position("b", 23, 71, 0, 0, 0, 0, 0, 0, 0, 0, 0)),
+            (m.Position("a", 179.9, -40, 0, 0, 0, 0, 0, 0, 0, 0, 0), m.Position("b", -179.8, -40.2, 0, 0, 0, 0, 0, 0, 0, 0, 0)),
+        ]
+        # 默认误差上限下，中高纬度的短航段直接使用局部椭球平面公式
+        for p1, p2 in pairs[3:]:
+            local = m._distance_local(p1.longitude, p1.latitude, p2.longitude, p2.latitude)[0]
+            self.assertEqual(m.Position.distance(p1, p2, "Auto", 0.1), local)
+        for tolerance in (0.001, 0.1, 10, 100):
+            result = m.Position.distance_many(
+                [p[0] for p in pairs], [p[1] for p in pairs], "Auto", tolerance
+            )
+            for d, (p1, p2) in zip(result, pairs):
+                exact = m.Position.distance(p1, p2, "Vincenty")
+                self.assertLessEqual(abs(m.Position.distance(p1, p2, "Auto", tolerance) - exact), tolerance)
+                self.assertLessEqual(abs(d - exact), tolerance)
+
 
 class TestMap(unittest.TestCase):
     def setUp(self) -> None:
@@ -52,3 +149,275 @@ class TestMap(unittest.TestCase):
 
         self.assertIsNotNone(tmp2)
         self.assertTupleEqual(tmp2, (self.pos[2], self.pos[3]))
+
+    def test_distance_matrix(self):
+        pos = [
+            m.Position("1", 75, 75, 0, 0, 900, 0, 0, 30, 0, 3, 0),
+            m.Position("2", 12.2, 12.2, 0, 0, 900, 0, 0, 30, 0, 3, 0),
+            m.Position("3", 10, 10, 0, 0, 900, 0, 0, 30, 0, 3, 0),
+            epos.Hospital("3", 120, 10, 0, 0),
+        ]
+        mp = m.Map(*pos)
+        for method in ("Flat", "Vincenty", "Haversine"):
+            matrix = mp.distance_matrix(method)  # type: ignore
+            self.assertEqual(matrix.shape, (4, 4))
+            for i, p1 in enumerate(pos):
+                self.assertEqual(matrix[i, i], 0)
+                for j, p2 in enumerate(pos):
+                    self.assertAlmostEqual(
+                        matrix[i, j],
+                        m.Position.distance(p1, p2, method),  # type: ignore
+                        delta=0.1,
+                    )
+        self.assertAlmostEqual(mp.distance(pos[0], pos[1]), 7933.501372, delta=0.1)
+
+    def test_matrix_threshold(self):
+        pos = [
+            epos.Airport(str(i), 100 + i * 0.1, 30 + i * 0.05, 1000, 1000)
+            for i in range(5)
+        ]
+        # 地点数量超过上限时逐对计算，不分配距离矩阵
+        mp = m.Map(*pos, matrix_threshold=4)
+        self.assertFalse(mp.uses_distance_matrix())
+        m.Position._distance_cache.clear()
+        for p1 in pos:
+            for p2 in pos:
+                self.assertEqual(mp.distance(p1, p2), m.Position.distance(p1, p2))
+        self.assertEqual(mp._distance_matrix, {})
+        self.assertGreater(m.Position.distance_cache_stats()["hits"], 0)
+        # 地图的分支沿用上限
+        self.assertEqual(mp.fork().matrix_threshold, 4)
+
+        # 显式计算过的距离矩阵仍然使用
+        matrix = mp.distance_matrix("Haversine")
+        self.assertTrue(mp.uses_distance_matrix("Haversine"))
+        self.assertFalse(mp.uses_distance_matrix("Vincenty"))
+        self.assertEqual(mp.distance(pos[0], pos[4], "Haversine"), matrix[0, 4])
+
+        small = m.Map(*pos)
+        self.assertTrue(small.uses_distance_matrix())
+        small.distance(pos[0], pos[1])
+        self.assertEqual(len(small._distance_matrix), 1)
+
+    def test_nearest(self):
+        pos = [
+            epos.DisasterArea("灾区", 100, 30, 0, 0, 900, 0, 0, 30, 0, 3, 0),
+            epos.Hospital("医院1", 100.5, 30, 100, 100),
+            epos.Hospital("医院2", 102, 30, 100, 100),
+            epos.Airport("机场", 100.1, 30, 100, 100),
+        ]
+        mp = m.Map(*pos)
+        self.assertListEqual(mp.nearest(pos[0]), [pos[3]])
+        self.assertListEqual(mp.nearest(pos[0], 2, kind=epos.Hospital), [pos[1], pos[2]])
+        self.assertListEqual(mp.within(pos[0], 100, kind=epos.Hospital), [pos[1]])
+        self.assertListEqual(mp.within(pos[0], 1000), [pos[3], pos[1], pos[2]])
+
+    def test_of_type(self):
+        pos = [
+            epos.Airport("机场", 100.1, 30, 100, 100),
+            epos.Hospital("医院1", 100.5, 30, 100, 100),
+            epos.Hospital("医院2", 102, 30, 100, 100),
+        ]
+        mp = m.Map(*pos)
+        self.assertIn(pos[0], mp)
+        self.assertNotIn(self.pos[0], mp)
+        self.assertTupleEqual(mp.of_type(epos.Hospital), (pos[1], pos[2]))
+        self.assertTupleEqual(mp.of_type(epos.Source), ())
+        self.assertTupleEqual(mp.of_type(m.Position), tuple(pos))
+
+    def test_fork(self):
+        fork = self.map.fork()
+        # 地点在第一次访问时才复制
+        self.assertEqual(len(fork), 4)
+        self.assertEqual(len(fork.index), 0)
+        first = fork.position[1]
+        self.assertIsNot(first, self.pos[1])
+        self.assertIn(first, fork)
+        self.assertNotIn(self.pos[1], fork)
+        self.assertEqual(len(fork.index), 1)
+        self.assertTupleEqual(fork["3"], (fork.position[2], fork.position[3]))
+
+        # 原地图修改地点前，分支先复制修改前的状态
+        nested = fork.fork()
+        self.pos[0].patient = 10
+        self.assertEqual(fork.position[0].patient, 3)
+        self.assertEqual(nested.position[0].patient, 3)
+        fork.position[0].patient = 5
+        self.assertEqual(self.pos[0].patient, 10)
+        self.assertEqual(nested.position[0].patient, 3)
+        nested.position[1].supply = 7
+        self.assertEqual(first.supply, 0)
+        self.assertEqual(self.pos[1].supply, 0)
+
+        # 复制全部地点后不再需要通知
+        for i in range(len(fork)):
+            fork.position[i]
+        self.pos[3].water = 1
+        self.assertListEqual(fork.resource("water").tolist(), [0, 0, 0, 0])
+        self.assertEqual(self.map._pending, 0)
+        self.assertNotIn(self.map, m.Position._fork_sources)
+
+        # 只读的批量查询不复制地点
+        other = self.map.fork()
+        self.pos[3].water = 2
+        lng, _ = other.coordinates()
+        self.assertListEqual(lng.tolist(), [p.longitude for p in self.pos])
+        self.assertListEqual(other.resource("water").tolist(), [0, 0, 0, 1])
+        self.assertEqual(len(other.index), 0)
+
+        # 分支被回收后不再拦截地点的写入
+        del fork, nested, other
+        gc.collect()
+        self.assertListEqual(m.Position._fork_sources, [])
+        self.assertNotIn("__setattr__", vars(m.Position))
+
+
+class TestPositionTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pos = [
+            epos.DisasterArea("灾区", 100, 30, 0, 0, 900, 5, 0, 30, 0, 3, 0, search=(True, 2.5)),
+            epos.Hospital("医院", 100.5, 30, 100, 100),
+            epos.Source("水源", 102, 30, 100, 100, 100, 50, 20, 3, 40),
+        ]
+        self.table = m.PositionTable.from_positions(*self.pos)
+        self.map = m.Map.from_table(self.table)
+
+    def test_view(self):
+        view = self.map["灾区"][0]
+        self.assertIsInstance(view, epos.DisasterArea)
+        self.assertIs(view, self.map.position[0])
+        self.assertIn(view, self.map)
+        self.assertNotIn(self.pos[0], self.map)
+        self.assertEqual(view.need_supply, 5)
+        self.assertTupleEqual(view.search, (True, 2.5))
+        self.assertFalse(view.is_search_done)
+
+        view.trapped_people -= 10
+        self.assertEqual(self.table.column("trapped_people")[0], 20)
+        self.assertListEqual(
+            self.map.resource("water", epos.Source).tolist(), [40]
+        )
+
+    def test_copy(self):
+        fork = self.map.fork()
+        # 数值列在第一次写入前共享
+        for name in ("supply", "patient"):
+            self.assertIs(fork.table._columns[name], self.table._columns[name])
+        fork.position[2].supply -= 10
+        self.assertIsNot(fork.table._columns["supply"], self.table._columns["supply"])
+        self.assertIs(fork.table._columns["patient"], self.table._columns["patient"])
+        self.assertEqual(self.map.position[2].supply, 50)
+        self.assertEqual(fork.position[2].supply, 40)
+
+        # 原地点表写入时同样复制，不影响分支
+        self.map.position[0].patient = 0
+        self.assertEqual(fork.position[0].patient, 3)
+        self.map.resource("water")[2] = 0
+        self.assertEqual(fork.position[2].water, 40)
+        lng, _ = fork.coordinates()
+        with self.assertRaises(ValueError):
+            lng[0] = 0
+
+    def test_queries(self):
+        self.assertTupleEqual(self.map.of_type(epos.Hospital), (self.map.position[1],))
+        self.assertListEqual(self.map.nearest(self.map.position[0]), [self.map.position[1]])
+        self.assertAlmostEqual(
+            self.map.distance(self.map.position[0], self.map.position[2]),
+            m.Position.distance(self.pos[0], self.pos[2]),
+            delta=0.1,
+        )
+
+    def test_load(self):
+        import json
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "map.csv")
+            with open(csv_path, "w", encoding="utf-8") as f:
+                f.write("type,name,longitude,latitude,helicopter_area,need_supply,search,search_area\n")
+                f.write("DisasterArea,灾区,100,30,50,5,true,2.5\n")
+                f.write("hospital,医院,100.5,30,100,,,\n")
+                f.write("Airport,机场,101,30,100,,,\n")
+            mp = m.load_map(csv_path, chunk_size=2)
+            self.assertEqual(len(mp), 3)
+            self.assertIsInstance(mp["医院"][0], epos.Hospital)
+            self.assertEqual(mp["灾区"][0].need_supply, 5)  # type: ignore
+            self.assertTupleEqual(mp["灾区"][0].search, (True, 2.5))  # type: ignore
+            self.assertEqual(mp["机场"][0].helicopter_area, 100)
+
+            # 整数列中的小数不会被截断
+            with open(csv_path, "a", encoding="utf-8") as f:
+                f.write("DisasterArea,灾区2,100,30,50,12.7,,\n")
+            with self.assertRaisesRegex(ValueError, "第 4 个地点（灾区2）的 need_supply 列"):
+                m.load_map(csv_path, chunk_size=2)
+
+            geojson_path = os.path.join(tmp, "map.geojson")
+            with open(geojson_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "type": "FeatureCollection",
+                        "features": [
+                            {
+                                "type": "Feature",
+                                "geometry": {"type": "Point", "coordinates": [102, 31]},
+                                "properties": {"type": "Source", "name": "水源", "water": 40},
+                            }
+                        ],
+                    },
+                    f,
+                )
+            mp = m.load_map(geojson_path)
+            source = mp["水源"][0]
+            self.assertIsInstance(source, epos.Source)
+            self.assertTupleEqual((source.longitude, source.latitude), (102, 31))
+            self.assertEqual(source.water, 40)
+
+            # 未安装 ijson 时明确报错，而不是一次性读取整个文件
+            with mock.patch.dict(sys.modules, {"ijson": None}):
+                with self.assertRaisesRegex(ImportError, "ijson"):
+                    m.load_map(geojson_path)
+
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            parquet_path = os.path.join(tmp, "map.parquet")
+            pq.write_table(
+                pa.table(
+                    {
+                        "type": ["Hospital", "DisasterArea", "Airport"],
+                        "name": ["医院", "灾区", "机场"],
+                        "longitude": [100.5, 100.0, 101.0],
+                        "latitude": [30.0, 30.0, 30.0],
+                        "need_supply": [0, 5, 0],
+                        "sea": [False, True, False],
+                    }
+                ),
+                parquet_path,
+            )
+            mp = m.load_map(parquet_path, chunk_size=2)
+            self.assertEqual(len(mp), 3)
+            self.assertIsInstance(mp["灾区"][0], epos.DisasterArea)
+            self.assertEqual(mp["灾区"][0].need_supply, 5)  # type: ignore
+            self.assertEqual(mp["灾区"][0].type, "Sea")
+            self.assertEqual(mp["机场"][0].longitude, 101)
+
+    def test_distance_matrix_cache(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            mp = m.Map(*self.pos, cache_dir=tmp)
+            matrix = mp.distance_matrix("Haversine")
+            path = mp.distance_matrix_path("Haversine")
+            self.assertTrue(os.path.exists(path))  # type: ignore
+
+            # 坐标相同的地图直接打开已有的文件
+            other = m.Map(*self.pos, cache_dir=tmp)
+            mapped = other.distance_matrix("Haversine")
+            self.assertIsInstance(mapped, m.np.memmap)
+            self.assertFalse(mapped.flags.writeable)
+            self.assertTrue((mapped == matrix).all())
+            self.assertNotEqual(path, other.distance_matrix_path("Vincenty"))
+            self.assertNotEqual(path, m.Map(*self.pos[:2], cache_dir=tmp).distance_matrix_path("Haversine"))
+            del mapped, matrix, other, mp
@@ -0,0 +1,373 @@
+import os
+import tempfile
+import unittest
+from arsim import map as m
+from arsim.checkpoint import CheckpointPolicy, CheckpointMismatchException
+from arsim.scene import Scene
+from arsim.task import SubTask, Task, TaskType
+from arsim.examples import positions as epos
+from arsim.examples import aircrafts as eac
+
+
+class TestScene(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pos = [
+            epos.Airport("机场", 100, 30, 1000, 1000),
+            epos.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+        ]
+        self.map = m.Map(*self.pos)
+
+    def test_distance_method(self):
+        flat = Scene([], self.map, [], distance_method="Flat")
+        self.assertEqual(
+            flat.distance(*self.pos), m.Position.distance(*self.pos, method="Flat")
+        )
+        auto = Scene([], self.map, [], distance_method="Auto", distance_tolerance=1)
+        self.assertAlmostEqual(
+            auto.distance(*self.pos),
+            m.Position.distance(*self.pos, method="Vincenty"),
+            delta=1,
+        )
+
+    def test_travel_time(self):
+        aircrafts = [eac.AC313(), eac.AC313(), eac.Mi26()]
+        scene = Scene(aircrafts, self.map, [])
+        for ac in aircrafts:
+            ac.now_position = self.pos[0]
+            st = SubTask(scene, "装载", ac, self.pos[1], load_supply=100)
+            st.setup()
+            self.assertEqual(st.leg_ticks, Scene.to_ticks(st.distance / ac.cruising_speed))
+            self.assertAlmostEqual(
+                st.move_time, st.distance / ac.cruising_speed, delta=1 / Scene.TICKS_PER_SECOND
+            )
+        # 逐个航段按需计算，不建立飞行时间表
+        self.assertEqual(scene._travel_time, {})
+        # 向量化推演使用的表中元素与逐个航段的结果相同，同一巡航速度的航空器共用一张表
+        for ac in aircrafts:
+            table = scene.travel_tick_table(ac.cruising_speed)
+            self.assertEqual(table[0, 1], scene.travel_ticks(ac, *self.pos))
+        self.assertEqual(len(scene._travel_ticks), 2)
+
+        # 地点较多的地图不分配距离矩阵
+        mp = m.Map(*self.pos, matrix_threshold=1)
+        scene = Scene([aircrafts[0]], mp, [])
+        scene.add_subtask("装载", aircrafts[0], self.pos[1], load_supply=100)
+        scene.run()
+        self.assertEqual(mp._distance_matrix, {})
+        self.assertEqual(
+            scene.now_tick,
+            scene.travel_ticks(aircrafts[0], *self.pos)
+            + Scene.to_ticks(aircrafts[0].supply_load_time * 100),
+        )
+
+    def test_run(self):
+        aircrafts = [eac.AC313(), eac.Mi26(), eac.AC313()]
+        scene = Scene(aircrafts, self.map, [])
+        for ac in aircrafts:
+            ac.now_position = self.pos[0]
+            scene.add_subtask("装载", ac, self.pos[1], load_supply=1000)
+            scene.add_subtask("运送", ac, self.pos[1], load_people=2)
+        self.assertEqual(scene.pending_subtask_count, 6)
+        scene.run()
+
+        for ac in aircrafts:
+            self.assertIsNone(scene.aircraft_to_subtask[ac])
+            self.assertIs(ac.now_position, self.pos[1])
+            self.assertEqual(ac.now_supply, 1000)
+            self.assertEqual(ac.now_resuce_people, 2)
+        self.assertEqual(self.pos[1].supply, 2000)
+        self.assertEqual(self.pos[1].rescue_people, 14)
+        self.assertTrue(scene.is_subtask_queue_empty())
+
+        # 最慢的航空器决定结束时间
+        expected = max(
+            scene.travel_time(ac, self.pos[0], self.pos[1])
+            + ac.supply_load_time * 1000
+            + ac.person_on_off_time * 2
+            for ac in aircrafts
+        )
+        self.assertAlmostEqual(scene.now_time, expected, delta=1 / Scene.TICKS_PER_SECOND)
+
+    def test_progress(self):
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        scene = Scene([ac], self.map, [])
+        st = SubTask(scene, "装载", ac, self.pos[1], load_supply=1000)
+        st.setup()
+        self.assertEqual(st.move_process, 0)
+
+        # 进度与剩余时间由整数时间单位精确计算
+        scene.now_tick = st.leg_ticks // 4
+        self.assertEqual(st.move_process, (st.leg_ticks // 4) / st.leg_ticks)
+        self.assertEqual(st.move_time, (st.leg_ticks - st.leg_ticks // 4) / Scene.TICKS_PER_SECOND)
+        self.assertFalse(st.is_arrived)
+
+        scene.now_tick = st.arrive_tick
+        st.arrive(scene.now_tick)
+        self.assertTrue(st.is_arrived)
+        self.assertEqual(st.task_process, 0)
+        duration = st.finish_tick - st.arrive_tick
+        self.assertEqual(duration, Scene.to_ticks(st.consume_time_raw))
+        scene.now_tick += duration // 2
+        self.assertEqual(st.task_process, (duration // 2) / duration)
+        self.assertEqual(st.consume_time, (duration - duration // 2) / Scene.TICKS_PER_SECOND)
+
+    def test_add_subtask_during_run(self):
+        busy, idle = eac.AC313(), eac.AC313()
+        busy.now_position = idle.now_position = self.pos[0]
+        added = []
+
+        def on_subtask_finish(scene: Scene) -> None:
+            if len(added) == 0:
+                added.append(True)
+                scene.add_subtask("装载", idle, self.pos[1], load_supply=10)
+
+        scene = Scene([busy, idle], self.map, [], on_subtask_finish=on_subtask_finish)
+        scene.add_subtask("装载", busy, self.pos[1], load_supply=10)
+        scene.run()
+        self.assertEqual(idle.now_supply, 10)
+        self.assertTrue(scene.is_subtask_queue_empty())
+
+    def test_occupancy(self):
+        aircrafts = [eac.AC313(), eac.AC313()]
+        scene = Scene(aircrafts, self.map, [])
+        for ac in aircrafts:
+            ac.now_position = self.pos[0]
+            scene.add_subtask("装载", ac, self.pos[1], load_supply=10)
+        records = []
+
+        def on_subtask_finish(scene: Scene) -> None:
+            records.append(
+                (scene.occupancy(self.pos[1], "Helicopter"), scene.pad_utilisation(self.pos[1]))
+            )
+
+        scene.on_subtask_finish = on_subtask_finish
+        scene.run()
+
+        # 依次为两次加油与两次装载完成，第一次装载完成时两架航空器都在水源
+        rotor = aircrafts[0].rotor_area
+        self.assertEqual(len(records), 4)
+        self.assertTupleEqual(records[0][0], (0, 0))
+        self.assertEqual(records[1][0][0], rotor)
+        self.assertTupleEqual(records[2][0], (rotor * 2, aircrafts[0].air_area * 2))
+        self.assertAlmostEqual(records[2][1]["Helicopter"], rotor * 2 / 1000)
+        self.assertEqual(records[3][0][0], rotor)
+        self.assertTupleEqual(scene.occupancy(self.pos[1], "Helicopter"), (0, 0))
+
+        probe = SubTask(scene, "装载", eac.AC313(), self.pos[1], load_supply=10)
+        self.assertTrue(scene.check_parallel_subtask(probe.aircraft, probe))
+        self.pos[1].helicopter_area = rotor / 2
+        self.assertFalse(scene.check_parallel_subtask(probe.aircraft, probe))
+
+    def test_fork(self):
+        aircrafts = [eac.AC313(), eac.Mi26()]
+        scene = Scene(aircrafts, self.map, [])
+        for ac in aircrafts:
+            ac.now_position = self.pos[0]
+            scene.add_subtask("装载", ac, self.pos[1], load_supply=100)
+            scene.add_subtask("运送", ac, self.pos[1], load_people=1)
+        forks = []
+
+        def on_subtask_finish(scene: Scene) -> None:
+            if len(forks) == 0 and scene.now_time > 0:
+                forks.append((scene.fork(), scene.now_time, self.pos[1].supply))
+
+        scene.on_subtask_finish = on_subtask_finish
+        scene.run()
+        fork, fork_time, supply = forks[0]
+        fork.on_subtask_finish = None
+        source = fork.map["水源"][0]
+
+        # 分支与原场景互不影响，只与坐标有关的缓存共享
+        self.assertEqual(fork.now_time, fork_time)
+        self.assertEqual(source.supply, supply)
+        self.assertIsNot(source, self.pos[1])
+        self.assertIsNot(fork.aircrafts[0], aircrafts[0])
+        self.assertIs(fork.map._distance_matrix, self.map._distance_matrix)
+
+        # 分支继续推演得到与原场景相同的结果
+        fork.run()
+        self.assertAlmostEqual(fork.now_time, scene.now_time)
+        self.assertEqual(source.supply, self.pos[1].supply)
+        self.assertEqual(source.rescue_people, self.pos[1].rescue_people)
+        for ac, forked in zip(aircrafts, fork.aircrafts):
+            self.assertIs(forked.now_position, source)
+            self.assertEqual(forked.now_supply, ac.now_supply)
+        self.assertTrue(fork.is_subtask_queue_empty())
+
+    def test_checkpoint(self):
+        def create() -> tuple[Scene, list]:
+            pos = [
+                epos.Airport("机场", 100, 30, 1000, 1000),
+                epos.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+            ]
+            aircrafts = [eac.AC313(), eac.Mi26()]
+            scene = Scene(aircrafts, m.Map(*pos), [])
+            for ac in aircrafts:
+                ac.now_position = pos[0]
+                scene.add_subtask("装载", ac, pos[1], load_supply=100)
+                scene.add_subtask("运送", ac, pos[1], load_people=1)
+            return scene, pos
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, "scene.npz")
+            scene, pos = create()
+            # 共 12 个事件，最后一次检查点写在第 10 个事件之后
+            scene.checkpoint = CheckpointPolicy(path, events=5)
+            scene.run()
+
+            restored, restored_pos = create()
+            restored.restore_checkpoint(path)
+            self.assertGreater(restored.now_time, 0)
+            self.assertLess(restored.now_time, scene.now_time)
+            self.assertEqual(restored.pending_subtask_count, 0)
+            # 恢复的子任务与原场景一样，各有一个尚未处理的事件
+            pending = restored.pending_events()
+            self.assertEqual(len(pending), 2)
+            for st, (tick, _, kind) in pending.items():
+                self.assertIs(restored.aircraft_to_subtask[st.aircraft], st)
+                self.assertIs(st.type, TaskType.LOAD_PEOPLE)
+                self.assertEqual(tick, st.arrive_tick if kind == "Move" else st.finish_tick)
+            restored.run()
+
+            self.assertAlmostEqual(restored.now_time, scene.now_time)
+            self.assertEqual(restored_pos[1].supply, pos[1].supply)
+            self.assertEqual(restored_pos[1].rescue_people, pos[1].rescue_people)
+            for ac, other in zip(scene.aircrafts, restored.aircrafts):
+                self.assertIs(other.now_position, restored_pos[1])
+                self.assertEqual(other.now_supply, ac.now_supply)
+                self.assertEqual(other.now_resuce_people, ac.now_resuce_people)
+            self.assertTrue(restored.is_subtask_queue_empty())
+
+            # 队列中尚未开始的子任务同样保存
+            queued, _ = create()
+            queued.save_checkpoint(path)
+            restored, restored_pos = create()
+            restored.restore_checkpoint(path)
+            self.assertEqual(restored.pending_subtask_count, 4)
+            restored.run()
+            self.assertAlmostEqual(restored.now_time, scene.now_time)
+            self.assertEqual(restored_pos[1].supply, pos[1].supply)
+
+            other = Scene([eac.AC313()], m.Map(*restored_pos), [])
+            with self.assertRaises(CheckpointMismatchException):
+                other.restore_checkpoint(path)
+
+    def test_events(self):
+        aircrafts = [eac.AC313(), eac.Mi26()]
+        scene = Scene(aircrafts, self.map, [])
+        for ac in aircrafts:
+            ac.now_position = self.pos[0]
+            scene.add_subtask("装载", ac, self.pos[1], load_supply=100)
+
+        records = list(scene.events())
+        # 每架航空器：加油保障开始、到达、完成，装载开始、到达、完成
+        self.assertEqual(len(records), 12)
+        self.assertListEqual(
+            [r.type for r in records if r.aircraft is aircrafts[0]],
+            ["Start", "Arrive", "Refuel", "Start", "Arrive", "Finish"],
+        )
+        times = [r.time for r in records]
+        self.assertListEqual(times, sorted(times))
+        self.assertEqual(records[-1].time, scene.now_time)
+        self.assertIs(records[-1].position, self.pos[1])
+        self.assertEqual(scene.step(), [])
+
+    def test_run_until(self):
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        scene = Scene([ac], self.map, [])
+        scene.add_subtask("装载", ac, self.pos[1], load_supply=1000)
+        scene.add_subtask("运送", ac, self.pos[1], load_people=2)
+
+        leg = scene.travel_time(ac, self.pos[0], self.pos[1])
+        records = scene.run_until(leg / 2)
+        self.assertListEqual([r.type for r in records], ["Start", "Arrive", "Refuel", "Start"])
+        self.assertEqual(scene.now_tick, Scene.to_ticks(leg / 2))
+        current = scene.aircraft_to_subtask[ac]
+        self.assertEqual(
+            current.move_process, (scene.now_tick - current.start_tick) / current.leg_ticks
+        )
+        self.assertAlmostEqual(current.move_process, 0.5, delta=0.01)
+
+        # 提前停止迭代后仍可继续推演
+        for record in scene.events():
+            if record.type == "Finish":
+                break
+        self.assertEqual(ac.now_supply, 1000)
+        self.assertEqual(ac.now_resuce_people, 0)
+        scene.run()
+        self.assertEqual(ac.now_resuce_people, 2)
+        self.assertTrue(scene.is_subtask_queue_empty())
+
+    def test_run_until_tasks_finished(self):
+        pos = self.pos + [
+            epos.DisasterArea("灾区", 100.7, 30.4, 1000, 1000, 1000, 100, 10, 50, 2, 20, 10)
+        ]
+        ac = eac.AC313()
+        ac.now_position = pos[0]
+        scene = Scene([ac], m.Map(*pos), [], stop_when_tasks_finished=True)
+        task = Task(scene, "卸货", pos[2])
+        scene.add_plan(
+            [
+                (ac, "装载", pos[1], {"load_supply": 100}),  # type: ignore
+                (ac, "卸货", pos[2], {}),  # type: ignore
+                (ac, "装载", pos[1], {"load_supply": 100}),  # type: ignore
+            ]
+        )
+        branch = scene.fork()
+        branch.run()
+
+        # 任务完成后 run_until 立即返回，不推进到指定时间
+        records = scene.run_until(10_000)
+        self.assertTrue(task.is_finished)
+        self.assertEqual(records[-1].type, "Start")
+        self.assertEqual(scene.now_tick, branch.now_tick)
+        self.assertEqual(scene.run_until(20_000), [])
+        self.assertEqual(scene.now_tick, branch.now_tick)
+        self.assertEqual(scene.step(), [])
+
+    def test_timeout(self):
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        scene = Scene([ac], self.map, [])
+        scene.add_subtask("装载", ac, self.pos[1], load_supply=1000)
+        leg = scene.travel_time(ac, self.pos[0], self.pos[1])
+        self.assertFalse(scene.is_timeout)
+
+        self.addCleanup(setattr, Scene, "MAX_RESCUE_TIME", Scene.MAX_RESCUE_TIME)
+        Scene.MAX_RESCUE_TIME = leg / 2
+        scene.run()
+        self.assertTrue(scene.is_timeout)
+        Scene.MAX_RESCUE_TIME = leg + ac.supply_load_time * 1000 + 3600
+        scene.run()
+        self.assertFalse(scene.is_timeout)
+        self.assertEqual(ac.now_supply, 1000)
+
+    def test_integer_time_regression(self):
+        pos = [
+            epos.Airport("机场", 100, 30, 1000, 1000),
+            epos.Airport("机场2", 100.3, 30.1, 1000, 1000),
+            epos.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+            epos.DisasterArea(
+                "灾区", 100.7, 30.4, 1000, 1000, 1000, 100, 10, 50, 2, 20, 10, search=(True, 30)
+            ),
+        ]
+        aircrafts = [eac.AC313(), eac.Mi26(), eac.AC352()]
+        scene = Scene(aircrafts, m.Map(*pos), [])
+        for i, ac in enumerate(aircrafts):
+            ac.now_position = pos[i % 2]
+        scene.add_subtask("装载", aircrafts[0], pos[2], load_supply=123)
+        scene.add_subtask("运送", aircrafts[0], pos[2], load_people=3)
+        scene.add_subtask("侦查搜寻", aircrafts[2], pos[3])
+        scene.add_subtask("转移", aircrafts[1], pos[3], load_refugee=7)
+        scene.add_subtask("运送", aircrafts[2], pos[2], load_people=1)
+        scene.add_subtask("转移", aircrafts[2], pos[3], load_refugee=2)
+        finish = {r.aircraft: r.time for r in scene.events() if r.type == "Finish"}
+
+        # 改用整数时间单位之前（浮点秒）的结果
+        unit = 1 / Scene.TICKS_PER_SECOND
+        self.assertAlmostEqual(scene.now_time, 500.9712775816559, delta=unit)
+        self.assertAlmostEqual(finish[aircrafts[0]], 192.5113532116345, delta=unit)
+        self.assertAlmostEqual(finish[aircrafts[1]], 420.1995022689906, delta=unit)
+        self.assertAlmostEqual(finish[aircrafts[2]], 500.9712775816559, delta=unit)
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from arsim.collections.spatial import SphereGrid, chord_to_km, to_unit_sphere
+
+
+class TestSphereGrid(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        # 5 度 x 5 度范围内的密集数据，以及远处的另一小簇
+        self.lng = np.r_[rng.uniform(100, 105, 5000), rng.uniform(-60, -59.9, 50)]
+        self.lat = np.r_[rng.uniform(30, 35, 5000), rng.uniform(-20, -19.9, 50)]
+        self.grid = SphereGrid(self.lng, self.lat)
+
+    def brute(self, longitude: float, latitude: float) -> np.ndarray:
+        q = to_unit_sphere(np.array(longitude), np.array(latitude))
+        return np.sort(chord_to_km(np.linalg.norm(self.grid.points - q, axis=1)))
+
+    def test_cell_size(self):
+        # 网格只覆盖数据范围，且非空网格中的点数接近预期
+        self.assertLess(len(self.lng) / len(self.grid._cell_keys), 2 * SphereGrid._POINTS_PER_CELL)
+
+    def test_nearest(self):
+        queries = [(102.5, 32.5), (100.01, 30.01), (-59.95, -19.95), (-100, -40), (0, 90), (180, 0)]
+        for lng, lat in queries:
+            for k in (1, 7):
+                ids, dist = self.grid.nearest(lng, lat, k)
+                np.testing.assert_allclose(dist, self.brute(lng, lat)[:k])
+                np.testing.assert_allclose(
+                    chord_to_km(
+                        np.linalg.norm(
+                            self.grid.points[ids] - to_unit_sphere(np.array(lng), np.array(lat)),
+                            axis=1,
+                        )
+                    ),
+                    dist,
+                )
+        ids, _ = self.grid.nearest(self.lng[0], self.lat[0], 3, exclude=0)
+        self.assertNotIn(0, ids.tolist())
+        self.assertEqual(len(self.grid.nearest(-100, -40, 10000)[0]), len(self.lng))
+
+    def test_within(self):
+        for lng, lat, radius in [(102.5, 32.5, 30), (-59.95, -19.95, 5), (-100, -40, 5000)]:
+            _, dist = self.grid.within(lng, lat, radius)
+            expected = self.brute(lng, lat)
+            np.testing.assert_allclose(dist, expected[expected <= radius])
+
+    def test_degenerate(self):
+        # 所有点重合或位于同一纬线上
+        grid = SphereGrid(np.full(10, 100.0), np.full(10, 30.0))
+        self.assertEqual(len(grid.nearest(101, 30, 3)[0]), 3)
+        grid = SphereGrid(np.linspace(100, 110, 200), np.full(200, 30.0))
+        ids, _ = grid.nearest(105.01, 30, 1)
+        self.assertEqual(ids.tolist(), [100])
+        self.assertEqual(len(SphereGrid(np.empty(0), np.empty(0)).nearest(0, 0, 1)[0]), 0)
+
@@ -0,0 +1,203 @@
+import unittest
+from arsim import map as m
+from arsim.lockstep import LockstepEngine
+from arsim.scene import Scene
+from arsim.task import (
+    SUBTASK_KINDS,
+    SubTask,
+    SubTaskKind,
+    Task,
+    TaskType,
+    NotSupportedTaskException,
+    MissingSubtaskInformationException,
+    PositionNotSupportedException,
+    SubTaskSucceedException,
+    UnsupportedSubtaskException,
+    register_subtask_kind,
+)
+from arsim.examples import positions as epos
+from arsim.examples import aircrafts as eac
+
+
+class TestSubTaskKind(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pos = [
+            epos.Airport("机场", 100, 30, 1000, 1000),
+            epos.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+            epos.DisasterArea(
+                "灾区", 100.7, 30.4, 1000, 1000, 1000, 100, 10, 50, 2, 20, 10
+            ),
+        ]
+        self.map = m.Map(*self.pos)
+
+    def test_task_type(self):
+        # 每个内置类型都有描述，且与中文名称等价
+        self.assertEqual(set(SUBTASK_KINDS), set(TaskType))
+        self.assertEqual(TaskType.LOAD_SUPPLY, "装载")
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        scene = Scene([ac], self.map, [])
+        st = SubTask(scene, "装载", ac, self.pos[1], load_supply=100)
+        self.assertIs(st.type, TaskType.LOAD_SUPPLY)
+        self.assertEqual(st.kind.work, "Land")
+        self.assertEqual(st.consume_time_raw, ac.supply_load_time * 100)
+
+    def test_check(self):
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        scene = Scene([ac], self.map, [])
+        with self.assertRaises(UnsupportedSubtaskException):
+            SubTask(scene, "空投", ac, self.pos[2])
+        with self.assertRaises(MissingSubtaskInformationException):
+            SubTask(scene, TaskType.LOAD_SUPPLY, ac, self.pos[1])
+        with self.assertRaisesRegex(UnsupportedSubtaskException, "无法装载救援物资 99999 千克"):
+            SubTask(scene, "装载", ac, self.pos[1], load_supply=99999)
+        self.pos[1].supply = 5
+        with self.assertRaisesRegex(PositionNotSupportedException, "没有 10 千克物资"):
+            SubTask(scene, "装载", ac, self.pos[1], load_supply=10)
+        with self.assertRaisesRegex(PositionNotSupportedException, "不能从地点 灾区 装载物资"):
+            SubTask(scene, "装载", ac, self.pos[2], load_supply=10)
+        with self.assertRaisesRegex(UnsupportedSubtaskException, "上没有装载的物资"):
+            SubTask(scene, "卸货", ac, self.pos[2])
+        ac.now_supply = 10
+        self.pos[2].supply = self.pos[2].need_supply
+        with self.assertRaises(SubTaskSucceedException):
+            SubTask(scene, "卸货", ac, self.pos[2])
+
+    def test_duration_cache(self):
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        ac.now_supply = 40
+        scene = Scene([ac], self.map, [])
+        st = SubTask(scene, "卸货", ac, self.pos[2])
+        # 尚未开始的子任务每次按当前载荷计算
+        ac.now_supply = 30
+        self.assertEqual(st.consume_time_raw, ac.supply_load_time * 30)
+        self.assertIsNone(st._duration)
+
+        st.setup()
+        avoided = SubTask.avoided_duration_computations
+        ac.now_supply = 10
+        self.assertEqual(st.consume_time, ac.supply_load_time * 30)
+        self.assertEqual(st.consume_time_raw, ac.supply_load_time * 30)
+        if __debug__:
+            self.assertEqual(SubTask.avoided_duration_computations, avoided + 2)
+        st.invalidate_duration()
+        self.assertEqual(st.consume_time_raw, ac.supply_load_time * 10)
+
+        # 侦查搜寻在到达时按剩余面积重新计算
+        searcher = eac.AC352()
+        searcher.now_position = self.pos[0]
+        self.pos[2].search = (True, 30)
+        scene = Scene([searcher], self.map, [])
+        st = SubTask(scene, "侦查搜寻", searcher, self.pos[2])
+        st.setup()
+        self.assertEqual(st.consume_time_raw, searcher.search_time * 30)
+        self.pos[2].already_search = 20
+        st.arrive(st.arrive_tick)  # type: ignore
+        self.assertEqual(
+            st.finish_tick - st.arrive_tick,  # type: ignore
+            Scene.to_ticks(searcher.search_time * 10),
+        )
+
+    def test_register(self):
+        kind = register_subtask_kind(
+            SubTaskKind(
+                "空投", "Air", (epos.DisasterArea,), lambda ac: ac.supply_load_time / 2,
+                quantity="load", abilities=("Freight",),
+                load="now_supply", resource="supply", unload=True, need="need_supply",
+            )
+        )
+        self.addCleanup(SUBTASK_KINDS.pop, "空投")
+        with self.assertRaises(ValueError):
+            register_subtask_kind(kind)
+
+        ac = eac.AC313()
+        ac.now_position = self.pos[0]
+        scene = Scene([ac], self.map, [])
+        scene.add_subtask("装载", ac, self.pos[1], load_supply=60)
+        scene.run()
+        scene.add_subtask("空投", ac, self.pos[2])
+        start = scene.now_tick
+        scene.run()
+        self.assertEqual(self.pos[2].supply, 60)
+        self.assertEqual(ac.now_supply, 0)
+        self.assertIs(ac.now_position, self.pos[2])
+        travel = scene.travel_ticks(ac, self.pos[1], self.pos[2])
+        self.assertEqual(
+            scene.now_tick - start,
+            travel + Scene.to_ticks(ac.supply_load_time * 30),
+        )
+
+        # 注册的类型不能向量化推演
+        with self.assertRaises(ValueError):
+            LockstepEngine(scene, [[(ac, "空投", self.pos[2], {})]])
+
+
+class TestTask(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pos = [
+            epos.Airport("机场", 100, 30, 1000, 1000),
+            epos.Source("物资点", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+            epos.DisasterArea(
+                "灾区", 100.7, 30.4, 1000, 1000, 1000, 100, 10, 50, 2, 20, 10
+            ),
+        ]
+        self.ac = eac.AC313()
+        self.ac.now_position = self.pos[0]
+        self.scene = Scene([self.ac], m.Map(*self.pos), [], stop_when_tasks_finished=True)
+
+    def test_finish(self):
+        finished = []
+        task = Task(self.scene, "卸货", self.pos[2], on_finished=lambda sc, t: finished.append(t))
+        self.assertEqual(self.scene.tasks, [task])
+        self.assertFalse(self.scene.is_tasks_finished)
+        with self.assertRaises(NotSupportedTaskException):
+            Task(self.scene, "装载", self.pos[2])
+
+        self.scene.add_subtask("装载", self.ac, self.pos[1], load_supply=100)
+        self.scene.run()
+        self.assertFalse(task.is_finished)
+
+        self.scene.add_subtask("卸货", self.ac, self.pos[2])
+        self.scene.add_subtask("装载", self.ac, self.pos[1], load_supply=100)
+        branch = self.scene.fork()
+        branch.stop_when_tasks_finished = False
+        self.scene.run()
+        self.assertTrue(task.is_finished)
+        self.assertEqual(finished, [task])
+        self.assertTrue(self.scene.is_tasks_finished)
+        # 所有任务完成后提前结束，已经开始的下一个子任务不再推进
+        current = self.scene.aircraft_to_subtask[self.ac]
+        self.assertFalse(current.is_finished)  # type: ignore
+        self.assertEqual(self.ac.now_supply, 0)
+        self.assertEqual(self.scene.step(), [])
+
+        # 分支中的任务独立观察分支的地点
+        self.assertFalse(branch.tasks[0].is_finished)
+        branch.run()
+        self.assertTrue(branch.tasks[0].is_finished)
+        self.assertEqual(branch.pending_subtask_count, 0)
+        self.assertEqual(finished, [task, branch.tasks[0]])
+
+    def test_search(self):
+        self.pos[2].search = (True, 5)
+        task = Task(self.scene, "侦查搜寻", self.pos[2])
+        # 已满足条件的任务创建时即完成
+        done = Task(self.scene, "转运", self.pos[2])
+        self.pos[2].patient = 0
+        self.assertFalse(done.is_finished)
+        self.scene.notify_resource(self.pos[2], "patient")
+        self.assertTrue(done.is_finished)
+
+        searcher = eac.AC352()
+        searcher.now_position = self.pos[0]
+        scene = Scene([searcher], self.scene.map, [task], stop_when_tasks_finished=True)
+        self.assertIs(task.scene, scene)
+        scene.add_subtask("侦查搜寻", searcher, self.pos[2])
+        scene.run()
+        self.assertTrue(task.is_finished)
+
+
+if __name__ == "__main__":
+    unittest.main()
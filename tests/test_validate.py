@@ -0,0 +1,91 @@
+import unittest
+from arsim import map as m
+from arsim.scene import Scene
+from arsim.task import MissingSubtaskInformationException, SubTaskSucceedException
+from arsim.validate import PlanValidationException, validate_plan
+from arsim.examples import positions as epos
+from arsim.examples import aircrafts as eac
+
+
+class TestValidate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pos = [
+            epos.Airport("机场", 100, 30, 1000, 1000),
+            epos.Source("水源", 100.5, 30.2, 1000, 1000, 1000, 5000, 20, 3, 40),
+            epos.DisasterArea(
+                "灾区", 100.7, 30.4, 1000, 1000, 1000, 100, 10, 50, 2, 20, 10
+            ),
+            epos.DisasterArea("小灾区", 100.8, 30.5, 10, 10, 10, 100, 0, 0, 0, 0, 0),
+        ]
+        self.aircrafts = [eac.AC313(), eac.AC313()]
+        for ac in self.aircrafts:
+            ac.now_position = self.pos[0]
+        self.scene = Scene(self.aircrafts, m.Map(*self.pos), [])
+
+    def test_violations(self):
+        ac = self.aircrafts[0]
+        plan = [
+            (ac, "取水", self.pos[1], {}),
+            (ac, "侦查搜寻", self.pos[2], {}),
+            (ac, "卸货", self.pos[2], {}),
+            (ac, "装载", self.pos[3], {"load_supply": 10}),
+            (ac, "装载", self.pos[1], {"load_supply": 10}),
+        ]
+        violations = validate_plan(self.scene, plan)  # type: ignore
+        self.assertEqual(
+            [(v.index, v.rule) for v in violations],
+            [
+                (0, "missing_information"),
+                (1, "ability"),
+                (1, "position"),
+                (2, "empty"),
+                (3, "work_area"),
+                (3, "position"),
+            ],
+        )
+        self.assertIs(violations[0].exception, MissingSubtaskInformationException)
+        self.assertEqual(violations[2].message, "地点 灾区 不需要侦查搜寻")
+
+        with self.assertRaises(PlanValidationException) as cm:
+            self.scene.add_plan(plan)  # type: ignore
+        self.assertEqual(cm.exception.violations, violations)
+        self.assertEqual(self.scene.pending_subtask_count, 0)
+
+    def test_dry_run(self):
+        a, b = self.aircrafts
+        plan = [
+            (a, "装载", self.pos[1], {"load_supply": 60}),
+            (b, "装载", self.pos[1], {"load_supply": 60}),
+            (a, "卸货", self.pos[2], {}),
+            (b, "卸货", self.pos[2], {}),
+            (a, "卸货", self.pos[2], {}),
+        ]
+        violations = validate_plan(self.scene, plan)  # type: ignore
+        # 两次卸货后灾区物资达到需求，a 的载荷已经卸完
+        self.assertEqual([(v.index, v.rule) for v in violations], [(4, "empty"), (4, "done")])
+        self.assertIs(violations[1].exception, SubTaskSucceedException)
+
+        self.pos[1].supply = 100
+        violations = validate_plan(self.scene, plan[:3])  # type: ignore
+        self.assertEqual([(v.index, v.rule) for v in violations], [(1, "stock")])
+
+    def test_add_plan(self):
+        a, b = self.aircrafts
+        # 已排队的子任务先结算
+        self.scene.add_subtask("装载", a, self.pos[1], load_supply=60)
+        self.scene.add_plan(
+            [
+                (a, "卸货", self.pos[2], {}),  # type: ignore
+                (b, "装载", self.pos[1], {"load_supply": 40}),  # type: ignore
+                (b, "卸货", self.pos[2], {}),  # type: ignore
+            ]
+        )
+        self.assertEqual(self.scene.pending_subtask_count, 4)
+        self.scene.run()
+        self.assertEqual(self.pos[2].supply, 100)
+        self.assertEqual(self.pos[1].supply, 4900)
+        self.assertEqual(a.now_supply + b.now_supply, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()